@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-file chunker construction vs. a long-lived chunker.
+
+Usage:
+    python scripts/bench_chunker_reuse.py [--files 200]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.processing.code_chunker import ChunkingConfig, CodeChunker  # noqa: E402
+from src.processing.tree_sitter_parser import SupportedLanguage  # noqa: E402
+
+
+JAVA_TEMPLATE = """
+package com.example.service{n};
+
+public class AccountService{n} {{
+    public double transfer(String user, double amount) {{
+        if (user == null || amount <= 0) {{
+            throw new IllegalArgumentException("invalid transfer");
+        }}
+        return amount * 1.0{n};
+    }}
+}}
+"""
+
+
+def _config() -> ChunkingConfig:
+    return ChunkingConfig(max_chunk_size=1000, min_chunk_size=100, include_context=True, semantic_splitting=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    args = parser.parse_args()
+
+    sources = [(f"src/AccountService{n}.java", JAVA_TEMPLATE.format(n=n)) for n in range(args.files)]
+
+    start = time.perf_counter()
+    for path, content in sources:
+        CodeChunker(_config()).chunk_file(path, content, SupportedLanguage.JAVA)
+    per_file_new = (time.perf_counter() - start) / len(sources)
+
+    chunker = CodeChunker(_config())
+    start = time.perf_counter()
+    for path, content in sources:
+        chunker.chunk_file(path, content, SupportedLanguage.JAVA)
+    per_file_reused = (time.perf_counter() - start) / len(sources)
+
+    print(f"files:                {len(sources)}")
+    print(f"new chunker per file: {per_file_new * 1000:.3f} ms/file")
+    print(f"reused chunker:       {per_file_reused * 1000:.3f} ms/file")
+    print(f"per-file overhead:    {(per_file_new - per_file_reused) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: fp32 PyTorch vs. ONNX Runtime (int8) CodeBERT on CPU.
+
+Embeds the same mixed-length code snippets with both backends and reports
+throughput and cosine agreement. Requires torch, onnx and onnxruntime.
+
+Usage:
+    python scripts/bench_embedding_backends.py [--texts 256] [--threads 0]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.embedding_backends import VALIDATION_SNIPPETS, cosine_agreement  # noqa: E402
+from src.core.embedding_config import (  # noqa: E402
+    AsyncEnhancedEmbeddingClient,
+    EmbeddingBackendType,
+    EmbeddingConfig,
+)
+
+
+def _texts(count: int) -> list:
+    rng = random.Random(7)
+    return [
+        "\n".join(rng.choice(VALIDATION_SNIPPETS) for _ in range(rng.randint(1, 12))) + f"\n// {i}"
+        for i in range(count)
+    ]
+
+
+def _run(client: AsyncEnhancedEmbeddingClient, texts: list):
+    asyncio.run(client._ensure_model_initialized())
+    client._generate_embeddings(texts[:8])  # warm-up
+    start = time.perf_counter()
+    embeddings = client._generate_embeddings(texts)
+    return embeddings, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = runtime default)")
+    parser.add_argument("--fp32", action="store_true", help="Benchmark the unquantized ONNX graph")
+    args = parser.parse_args()
+
+    texts = _texts(args.texts)
+    torch_embeddings, torch_time = _run(AsyncEnhancedEmbeddingClient(EmbeddingConfig(use_cache=False)), texts)
+    onnx_embeddings, onnx_time = _run(AsyncEnhancedEmbeddingClient(EmbeddingConfig(
+        use_cache=False,
+        backend=EmbeddingBackendType.ONNX,
+        onnx_quantize=not args.fp32,
+        onnx_intra_op_threads=args.threads
+    )), texts)
+    agreement = cosine_agreement(torch_embeddings, onnx_embeddings)
+
+    print(f"texts:            {len(texts)}")
+    print(f"torch fp32:       {len(texts) / torch_time:.1f} texts/s")
+    print(f"onnx {'fp32' if args.fp32 else 'int8'}:        {len(texts) / onnx_time:.1f} texts/s")
+    print(f"speedup:          {torch_time / onnx_time:.2f}x")
+    print(f"cosine mean/min:  {agreement['mean_cosine']:.4f} / {agreement['min_cosine']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Repository Ingestion Benchmark
+==============================
+
+Generates a synthetic legacy repository (Java services and Struts actions,
+JSP pages, struts-config.xml, pom.xml and CORBA IDL) and runs
+EnhancedRepositoryProcessor against in-memory stand-ins for ChromaDB, Neo4j
+and the embedding client. Reports throughput, per-stage latency and peak RSS
+as JSON so results can be compared between releases.
+
+Usage:
+    python scripts/benchmark_ingestion.py [options]
+
+Options:
+    --files N               Number of generated source files (default 500)
+    --mix SPEC              File mix, e.g. java=0.7,jsp=0.2,idl=0.1
+    --seed N                Corpus seed (default 42)
+    --embed-latency-ms MS   Simulated embedding latency per batch (default 0)
+    --parse-workers N       Parse worker processes (default 0 = inline)
+    --output FILE           Write JSON here instead of stdout
+    --workdir DIR           Generate the corpus here and keep it
+    --verbose               Show per-file warnings
+
+Examples:
+    python scripts/benchmark_ingestion.py --files 2000 --output bench.json
+    python scripts/benchmark_ingestion.py --mix java=0.5,jsp=0.5 --embed-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.chromadb_client import gather_embeddings  # noqa: E402
+from src.core.performance_metrics import performance_collector  # noqa: E402
+from src.services.repository_processor_v2 import (  # noqa: E402
+    EnhancedRepositoryProcessor,
+    LocalRepositoryConfig,
+)
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+DEFAULT_MIX = {'java': 0.65, 'jsp': 0.25, 'idl': 0.10}
+DOMAINS = ['account', 'payment', 'policy', 'customer', 'claim', 'billing', 'audit', 'user']
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+def _java_action(pkg: str, name: str, domain: str, rng: random.Random) -> str:
+    checks = "\n".join(
+        f'        if (form.get{field.title()}() == null || form.get{field.title()}().isEmpty()) {{\n'
+        f'            errors.add("{field}", new ActionMessage("error.{domain}.{field}.required"));\n'
+        f'        }}'
+        for field in rng.sample(['id', 'amount', 'name', 'status', 'code', 'date'], 3)
+    )
+    return f"""package {pkg};
+
+import org.apache.struts.action.Action;
+import org.apache.struts.action.ActionForm;
+import org.apache.struts.action.ActionForward;
+import org.apache.struts.action.ActionMapping;
+import org.apache.struts.action.ActionMessage;
+import org.apache.struts.action.ActionMessages;
+
+/**
+ * Handles {domain} requests.
+ */
+public class {name}Action extends Action {{
+
+    private {name}Service service = new {name}Service();
+
+    public ActionForward execute(ActionMapping mapping, ActionForm actionForm,
+                                 HttpServletRequest request, HttpServletResponse response) throws Exception {{
+        {name}Form form = ({name}Form) actionForm;
+        ActionMessages errors = new ActionMessages();
+{checks}
+        if (!errors.isEmpty()) {{
+            saveErrors(request, errors);
+            return mapping.findForward("failure");
+        }}
+        service.process(form.getId(), form.getAmount());
+        return mapping.findForward("success");
+    }}
+}}
+"""
+
+
+def _java_service(pkg: str, name: str, domain: str, rng: random.Random) -> str:
+    methods = "\n".join(
+        f"""    public double {verb}{name}(String id, double amount) {{
+        if (amount <= 0) {{
+            throw new IllegalArgumentException("{domain} amount must be positive");
+        }}
+        double total = amount;
+        for (int i = 0; i < {rng.randint(2, 9)}; i++) {{
+            total = total * 1.0{rng.randint(1, 9)};
+        }}
+        return dao.save(id, total);
+    }}
+"""
+        for verb in rng.sample(['calculate', 'validate', 'apply', 'reverse', 'settle', 'load'], 3)
+    )
+    return f"""package {pkg};
+
+import java.util.List;
+
+public class {name}Service {{
+
+    private {name}Dao dao = new {name}Dao();
+
+    public void process(String id, double amount) {{
+        validate{name}(id, amount);
+    }}
+
+{methods}}}
+"""
+
+
+def _jsp_page(name: str, domain: str, rng: random.Random) -> str:
+    fields = "\n".join(
+        f'    <tr><td><bean:message key="{domain}.{field}"/></td>'
+        f'<td><html:text property="{field}"/></td></tr>'
+        for field in rng.sample(['id', 'amount', 'name', 'status', 'code', 'date'], 4)
+    )
+    return f"""<%@ taglib uri="/WEB-INF/struts-html.tld" prefix="html" %>
+<%@ taglib uri="/WEB-INF/struts-bean.tld" prefix="bean" %>
+<%@ page import="java.sql.*" %>
+<html:html>
+<body>
+<% String user = (String) session.getAttribute("user"); %>
+<html:form action="/{domain}/{name.lower()}">
+  <table>
+{fields}
+  </table>
+  <html:submit/>
+</html:form>
+<% if (user == null) {{ response.sendRedirect("login.jsp"); }} %>
+</body>
+</html:html>
+"""
+
+
+def _idl_module(name: str, domain: str, rng: random.Random) -> str:
+    ops = "\n".join(
+        f"        double {verb}{name}(in string id, in double amount) raises ({name}Exception);"
+        for verb in rng.sample(['get', 'post', 'reverse', 'settle', 'quote'], 3)
+    )
+    return f"""module {domain} {{
+    exception {name}Exception {{ string reason; }};
+    interface {name}Manager {{
+{ops}
+    }};
+}};
+"""
+
+
+def _struts_config(actions: List[Dict[str, str]]) -> str:
+    mappings = "\n".join(
+        f'    <action path="/{a["domain"]}/{a["name"].lower()}" type="{a["class"]}" name="{a["name"]}Form" '
+        f'scope="request" validate="true">\n'
+        f'      <forward name="success" path="/{a["domain"]}/{a["name"].lower()}.jsp"/>\n'
+        f'      <forward name="failure" path="/error.jsp"/>\n'
+        f'    </action>'
+        for a in actions
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<struts-config>
+  <action-mappings>
+{mappings}
+  </action-mappings>
+</struts-config>
+"""
+
+
+def _pom(artifact: str) -> str:
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>com.acme.legacy</groupId>
+  <artifactId>{artifact}</artifactId>
+  <version>1.0.0</version>
+  <packaging>war</packaging>
+  <dependencies>
+    <dependency><groupId>struts</groupId><artifactId>struts</artifactId><version>1.2.9</version></dependency>
+    <dependency><groupId>org.jacorb</groupId><artifactId>jacorb</artifactId><version>2.3.0</version></dependency>
+  </dependencies>
+</project>
+"""
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """Parse 'java=0.7,jsp=0.2,idl=0.1' into normalized weights."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(','):
+        kind, _, weight = part.partition('=')
+        if kind.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown file kind in mix: {kind}")
+        mix[kind.strip()] = float(weight)
+    total = sum(mix.values())
+    return {kind: weight / total for kind, weight in mix.items()}
+
+
+def generate_repository(root: Path, files: int, mix: Dict[str, float], seed: int = 42) -> Dict[str, int]:
+    """
+    Write a synthetic Struts/CORBA repository.
+
+    Returns:
+        Count of generated files per kind
+    """
+    rng = random.Random(seed)
+    counts: Dict[str, int] = defaultdict(int)
+    actions: List[Dict[str, str]] = []
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+
+    for i in range(files):
+        kind = rng.choices(kinds, weights)[0]
+        domain = DOMAINS[i % len(DOMAINS)]
+        name = f"{domain.title()}{i:05d}"
+        if kind == 'java':
+            pkg = f"com.acme.{domain}"
+            pkg_dir = root / "src" / "main" / "java" / Path(*pkg.split('.'))
+            pkg_dir.mkdir(parents=True, exist_ok=True)
+            if rng.random() < 0.5:
+                (pkg_dir / f"{name}Action.java").write_text(_java_action(pkg, name, domain, rng))
+                actions.append({'domain': domain, 'name': name, 'class': f"{pkg}.{name}Action"})
+            else:
+                (pkg_dir / f"{name}Service.java").write_text(_java_service(pkg, name, domain, rng))
+        elif kind == 'jsp':
+            jsp_dir = root / "src" / "main" / "webapp" / domain
+            jsp_dir.mkdir(parents=True, exist_ok=True)
+            (jsp_dir / f"{name.lower()}.jsp").write_text(_jsp_page(name, domain, rng))
+        else:
+            idl_dir = root / "src" / "main" / "idl"
+            idl_dir.mkdir(parents=True, exist_ok=True)
+            (idl_dir / f"{name}.idl").write_text(_idl_module(name, domain, rng))
+        counts[kind] += 1
+
+    webinf = root / "src" / "main" / "webapp" / "WEB-INF"
+    webinf.mkdir(parents=True, exist_ok=True)
+    (webinf / "struts-config.xml").write_text(_struts_config(actions))
+    (root / "pom.xml").write_text(_pom(root.name))
+    counts['xml'] += 2
+    return dict(counts)
+
+
+# ---------------------------------------------------------------------------
+# In-memory stand-ins
+# ---------------------------------------------------------------------------
+
+class StageTimer:
+    """Collects per-call latencies by stage name."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            result[stage] = {
+                'calls': len(values),
+                'total_ms': sum(values) * 1000,
+                'p50_ms': statistics.median(ordered) * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max_ms': ordered[-1] * 1000
+            }
+        return result
+
+
+class InMemoryEmbeddingClient:
+    """Deterministic hash-seeded embeddings with optional simulated latency."""
+
+    def __init__(self, timer: StageTimer, dimension: int = 768, latency_ms: float = 0.0):
+        self.timer = timer
+        self.dimension = dimension
+        self.latency = latency_ms / 1000.0
+
+    async def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+            vectors[i] = np.random.default_rng(seed).standard_normal(self.dimension, dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.timer.record('embed_batch', time.perf_counter() - start)
+        return vectors
+
+
+class InMemoryChromaClient:
+    """Keeps chunk IDs per collection; records write latency."""
+
+    def __init__(self, timer: StageTimer):
+        self.timer = timer
+        self.collections: Dict[str, Dict[str, Any]] = defaultdict(dict)
+
+    async def add_chunks(self, chunks, collection_name: str = None, repository: str = None) -> bool:
+        start = time.perf_counter()
+        collection = self.collections[collection_name or repository]
+        embeddings = gather_embeddings(chunks)
+        for chunk in chunks:
+            collection[chunk.chunk.id] = embeddings is not None
+        await asyncio.sleep(0)
+        self.timer.record('chroma_write', time.perf_counter() - start)
+        return True
+
+    async def delete_chunks(self, ids, collection_name: str = None, repository: str = None) -> bool:
+        for chunk_id in ids:
+            self.collections[collection_name or repository].pop(chunk_id, None)
+        return True
+
+
+class InMemoryNeo4jClient:
+    """Counts nodes per label; records write latency."""
+
+    def __init__(self, timer: StageTimer):
+        self.timer = timer
+        self.nodes: Dict[str, int] = defaultdict(int)
+        self.queries = 0
+
+    async def execute_query(self, query):
+        self.queries += 1
+        return type("Result", (), {"records": []})()
+
+    async def delete_file_nodes(self, repository_name, file_paths, chunk_ids) -> bool:
+        return True
+
+    async def _write(self, label: str, records) -> bool:
+        start = time.perf_counter()
+        self.nodes[label] += len(records)
+        await asyncio.sleep(0)
+        self.timer.record('neo4j_write', time.perf_counter() - start)
+        return True
+
+    async def create_business_rules(self, records) -> bool:
+        return await self._write('BusinessRule', records)
+
+    async def create_struts_actions(self, records) -> bool:
+        return await self._write('StrutsAction', records)
+
+    async def create_corba_interfaces(self, records) -> bool:
+        return await self._write('CORBAInterface', records)
+
+    async def create_jsp_components(self, records) -> bool:
+        return await self._write('JSPComponent', records)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _rss_bytes() -> Optional[int]:
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss
+    return None
+
+
+def _max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+async def _sample_rss(peak: Dict[str, int], interval: float = 0.05) -> None:
+    while True:
+        rss = _rss_bytes()
+        if rss is not None:
+            peak['rss'] = max(peak.get('rss', 0), rss)
+        await asyncio.sleep(interval)
+
+
+def _timed(timer: StageTimer, stage: str, func):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            timer.record(stage, time.perf_counter() - start)
+    return wrapper
+
+
+async def run_benchmark(repo_path: Path,
+                        embed_latency_ms: float = 0.0,
+                        parse_workers: int = 0,
+                        workspace_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Index repo_path once with in-memory backends and return the metrics."""
+    timer = StageTimer()
+    chroma = InMemoryChromaClient(timer)
+    neo4j = InMemoryNeo4jClient(timer)
+    processor = EnhancedRepositoryProcessor(
+        chroma_client=chroma,
+        neo4j_client=neo4j,
+        workspace_dir=str(workspace_dir or repo_path.parent / ".bench-workspace"),
+        use_codebert=True,
+        embedding_client=InMemoryEmbeddingClient(timer, latency_ms=embed_latency_ms),
+        parse_workers=parse_workers
+    )
+
+    pipeline_stats: Dict[str, Any] = {}
+    process_code = processor._process_code_files_async
+
+    async def process_code_with_stats(*args, **kwargs):
+        results = await process_code(*args, **kwargs)
+        pipeline_stats.update(results.get('statistics', {}).get('pipeline', {}))
+        return results
+
+    processor._analyze_repository_async = _timed(timer, 'discover_and_analyze', processor._analyze_repository_async)
+    processor._process_code_files_async = _timed(timer, 'code_pipeline', process_code_with_stats)
+    processor._parse_file_async = _timed(timer, 'parse_file', processor._parse_file_async)
+    processor._store_local_repository_data_async = _timed(
+        timer, 'store_metadata', processor._store_local_repository_data_async
+    )
+
+    config = LocalRepositoryConfig(name=repo_path.name, path=str(repo_path))
+    config.include_patterns = config.include_patterns + ["**/*.jsp", "**/*.xml", "**/*.idl"]
+
+    run_id = uuid.uuid4().hex
+    peak: Dict[str, int] = {}
+    rss_before = _rss_bytes()
+    sampler = asyncio.create_task(_sample_rss(peak))
+    start = time.perf_counter()
+    try:
+        result = await processor.process_local_repository(config, run_id=run_id)
+    finally:
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        await processor.cleanup()
+
+    if result.status.value != 'completed':
+        raise RuntimeError(f"Benchmark run failed: {result.error_code}: {result.error_message}")
+
+    return {
+        'files': result.processed_files,
+        'files_failed': pipeline_stats.get('files_read', 0) - pipeline_stats.get('files_parsed', 0),
+        'chunks': result.generated_chunks,
+        'lines_of_code': result.total_lines_of_code,
+        'files_by_language': result.files_by_language,
+        'elapsed_s': elapsed,
+        'files_per_s': result.processed_files / elapsed if elapsed else 0.0,
+        'chunks_per_s': result.generated_chunks / elapsed if elapsed else 0.0,
+        'stages': timer.summary(),
+        'pipeline': pipeline_stats,
+        'collector_stages': performance_collector.get_stage_metrics(run_id) or {},
+        'stored': {
+            'chroma_chunks': sum(len(c) for c in chroma.collections.values()),
+            'neo4j_nodes': dict(neo4j.nodes)
+        },
+        'memory': {
+            'rss_before_mb': rss_before / 2**20 if rss_before else None,
+            'peak_rss_mb': peak['rss'] / 2**20 if 'rss' in peak else None,
+            'process_max_rss_mb': (_max_rss_bytes() or 0) / 2**20 or None
+        }
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Repository ingestion benchmark")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--mix", type=str, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--workdir", type=str, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Show per-file warnings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.ERROR)
+    mix = parse_mix(args.mix)
+
+    base = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="ingest-bench-"))
+    repo_path = base / f"synthetic-{args.files}-{args.seed}"
+    try:
+        if repo_path.exists():
+            shutil.rmtree(repo_path)
+        repo_path.mkdir(parents=True)
+        generated = generate_repository(repo_path, args.files, mix, args.seed)
+
+        metrics = asyncio.run(run_benchmark(
+            repo_path,
+            embed_latency_ms=args.embed_latency_ms,
+            parse_workers=args.parse_workers,
+            workspace_dir=base / ".bench-workspace"
+        ))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        'benchmark': 'repository_ingestion',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': {'files': args.files, 'mix': mix, 'seed': args.seed, 'generated': generated},
+        'settings': {'embed_latency_ms': args.embed_latency_ms, 'parse_workers': args.parse_workers},
+        'results': metrics
+    }
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ Admin API routes for system administration and management.
 
 import asyncio
 import time
+from dataclasses import replace
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, Depends, HTTPException, Query as QueryParam
 from pydantic import BaseModel, Field
@@ -11,7 +12,11 @@ from pydantic import BaseModel, Field
 from ...core.chromadb_client import ChromaDBClient
 from ...core.neo4j_client import Neo4jClient, GraphQuery
 from ...services.repository_processor import RepositoryProcessor
-from ...dependencies import get_chroma_client, get_neo4j_client, get_repository_processor
+from ...core.exceptions import ProcessingError
+from ...dependencies import (
+    get_chroma_client, get_neo4j_client, get_repository_processor,
+    get_embedding_client, get_embedding_migrator
+)
 from ...config.settings import get_settings
 
 
@@ -53,6 +58,21 @@ class BackupRequest(BaseModel):
         }
 
 
+class ReembedRequest(BaseModel):
+    """Request model for re-embedding collections with another embedding model."""
+    model_name: str = Field(..., description="Embedding model to re-embed with")
+    max_length: Optional[int] = Field(default=None, description="Model max length (default: unchanged)")
+    collections: Optional[List[str]] = Field(default=None, description="Logical collections (default: all registered)")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "model_name": "microsoft/unixcoder-base",
+                "collections": None
+            }
+        }
+
+
 @router.get("/system-info")
 async def get_system_info(
     chroma_client: ChromaDBClient = Depends(get_chroma_client),
@@ -533,7 +553,7 @@ async def clear_caches(
     try:
         cleared_caches = []
         
-        if "all" in cache_types or "chromadb" in cache_types:
+        if ("all" in cache_types or "chromadb" in cache_types) and chroma_client.query_cache is not None:
             chroma_client.query_cache.clear()
             cleared_caches.append("chromadb_query_cache")
         
@@ -968,4 +988,85 @@ async def reset_databases(
         raise HTTPException(
             status_code=500,
             detail=f"Database reset operation failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/embeddings/reembed")
+async def start_reembedding(
+    request: ReembedRequest,
+    embedding_client=Depends(get_embedding_client),
+    migrator=Depends(get_embedding_migrator)
+):
+    """
+    Re-embed collections with another embedding model in the background.
+    
+    Shadow collections are built in throttled batches while the current model
+    keeps serving; queries switch to the new model once every shadow is complete.
+    """
+    overrides = {'model_name': request.model_name}
+    if request.max_length:
+        overrides['max_length'] = request.max_length
+    # Same client class and settings as the serving client, different model
+    target_client = type(embedding_client)(replace(embedding_client.config, **overrides))
+    try:
+        migrator.start(target_client, request.collections)
+    except ProcessingError as e:
+        target_client.close()
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {
+        "status": "reembedding_started",
+        **migrator.status(),
+        "timestamp": time.time()
+    }
+
+
+@router.get("/embeddings/status")
+async def get_reembedding_status(migrator=Depends(get_embedding_migrator)):
+    """Active, shadow and previous embedding collections, plus re-embedding progress."""
+    return {
+        **migrator.status(),
+        "timestamp": time.time()
+    }
+
+
+class VectorIndexRefreshRequest(BaseModel):
+    """Request model for rebuilding local vector indexes."""
+    collections: Optional[List[str]] = Field(None, description="Collections to rebuild (default: all indexed)")
+
+
+def _local_index(chroma_client: ChromaDBClient):
+    local_index = getattr(chroma_client, "local_index", None)
+    if local_index is None:
+        raise HTTPException(status_code=503, detail="Local vector index is disabled (LOCAL_INDEX_ENABLED)")
+    return local_index
+
+
+@router.get("/vector-index/status")
+async def get_vector_index_status(
+    verify: bool = QueryParam(default=False, description="Compare every local index with Chroma"),
+    chroma_client: ChromaDBClient = Depends(get_chroma_client)
+):
+    """Local ANN indexes, query counters and, with verify, a consistency check against Chroma."""
+    local_index = _local_index(chroma_client)
+    status = local_index.status()
+    if verify:
+        status["consistency"] = [await local_index.verify(name) for name in list(local_index.indexes)]
+    return {**status, "timestamp": time.time()}
+
+
+@router.post("/vector-index/refresh")
+async def refresh_vector_index(
+    request: VectorIndexRefreshRequest,
+    chroma_client: ChromaDBClient = Depends(get_chroma_client)
+):
+    """Rebuild local ANN indexes from Chroma in the background; queries use Chroma until a build is done."""
+    local_index = _local_index(chroma_client)
+    collections = request.collections or list(local_index.indexes)
+    for name in collections:
+        local_index.ensure_build(chroma_client.resolve_query_collection(name) or name, force=True)
+    return {
+        "status": "refresh_started",
+        "collections": collections,
+        "timestamp": time.time()
+    }
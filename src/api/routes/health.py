@@ -23,11 +23,23 @@ from ...core.exceptions import (
     ValidationError, TimeoutError as GraphRAGTimeoutError
 )
 from ...core.diagnostics import diagnostic_collector
+from ...config.settings import settings
 
 
 router = APIRouter()
 
 
+def _embedding_gates_readiness(embedding_client: Any) -> bool:
+    """
+    Whether a cold embedding model keeps the service unready.
+
+    Only the startup preload warms the model up. Without it the model loads on
+    the first encode, which never arrives while load balancers hold traffic
+    back from an unready pod.
+    """
+    return bool(embedding_client) and settings.embedding_readiness_gate and settings.embedding_preload
+
+
 async def _get_and_validate_clients(request: Request) -> Dict[str, Any]:
     """
     Helper function to get and validate all clients with comprehensive error handling.
@@ -570,8 +582,20 @@ async def readiness_check(request: Request):
                 "note": "Non-blocking for readiness"
             }
         
-        # Check CodeBERT embedding system
-        if embedding_client:
+        # Check CodeBERT embedding system; report preload/warm-up state without triggering a model load
+        if embedding_client and hasattr(embedding_client, "readiness"):
+            embedding_readiness = embedding_client.readiness()
+            health_checks["embedding_system"] = {
+                **embedding_readiness,
+                "status": "healthy" if embedding_readiness["ready"] else embedding_readiness["state"],
+            }
+            if not embedding_readiness["ready"]:
+                health_checks["embedding_system"]["troubleshooting"] = (
+                    "CodeBERT is still loading/warming up - retry shortly"
+                    if embedding_readiness["state"] != "failed"
+                    else f"CodeBERT warm-up failed: {embedding_readiness.get('error')}"
+                )
+        elif embedding_client:
             try:
                 embedding_health = await asyncio.wait_for(
                     embedding_client.health_check(),
@@ -607,7 +631,8 @@ async def readiness_check(request: Request):
         # - ChromaDB
         # - Neo4j
         # Treat processor as healthy if missing health_check (already normalized above).
-        # Do NOT gate on embedding_system (informational only).
+        # The embedding system gates only with embedding_readiness_gate and a
+        # startup preload, so load balancers route traffic once the model is hot.
         core_ready = []
         for name in ("chromadb", "neo4j"):
             if name in health_checks:
@@ -619,6 +644,8 @@ async def readiness_check(request: Request):
             core_ready.append(bool(health_checks["processor"].get("ready", True)))
         else:
             core_ready.append(True)
+        if _embedding_gates_readiness(embedding_client):
+            core_ready.append(bool(health_checks["embedding_system"].get("ready", False)))
 
         is_ready = all(core_ready)
 
@@ -896,6 +923,11 @@ async def get_metrics(request: Request):
         metrics.append(f"# TYPE codebase_rag_memory_usage_percent gauge")
         metrics.append(f"codebase_rag_memory_usage_percent {psutil.virtual_memory().percent}")
         
+        # Collected metrics, including the embedding batch/queue/cache histograms
+        collected = performance_collector.export_metrics(format="prometheus")
+        if collected:
+            metrics.append(collected)
+        
         # Return metrics in Prometheus format
         return "\n".join(metrics)
         
@@ -1031,7 +1063,8 @@ async def reset_metrics(request: Request):
             chroma_client.query_count = 0
             chroma_client.total_query_time = 0.0
             chroma_client.cache_hits = 0
-            chroma_client.query_cache.clear()
+            if chroma_client.query_cache is not None:
+                chroma_client.query_cache.clear()
         
         # Reset Neo4j metrics
         if neo4j_client:
@@ -1874,6 +1907,8 @@ async def get_enhanced_embedding_status(request: Request):
             "status": "enhanced_embeddings_active",
             "health": health_info,
             "statistics": stats,
+            # Batch size, padding, latency, queue wait, throughput and per-text cache histograms
+            "telemetry": stats.get('telemetry'),
             "features": {
                 "codebert_available": stats.get('model_name', '').lower().find('codebert') != -1,
                 "caching_enabled": True,
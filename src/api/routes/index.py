@@ -1147,13 +1147,33 @@ async def get_indexing_logs(task_id: str, level: str = QueryParam(default="INFO"
 
 
 @router.get("/metrics/stages")
-async def get_stage_metrics(redis_client: RedisClient = Depends(get_redis_client)):
+async def get_stage_metrics(task_id: Optional[str] = QueryParam(default=None), redis_client: RedisClient = Depends(get_redis_client)):
     """
     Get detailed metrics about processing stages across all tasks.
     
     This endpoint provides insights into stage performance, bottlenecks,
     and processing patterns for monitoring and optimization.
+    
+    With task_id, returns the ingestion stage breakdown of that task instead:
+    wall time, CPU time, bytes read, items processed and queue depth for
+    discovery, read, parse, chunk, business analysis, embed, Chroma write and
+    Neo4j write, plus the stage with the most wall time.
     """
+    if task_id is not None:
+        status = await redis_client.get_task_status(task_id)
+        if not status:
+            raise HTTPException(status_code=404, detail="Task not found")
+        stages = performance_collector.get_stage_metrics(status.get('run_id')) or {}
+        bottleneck = max(stages.values(), key=lambda m: m["wall_time"])["stage"] if stages else None
+        return {
+            "task_id": task_id,
+            "run_id": status.get('run_id'),
+            "repository_name": status.get('repository_name'),
+            "stages": stages,
+            "bottleneck": bottleneck,
+            "timestamp": datetime.now().isoformat()
+        }
+    
     all_statuses = await redis_client.get_all_task_statuses()
     stage_metrics = {}
     
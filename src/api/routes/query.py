@@ -41,6 +41,21 @@ class SemanticSearchRequest(BaseModel):
         }
 
 
+class BatchSemanticSearchRequest(BaseModel):
+    """Request model for several semantic searches in one call."""
+    queries: List[SemanticSearchRequest] = Field(..., min_length=1, max_length=64, description="Searches to run")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "queries": [
+                    {"query": "authentication login function", "limit": 5},
+                    {"query": "password reset token", "limit": 5, "repository_filter": "user-service"}
+                ]
+            }
+        }
+
+
 class GraphQueryRequest(BaseModel):
     """Request model for graph queries."""
     cypher: str = Field(..., description="Cypher query")
@@ -176,7 +191,8 @@ async def semantic_search(
         )
         
         # Execute search
-        results = await chroma_client.search(search_query)
+        all_results, cache_hits = await chroma_client.search_many_with_cache_status([search_query])
+        results = all_results[0]
         
         # Calculate query time
         query_time = time.time() - start_time
@@ -190,7 +206,7 @@ async def semantic_search(
             total_results=len(results),
             query_time=query_time,
             metadata={
-                "cache_hit": False,  # Would be determined by ChromaDB client
+                "cache_hit": cache_hits[0],
                 "query_processed": True
             }
         )
@@ -201,11 +217,74 @@ async def semantic_search(
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+class BatchSemanticSearchResponse(BaseModel):
+    """Response model for batched semantic search; one entry per query, in request order."""
+    results: List[SemanticSearchResponse]
+    total_queries: int
+    query_time: float
+    metadata: Dict[str, Any]
+
+
+@router.post("/semantic/batch", response_model=BatchSemanticSearchResponse)
+async def batch_semantic_search(
+    request: BatchSemanticSearchRequest,
+    chroma_client: object = Depends(get_chroma_client)  # ChromaDBClient
+):
+    """
+    Perform several semantic searches in one call.
+    
+    All query texts are embedded in one model batch and queries sharing
+    filters are answered by one Chroma request.
+    """
+    start_time = time.time()
+    
+    try:
+        import importlib
+        chromadb_module = importlib.import_module('.core.chromadb_client', package='src')
+        SearchQuery = chromadb_module.SearchQuery
+        
+        search_queries = [
+            SearchQuery(
+                query=item.query,
+                limit=item.limit,
+                min_score=item.min_score,
+                repository_filter=item.repository_filter,
+                language_filter=item.language_filter,
+                domain_filter=item.domain_filter,
+                chunk_type_filter=item.chunk_type_filter,
+                include_metadata=item.include_metadata
+            )
+            for item in request.queries
+        ]
+        
+        all_results, cache_hits = await chroma_client.search_many_with_cache_status(search_queries)
+        query_time = time.time() - start_time
+        
+        return BatchSemanticSearchResponse(
+            results=[
+                SemanticSearchResponse(
+                    results=[result.to_dict() for result in results],
+                    total_results=len(results),
+                    query_time=query_time,
+                    metadata={"cache_hit": cache_hit, "query_processed": True}
+                )
+                for results, cache_hit in zip(all_results, cache_hits)
+            ],
+            total_queries=len(search_queries),
+            query_time=query_time,
+            metadata={"batched": True, "cache_hits": sum(cache_hits)}
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
+
 @router.get("/similar/{chunk_id}")
 async def find_similar_chunks(
     chunk_id: str,
     limit: int = QueryParam(default=10, ge=1, le=50),
     min_score: float = QueryParam(default=0.5, ge=0.0, le=1.0),
+    repository: Optional[str] = QueryParam(default=None, description="Repository holding the chunk"),
     chroma_client: object = Depends(get_chroma_client)  # ChromaDBClient
 ):
     """
@@ -214,26 +293,44 @@ async def find_similar_chunks(
     This endpoint finds code chunks that are semantically similar to a given chunk.
     """
     try:
-        # Get the source chunk content
-        source_chunk = await chroma_client.collection.get(ids=[chunk_id])
+        import importlib
+        chromadb_module = importlib.import_module('.core.chromadb_client', package='src')
+        SearchQuery = chromadb_module.SearchQuery
         
-        if not source_chunk['documents']:
-            raise HTTPException(status_code=404, detail="Chunk not found")
+        # Get the stored vector of the source chunk; no need to embed it again
+        if repository:
+            candidates = [chroma_client.shard_for(repository)]
+        elif chroma_client.sharding == "none":
+            candidates = [chroma_client.collection_name]
+        else:
+            candidates = await chroma_client.shard_collections()
+        source_chunk = {"ids": []}
+        for candidate in candidates:
+            collection_name = chroma_client.resolve_query_collection(candidate)
+            if not collection_name:
+                continue
+            source_chunk = await chroma_client.get_records(
+                collection_name, ids=[chunk_id], include=["documents", "embeddings"]
+            )
+            if source_chunk.get('ids'):
+                break
         
-        # Use the chunk content as query
-        query_content = source_chunk['documents'][0]
+        if not source_chunk.get('ids') or not source_chunk.get('embeddings'):
+            raise HTTPException(status_code=404, detail="Chunk not found")
         
         # Search for similar chunks
         search_query = SearchQuery(
-            query=query_content,
+            query=(source_chunk.get('documents') or [""])[0] or "",
             limit=limit + 1,  # +1 to exclude the source chunk
-            min_score=min_score
+            min_score=min_score,
+            query_embedding=source_chunk['embeddings'][0],
+            repository_filter=repository
         )
         
         results = await chroma_client.search(search_query)
         
         # Filter out the source chunk
-        filtered_results = [r for r in results if r.chunk_id != chunk_id][:limit]
+        filtered_results = [r.to_dict() for r in results if r.chunk_id != chunk_id][:limit]
         
         return {
             "source_chunk_id": chunk_id,
@@ -538,6 +635,10 @@ async def hybrid_search(
     analysis to provide more comprehensive search results.
     """
     try:
+        import importlib
+        chromadb_module = importlib.import_module('.core.chromadb_client', package='src')
+        SearchQuery = chromadb_module.SearchQuery
+        
         # Semantic search
         semantic_query = SearchQuery(
             query=query,
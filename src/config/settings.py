@@ -3,7 +3,7 @@ Application settings and configuration management.
 """
 
 import os
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from enum import Enum
@@ -38,6 +38,8 @@ class Settings(BaseSettings):
     chroma_tenant: Optional[str] = Field(default=None, description="ChromaDB tenant (v2 API)")
     chroma_database: Optional[str] = Field(default=None, description="ChromaDB database (v2 API)")
     chroma_collection_name: str = Field(default="codebase_chunks", description="ChromaDB collection name")
+    chroma_sharding: str = Field(default="repository", description="Chunk collections: none (one shared collection), repository (one per repository) or group")
+    chroma_shard_groups: Dict[str, List[str]] = Field(default_factory=dict, description="Group collection -> repositories, for chroma_sharding=group")
     chroma_persist_directory: str = Field(default="./data/chroma", description="ChromaDB persist directory")
     
     # Neo4j settings
@@ -63,10 +65,27 @@ class Settings(BaseSettings):
     embedding_model: str = Field(default="microsoft/codebert-base", description="Embedding model")
     embedding_dimension: int = Field(default=768, description="Embedding dimension")
     embedding_device: str = Field(default="cpu", description="Embedding device")
+    embedding_backend: str = Field(default="torch", description="Embedding inference backend: torch or onnx (int8 ONNX Runtime)")
+    embedding_onnx_threads: int = Field(default=0, description="ONNX Runtime intra-op threads (0 = all cores)")
+    embedding_preload: bool = Field(default=True, description="Load and warm up the embedding model in the background at startup")
+    embedding_readiness_gate: bool = Field(default=True, description="Report not ready until the preloaded embedding model is warm (needs embedding_preload)")
+    embedding_worker_processes: int = Field(default=0, description="CPU embedding worker processes pinned to core subsets (0 = in-process)")
+    embedding_cache_path: str = Field(default="./data/embedding_cache.sqlite3", description="Persistent embedding cache (empty disables)")
+    embedding_registry_path: str = Field(default="./data/embedding_registry.json", description="Embedding model fingerprint registry per collection (empty disables)")
+    embedding_reembed_page_size: int = Field(default=256, description="Records re-embedded per step when switching embedding models")
+    embedding_reembed_throttle_seconds: float = Field(default=0.05, description="Pause between re-embedding steps")
+    
+    # Local ANN index (in-process copy of Chroma collections for low-latency search)
+    local_index_enabled: bool = Field(default=False, description="Serve semantic search from in-process HNSW indexes")
+    local_index_dir: str = Field(default="./data/vector_index", description="Directory of the local vector indexes")
+    local_index_ef_search: int = Field(default=64, description="HNSW search breadth of the local index")
+    local_index_exact_threshold: int = Field(default=2048, description="Filtered result sets up to this size are scanned exactly")
     
     # Processing settings
     max_concurrent_repos: int = Field(default=10, description="Maximum concurrent repositories")
     max_workers: int = Field(default=4, description="Maximum worker processes")
+    parse_workers: int = Field(default=0, description="Worker processes for parsing/chunking (0 = parse inline)")
+    io_workers: int = Field(default=8, description="Threads for non-blocking file reads")
     batch_size: int = Field(default=100, description="Batch size for processing")
     timeout_seconds: int = Field(default=300, description="Processing timeout")
     
@@ -110,6 +129,8 @@ class Settings(BaseSettings):
     # Cache settings
     cache_ttl: int = Field(default=300, description="Cache TTL in seconds")
     cache_size: int = Field(default=1000, description="Cache size")
+    query_cache_enabled: bool = Field(default=True, description="Cache semantic search results (invalidated per collection on writes)")
+    query_cache_redis: bool = Field(default=True, description="Share cached semantic search results through Redis when it is available")
     
     # Performance settings
     query_timeout: int = Field(default=30, description="Query timeout in seconds")
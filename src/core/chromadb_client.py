@@ -1,10 +1,21 @@
 import asyncio
-import json
+import heapq
+import itertools
 import logging
+import math
 import os
-from typing import Any, Dict, List, Optional
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import aiohttp
+import numpy as np
+import orjson
+
+from .embedding_registry import EmbeddingRegistry
+from .embedding_scheduler import EmbeddingPriority
+from .query_cache import QueryResultCache
+from ..processing.chunk_tokenizer import preprocess_for_embedding
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +24,158 @@ class ChromaV2Error(Exception):
     pass
 
 
+def _chunk_embedding(chunk) -> Tuple[Any, Optional[int]]:
+    """Return (matrix, row) for a chunk holding a row reference, (vector, None) for a plain vector."""
+    for holder in (chunk, getattr(chunk, 'chunk', None)):
+        if holder is None:
+            continue
+        matrix = getattr(holder, 'embedding_matrix', None)
+        if matrix is not None:
+            return matrix, holder.embedding_row
+        for attr in ('embeddings', 'embedding'):
+            vector = getattr(holder, attr, None)
+            if vector is not None and len(vector):
+                return vector, None
+    return None, None
+
+
+def gather_embeddings(chunks: Sequence[Any]) -> Optional[np.ndarray]:
+    """
+    Collect chunk embeddings into one contiguous float32 matrix.
+
+    Chunks embedded together reference rows of a shared matrix; consecutive
+    rows are returned as a view and other selections with one fancy-index
+    gather. Chunks carrying plain vectors are stacked.
+
+    Returns:
+        (len(chunks), dimension) matrix, or None if any chunk has no embedding
+    """
+    references = [_chunk_embedding(chunk) for chunk in chunks]
+    if not references or any(source is None for source, _ in references):
+        return None
+
+    shared = references[0][0]
+    if all(source is shared and row is not None for source, row in references):
+        rows = np.fromiter((row for _, row in references), dtype=np.intp, count=len(references))
+        if np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            return np.ascontiguousarray(shared[rows[0]:rows[0] + len(rows)], dtype=np.float32)
+        return np.ascontiguousarray(shared[rows], dtype=np.float32)
+
+    return np.vstack([
+        np.asarray(source[row] if row is not None else source, dtype=np.float32)
+        for source, row in references
+    ])
+
+
+@dataclass
+class SearchQuery:
+    """Semantic search request; filters are evaluated by Chroma, not in Python."""
+    query: str
+    limit: int = 10
+    min_score: float = 0.0
+    repository_filter: Optional[str] = None
+    language_filter: Optional[str] = None
+    domain_filter: Optional[str] = None
+    chunk_type_filter: Optional[str] = None
+    filters: Dict[str, Any] = field(default_factory=dict)  # extra metadata equality filters
+    include_metadata: bool = True
+    query_embedding: Optional[Sequence[float]] = None  # skips embedding the query text
+    collection_name: Optional[str] = None  # overrides the repository/default collection
+
+
+@dataclass
+class SearchResult:
+    """One chunk returned by a semantic search."""
+    chunk_id: str
+    content: str
+    score: float
+    distance: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    collection: Optional[str] = None
+
+    @property
+    def language(self) -> Optional[str]:
+        return self.metadata.get('language')
+
+    @property
+    def chunk_type(self) -> Optional[str]:
+        return self.metadata.get('chunk_type')
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.metadata.get('name')
+
+    @property
+    def business_domain(self) -> Optional[str]:
+        return self.metadata.get('business_domain')
+
+    @property
+    def repository(self) -> Optional[str]:
+        return self.metadata.get('repository')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chunk_id": self.chunk_id,
+            "content": self.content,
+            "score": self.score,
+            "distance": self.distance,
+            "metadata": self.metadata,
+            "language": self.language,
+            "chunk_type": self.chunk_type,
+            "name": self.name,
+            "business_domain": self.business_domain,
+            "repository": self.repository,
+        }
+
+
+def build_where(query: SearchQuery, repository_clause: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Chroma `where` clause for a query's metadata filters.
+
+    Args:
+        query: Search query
+        repository_clause: Filter on repository metadata; not needed when the
+            searched collection only holds that repository
+
+    Returns:
+        None, a single equality, or an $and of equalities
+    """
+    conditions = dict(query.filters)
+    if repository_clause and query.repository_filter:
+        conditions['repository'] = query.repository_filter
+    if query.language_filter:
+        conditions['language'] = query.language_filter.lower()
+    if query.domain_filter:
+        conditions['business_domain'] = query.domain_filter
+    if query.chunk_type_filter:
+        conditions['chunk_type'] = query.chunk_type_filter
+    clauses = [{key: {"$eq": value}} for key, value in conditions.items() if value is not None]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def distance_to_score(distance: float, space: str = "l2", normalized: bool = True) -> float:
+    """
+    Convert a Chroma distance into a similarity score in [0, 1].
+
+    Args:
+        distance: Distance returned by the collection query
+        space: Collection distance function (hnsw:space): l2, cosine or ip
+        normalized: Whether the stored vectors are unit length
+    """
+    if space == "cosine":
+        similarity = 1.0 - distance
+    elif space == "ip":
+        similarity = 1.0 - distance if normalized else distance
+    elif normalized:
+        # Squared L2 between unit vectors is 2 - 2 * cosine
+        similarity = 1.0 - distance / 2.0
+    else:
+        return 1.0 / (1.0 + math.sqrt(max(distance, 0.0)))
+    return min(1.0, max(0.0, similarity))
+
+
 class CompatibilityClient:
     """Compatibility wrapper for old health check code that expects .client attribute."""
     
@@ -60,6 +223,9 @@ class ChromaDBClient:
     Uses /api/v2 endpoints and provides self-healing get_or_create for collections.
     """
 
+    SHARD_LIST_TTL = 30.0  # seconds between collection listings for global queries
+    SHARD_METADATA_KEY = "chunk_shard"  # collection metadata naming the logical collection add_chunks wrote
+
     def __init__(
         self,
         host: str = "localhost",
@@ -93,6 +259,26 @@ class ChromaDBClient:
         # Compatibility property for old health check code
         self.client = CompatibilityClient(self)
 
+        # Embedding model bookkeeping; set by the app once the embedding client exists
+        self.registry: Optional[EmbeddingRegistry] = None
+        self.embedding_fingerprint: Optional[str] = None
+        self.embedding_client: Optional[Any] = None  # embeds search queries
+        self.local_index: Optional[Any] = None  # LocalIndexManager serving queries in-process
+        self.query_cache: Optional[QueryResultCache] = QueryResultCache()
+        
+        # Chunk collection layout; see configure_sharding
+        self.sharding = "repository"
+        self.shard_groups: Dict[str, str] = {}  # repository -> group collection
+        self._shards: Optional[List[str]] = None
+        self._shards_listed_at = 0.0
+        
+        # Collection info by name for the query path (saves a lookup per search)
+        self._collection_info: Dict[str, Dict[str, Any]] = {}
+        
+        # Query statistics
+        self.total_queries = 0
+        self.total_query_time = 0.0
+
     async def initialize(self) -> None:
         """Create an internal session and verify server health."""
         if self._session is None:
@@ -328,26 +514,112 @@ class ChromaDBClient:
             logger.error(f"Chroma health_check failed: {e}")
         return health
 
-    async def add_chunks(self, chunks, collection_name: Optional[str] = None) -> bool:
+    def resolve_query_collection(self, collection_name: Optional[str] = None,
+                                 fingerprint: Optional[str] = None) -> Optional[str]:
+        """
+        Physical collection to search with a query embedded under fingerprint.
+
+        Returns None when no collection holds vectors of that fingerprint, so
+        callers never compare a query against vectors of another model.
+        """
+        collection_name = collection_name or self.collection_name
+        fingerprint = fingerprint or self.embedding_fingerprint
+        if self.registry is None or not fingerprint:
+            return collection_name
+        return self.registry.query_collection(collection_name, fingerprint)
+
+    def configure_sharding(self, mode: str, groups: Optional[Dict[str, List[str]]] = None) -> None:
+        """
+        Choose how chunks are spread over collections.
+
+        Args:
+            mode: "none" keeps every repository in collection_name and filters
+                by repository metadata; "repository" gives each repository its
+                own collection; "group" shares a collection per repository group
+            groups: Group collection name -> repositories (group mode); other
+                repositories get their own collection
+        """
+        if mode not in ("none", "repository", "group"):
+            raise ValueError(f"Unknown Chroma sharding mode: {mode}")
+        self.sharding = mode
+        self.shard_groups = {
+            repository: group
+            for group, repositories in (groups or {}).items() if mode == "group"
+            for repository in repositories
+        }
+        self._shards = None
+
+    def shard_for(self, repository: str) -> str:
+        """Logical collection holding a repository's chunks."""
+        if self.sharding == "none":
+            return self.collection_name
+        return self.shard_groups.get(repository, repository)
+
+    async def shard_collections(self, refresh: bool = False) -> List[str]:
+        """
+        Logical collections a global query fans out to.
+
+        Only collections known to hold chunks are searched: the registry's
+        logical collections and collections add_chunks created (tagged with
+        SHARD_METADATA_KEY). Listed from Chroma at most every SHARD_LIST_TTL
+        seconds.
+        """
+        if not refresh and self._shards is not None and time.time() - self._shards_listed_at < self.SHARD_LIST_TTL:
+            return self._shards
+        names = set(self.registry.logical_collections()) if self.registry is not None else set()
+        try:
+            collections = await self.list_collections()
+        except Exception as e:
+            logger.warning(f"Could not list Chroma collections for fan-out: {e}")
+            return self._shards if self._shards is not None else sorted(names)
+        names.update(
+            (c.get('metadata') or {}).get(self.SHARD_METADATA_KEY)
+            for c in collections if isinstance(c, dict)
+        )
+        self._shards = sorted(name for name in names if name)
+        self._shards_listed_at = time.time()
+        return self._shards
+
+    def _chunk_fingerprint(self, chunks) -> Optional[str]:
+        """Fingerprint of the model that embedded the chunks (tagged by the processor)."""
+        for chunk in chunks[:1]:
+            fingerprint = (getattr(chunk, 'embedding_metadata', None) or {}).get('fingerprint')
+            if fingerprint:
+                return fingerprint
+        return self.embedding_fingerprint
+
+    async def add_chunks(self, chunks, collection_name: Optional[str] = None,
+                         repository: Optional[str] = None) -> bool:
         """
         Add chunks to ChromaDB collection.
         Expected chunks format: list of EnhancedChunk objects or similar with 
         attributes: id, content, metadata, embeddings
+
+        With a repository, the chunks go to that repository's shard and are
+        tagged with it. With a registry, embedded chunks are written to the
+        physical collection of their embedding fingerprint and tagged with it.
+
+        Raises:
+            ProcessingError: The chunks' fingerprint is not bound to the collection
         """
+        if repository and not collection_name:
+            collection_name = self.shard_for(repository)
+        collection_name = collection_name or self.collection_name
+        if not collection_name:
+            logger.error("No collection name provided for add_chunks")
+            return False
+        logical_name = collection_name
+        fingerprint = None
+        if chunks and gather_embeddings(chunks[:1]) is not None:
+            fingerprint = self._chunk_fingerprint(chunks)
+            if self.registry is not None and fingerprint:
+                collection_name = self.registry.write_collection(collection_name, fingerprint)
+
         try:
-            collection_name = collection_name or self.collection_name
-            if not collection_name:
-                logger.error("No collection name provided for add_chunks")
-                return False
-                
-            # Ensure collection exists
-            await self.get_or_create_collection(collection_name)
-            
             # Prepare data for ChromaDB
             ids = []
             documents = []
             metadatas = []
-            embeddings = []
             
             for chunk in chunks:
                 # Handle both EnhancedChunk and direct CodeChunk objects
@@ -360,7 +632,7 @@ class ChromaDBClient:
                     # Build metadata from both EnhancedChunk and CodeChunk
                     metadata = {}
                     if hasattr(code_chunk, 'language'):
-                        metadata['language'] = str(code_chunk.language)
+                        metadata['language'] = str(getattr(code_chunk.language, 'value', code_chunk.language))
                     if hasattr(code_chunk, 'chunk_type'):
                         metadata['chunk_type'] = code_chunk.chunk_type
                     if hasattr(code_chunk, 'name') and code_chunk.name:
@@ -375,18 +647,17 @@ class ChromaDBClient:
                         metadata['business_domain'] = chunk.business_domain
                     if hasattr(chunk, 'importance_score'):
                         metadata['importance_score'] = chunk.importance_score
+                    if fingerprint:
+                        metadata['embedding_fingerprint'] = fingerprint
+                    # Repository and file tagged by the processor
+                    tags = getattr(chunk, 'embedding_metadata', None) or {}
+                    for key in ('repository', 'file_path'):
+                        if tags.get(key):
+                            metadata.setdefault(key, str(tags[key]))
+                    if repository:
+                        metadata['repository'] = repository
                     
                     metadatas.append(metadata)
-                    
-                    # Handle embeddings from EnhancedChunk
-                    if hasattr(chunk, 'embeddings') and chunk.embeddings:
-                        embeddings.append(chunk.embeddings)
-                    elif hasattr(chunk, 'embedding') and chunk.embedding:
-                        embeddings.append(chunk.embedding)
-                    elif hasattr(code_chunk, 'embeddings') and code_chunk.embeddings:
-                        embeddings.append(code_chunk.embeddings)
-                    elif hasattr(code_chunk, 'embedding') and code_chunk.embedding:
-                        embeddings.append(code_chunk.embedding)
                 else:
                     # Direct CodeChunk or other chunk format
                     ids.append(getattr(chunk, 'id', str(hash(chunk))))
@@ -397,61 +668,27 @@ class ChromaDBClient:
                     if hasattr(chunk, 'file_path'):
                         metadata['file_path'] = str(chunk.file_path)
                     if hasattr(chunk, 'language'):
-                        metadata['language'] = str(chunk.language)
+                        metadata['language'] = str(getattr(chunk.language, 'value', chunk.language))
                     if hasattr(chunk, 'chunk_type'):
                         metadata['chunk_type'] = chunk.chunk_type
+                    if fingerprint:
+                        metadata['embedding_fingerprint'] = fingerprint
+                    if repository:
+                        metadata['repository'] = repository
                     metadatas.append(metadata)
-                    
-                    # Handle embeddings if available
-                    if hasattr(chunk, 'embeddings') and chunk.embeddings:
-                        embeddings.append(chunk.embeddings)
-                    elif hasattr(chunk, 'embedding') and chunk.embedding:
-                        embeddings.append(chunk.embedding)
-            
-            # Get collection info to get the ID
-            collection_info = await self.get_or_create_collection(collection_name)
-            collection_id = collection_info.get('id')
-            if not collection_id:
-                logger.error(f"Could not get collection ID for {collection_name}")
-                return False
-            
-            # Add to ChromaDB collection using collection ID in batches to avoid timeouts
-            url = f"{self._get_collections_url()}/{collection_id}/add"
-            batch_size = 500  # Process chunks in smaller batches to avoid timeouts
-            total_chunks = len(documents)
             
-            logger.info(f"Adding {total_chunks} chunks to collection {collection_name} in batches of {batch_size}")
-            logger.info(f"ChromaDB Client Config: use_v1_mode={self.use_v1_mode}, tenant={self.tenant}, database={self.database}")
-            logger.info(f"Collection URL: {url}")
-            logger.info(f"Collection ID: {collection_id}")
-            
-            # Process chunks in batches
-            for i in range(0, total_chunks, batch_size):
-                end_idx = min(i + batch_size, total_chunks)
-                batch_documents = documents[i:end_idx]
-                batch_metadatas = metadatas[i:end_idx]
-                batch_ids = ids[i:end_idx]
-                
-                payload = {
-                    "documents": batch_documents,
-                    "metadatas": batch_metadatas,
-                    "ids": batch_ids
-                }
-                
-                # Only include embeddings if we have them
-                if embeddings and len(embeddings) == len(documents):
-                    batch_embeddings = embeddings[i:end_idx]
-                    payload["embeddings"] = batch_embeddings
-                
-                # Use longer timeout for storage operations
-                try:
-                    await self._post_json(url, payload, timeout_override=120.0)  # 2-minute timeout for storage
-                    logger.info(f"Successfully added batch {i//batch_size + 1}/{(total_chunks + batch_size - 1)//batch_size} ({end_idx - i} chunks)")
-                except Exception as e:
-                    logger.error(f"Failed to add batch {i//batch_size + 1} (chunks {i}-{end_idx}): {e}")
-                    raise  # Re-raise to fail the entire operation
+            # One float32 matrix for the whole call; serialized per batch by orjson
+            embeddings = gather_embeddings(chunks)
             
-            logger.info(f"Successfully added all {total_chunks} chunks to collection {collection_name}")
+            try:
+                await self.add_records(collection_name, ids, documents, metadatas, embeddings,
+                                       metadata={self.SHARD_METADATA_KEY: logical_name})
+            finally:
+                # A partly failed write changes search results too
+                if self.query_cache is not None:
+                    await self.query_cache.bump(logical_name)
+            if self._shards is not None and logical_name not in self._shards:
+                self._shards = sorted(self._shards + [logical_name])
             return True
             
         except Exception as e:
@@ -469,9 +706,471 @@ class ChromaDBClient:
             logger.error(f"🚨 Full traceback:", exc_info=True)
             return False
 
+    async def add_records(
+        self,
+        collection_name: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Optional[np.ndarray] = None,
+        upsert: bool = False,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Write (or, with upsert, overwrite) records of a physical collection in batches; raises on failure.
+
+        metadata is only applied when the collection has to be created.
+        """
+        # Get collection info to get the ID
+        collection_info = await self.get_or_create_collection(collection_name, metadata=metadata)
+        collection_id = collection_info.get('id')
+        if not collection_id:
+            raise ChromaV2Error(f"Could not get collection ID for {collection_name}")
+        
+        # Add to ChromaDB collection using collection ID in batches to avoid timeouts
+        url = f"{self._get_collections_url()}/{collection_id}/{'upsert' if upsert else 'add'}"
+        batch_size = 500  # Process chunks in smaller batches to avoid timeouts
+        total_chunks = len(documents)
+        
+        logger.info(f"Adding {total_chunks} chunks to collection {collection_name} in batches of {batch_size}")
+        logger.debug(f"Collection URL: {url} (use_v1_mode={self.use_v1_mode}, tenant={self.tenant}, database={self.database})")
+        
+        # Process chunks in batches
+        for i in range(0, total_chunks, batch_size):
+            end_idx = min(i + batch_size, total_chunks)
+            payload = {
+                "documents": documents[i:end_idx],
+                "metadatas": metadatas[i:end_idx],
+                "ids": ids[i:end_idx]
+            }
+            
+            # Only include embeddings if we have them
+            if embeddings is not None:
+                payload["embeddings"] = embeddings[i:end_idx]
+            
+            # Use longer timeout for storage operations
+            try:
+                await self._post_json(url, payload, timeout_override=120.0)  # 2-minute timeout for storage
+                logger.info(f"Successfully added batch {i//batch_size + 1}/{(total_chunks + batch_size - 1)//batch_size} ({end_idx - i} chunks)")
+            except Exception as e:
+                logger.error(f"Failed to add batch {i//batch_size + 1} (chunks {i}-{end_idx}): {e}")
+                raise  # Re-raise to fail the entire operation
+        
+        if self.local_index is not None and embeddings is not None:
+            await self.local_index.add(collection_name, ids, documents, metadatas, embeddings)
+        
+        logger.info(f"Successfully added all {total_chunks} chunks to collection {collection_name}")
+
+    async def get_records(
+        self,
+        collection_name: str,
+        limit: int = 500,
+        offset: int = 0,
+        include: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Page through the records of a physical collection, or fetch the given ids.
+
+        Returns:
+            Chroma get result: ids plus the included fields (documents and
+            metadatas by default); empty for a missing collection
+        """
+        collection_info = await self.get_collection(collection_name)
+        if not collection_info or not collection_info.get('id'):
+            return {"ids": []}
+        url = f"{self._get_collections_url()}/{collection_info['id']}/get"
+        payload = {
+            "limit": limit,
+            "offset": offset,
+            "include": ["documents", "metadatas"] if include is None else include,
+        }
+        if ids is not None:
+            payload["ids"] = ids
+        result = await self._post_json(url, payload, timeout_override=120.0)
+        return result if isinstance(result, dict) else {"ids": []}
+
+    async def search(self, query: SearchQuery) -> List[SearchResult]:
+        """
+        Semantic search: embed the query once and run the collection query.
+
+        A repository filter selects that repository's collection (its chunks
+        are stored per repository); otherwise the default collection is
+        searched and the repository becomes part of the server-side `where`.
+        Language, domain, chunk-type and extra filters always go to the server.
+
+        Returns:
+            Results above min_score, best first
+
+        Raises:
+            ChromaV2Error: No embedding client is attached and the query has no embedding
+        """
+        return (await self.search_many([query]))[0]
+
+    async def search_many(self, queries: Sequence[SearchQuery]) -> List[List[SearchResult]]:
+        """
+        Run several semantic searches with one embedding batch.
+
+        Query texts are embedded in a single encode call. Queries that search
+        the same collection with the same filters share one Chroma request
+        carrying all their embeddings; distinct filter sets are queried
+        concurrently, since a Chroma `where` applies to the whole request.
+
+        Returns:
+            One result list per query, in query order
+        """
+        results, _ = await self.search_many_with_cache_status(queries)
+        return results
+
+    async def _query_targets(self, query: SearchQuery) -> List[str]:
+        """Logical collections a query searches: its shard, or every shard for a global query."""
+        if query.collection_name:
+            return [query.collection_name]
+        if query.repository_filter:
+            return [self.shard_for(query.repository_filter)]
+        if self.sharding == "none":
+            return [self.collection_name]
+        return await self.shard_collections()
+
+    def _cache_key(self, query: SearchQuery, targets: List[str], version: str) -> str:
+        client = self.embedding_client
+        config = getattr(client, 'config', None)
+        # The text exactly as the model would see it, so equivalent queries share an entry
+        if getattr(config, 'code_preprocessing', False):
+            text = preprocess_for_embedding(query.query, getattr(config, 'include_comments', True))
+        else:
+            text = query.query.strip()
+        fingerprint = config.cache_namespace() if config is not None else self.embedding_fingerprint
+        return self.query_cache.key(
+            targets[0] if len(targets) == 1 else "*", version, fingerprint, text, query.limit, query.min_score,
+            query.repository_filter, query.language_filter, query.domain_filter, query.chunk_type_filter,
+            query.filters, query.include_metadata
+        )
+
+    async def search_many_with_cache_status(
+        self, queries: Sequence[SearchQuery]
+    ) -> Tuple[List[List[SearchResult]], List[bool]]:
+        """
+        search_many through the query result cache.
+
+        Text queries are looked up under the current version of their
+        collection; writes to a collection bump its version, so a hit is
+        always as fresh as a search. Versions are read before searching, so
+        results of a search that raced a write are stored under the old one.
+
+        Returns:
+            Results per query, and whether each was served from the cache
+        """
+        if not queries:
+            return [], []
+        results: List[Optional[List[SearchResult]]] = [None] * len(queries)
+        hits = [False] * len(queries)
+        keys: List[Optional[str]] = [None] * len(queries)
+        cache = self.query_cache
+        targets = [await self._query_targets(query) for query in queries]
+        cacheable = [i for i, query in enumerate(queries) if query.query_embedding is None]
+        if cache is not None and cacheable:
+            versions = await cache.versions(target for i in cacheable for target in targets[i])
+            for i in cacheable:
+                # A fan-out result depends on every shard (and on the set of shards)
+                version = ",".join(f"{target}={versions[target]}" for target in targets[i])
+                keys[i] = self._cache_key(queries[i], targets[i], version)
+            cached = await cache.get_many([keys[i] for i in cacheable])
+            for i, entry in zip(cacheable, cached):
+                if entry is not None:
+                    results[i] = [SearchResult(**result) for result in entry]
+                    hits[i] = True
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            fresh, complete = await self._search_uncached([queries[i] for i in pending], [targets[i] for i in pending])
+            for i, query_results in zip(pending, fresh):
+                results[i] = query_results
+            if cache is not None:
+                # Results missing a failed shard are served but never cached
+                await cache.set_many([
+                    (keys[i], [asdict(result) for result in results[i]])
+                    for i, whole in zip(pending, complete) if whole and keys[i] is not None
+                ])
+        return results, hits
+
+    async def _search_uncached(self, queries: Sequence[SearchQuery],
+                               targets: Sequence[List[str]]) -> Tuple[List[List[SearchResult]], List[bool]]:
+        """
+        Search the target collections of each query and merge the shard results.
+
+        A failing shard of a fan-out query is logged and left out; a query
+        fails only when none of its shards answered.
+
+        Returns:
+            Results per query, and whether every shard of the query answered
+        """
+        start = time.perf_counter()
+        embeddings, fingerprint = await self._embed_queries(queries)
+
+        # One Chroma request per (shard, filter set); a global query joins the group of every shard
+        groups: Dict[str, Dict[str, Any]] = {}
+        for i, query in enumerate(queries):
+            for collection_name in targets[i]:
+                where = build_where(query, repository_clause=collection_name != query.repository_filter)
+                query_fingerprint = fingerprint if query.query_embedding is None else None
+                key = orjson.dumps([collection_name, where, query.include_metadata, query_fingerprint],
+                                   option=orjson.OPT_SORT_KEYS).decode()
+                group = groups.setdefault(key, {
+                    "collection_name": collection_name,
+                    "where": where,
+                    "include_metadata": query.include_metadata,
+                    "fingerprint": query_fingerprint,
+                    "indices": [],
+                })
+                group["indices"].append(i)
+
+        async def run_group(group: Dict[str, Any]) -> List[List[SearchResult]]:
+            indices = group["indices"]
+            return await self._query_collection(
+                group["collection_name"],
+                [embeddings[i] for i in indices],
+                max(queries[i].limit for i in indices),
+                group["where"],
+                group["include_metadata"],
+                group["fingerprint"]
+            )
+
+        grouped = await asyncio.gather(*(run_group(group) for group in groups.values()), return_exceptions=True)
+        shard_results: List[List[List[SearchResult]]] = [[] for _ in queries]
+        errors: List[List[Exception]] = [[] for _ in queries]
+        for group, group_results in zip(groups.values(), grouped):
+            if isinstance(group_results, BaseException):
+                if not isinstance(group_results, Exception):
+                    raise group_results
+                logger.warning(f"Search of collection {group['collection_name']} failed: {group_results}")
+                for i in group["indices"]:
+                    errors[i].append(group_results)
+                continue
+            for i, query_results in zip(group["indices"], group_results):
+                shard_results[i].append(query_results)
+
+        results: List[List[SearchResult]] = []
+        for query, per_shard, query_errors in zip(queries, shard_results, errors):
+            if query_errors and not per_shard:
+                raise query_errors[0]
+            if len(per_shard) == 1:
+                merged = per_shard[0][:query.limit]
+            else:
+                # Each shard list is sorted; the heap keeps the best limit overall
+                merged = heapq.nlargest(query.limit, itertools.chain.from_iterable(per_shard), key=lambda r: r.score)
+            results.append([r for r in merged if r.score >= query.min_score])
+
+        self.total_queries += len(queries)
+        self.total_query_time += time.perf_counter() - start
+        return results, [not query_errors for query_errors in errors]
+
+    async def _embed_queries(self, queries: Sequence[SearchQuery]) -> Tuple[List[Any], Optional[str]]:
+        """Query embeddings and the fingerprint of the model that embedded the query texts."""
+        embeddings: List[Any] = [
+            np.asarray(q.query_embedding, dtype=np.float32) if q.query_embedding is not None else None
+            for q in queries
+        ]
+        pending = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not pending:
+            return embeddings, None
+        # One reference, so a model switch mid-query cannot pair vectors and fingerprint wrongly
+        client = self.embedding_client
+        if client is None:
+            raise ChromaV2Error("Semantic search needs an embedding client or a query embedding")
+        encoded = await client.encode([queries[i].query for i in pending], priority=EmbeddingPriority.INTERACTIVE)
+        encoded = np.asarray(encoded, dtype=np.float32).reshape(len(pending), -1)
+        for row, i in enumerate(pending):
+            embeddings[i] = encoded[row]
+        return embeddings, client.config.cache_namespace()
+
+    async def _cached_collection(self, collection_name: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        if refresh or collection_name not in self._collection_info:
+            info = await self.get_collection(collection_name)
+            if not info:
+                self._collection_info.pop(collection_name, None)
+                return None
+            self._collection_info[collection_name] = info
+        return self._collection_info[collection_name]
+
+    async def _query_collection(
+        self,
+        collection_name: str,
+        embeddings: List[Any],
+        limit: int,
+        where: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = True,
+        fingerprint: Optional[str] = None,
+    ) -> List[List[SearchResult]]:
+        """Run one collection query for one or more embeddings; one result list per embedding."""
+        physical_name = self.resolve_query_collection(collection_name, fingerprint)
+        if physical_name is None:
+            # No collection holds vectors of the serving model yet
+            return [[] for _ in embeddings]
+        normalized = bool(getattr(getattr(self.embedding_client, 'config', None), 'normalize_embeddings', True))
+        if self.local_index is not None:
+            local = await self.local_index.query(physical_name, embeddings, limit, where, include_metadata)
+            if local is not None:
+                response, space = local
+                return [
+                    self._parse_query_results(response, i, space, normalized, physical_name)
+                    for i in range(len(embeddings))
+                ]
+        info = await self._cached_collection(physical_name)
+        if info is None:
+            return [[] for _ in embeddings]
+
+        payload: Dict[str, Any] = {
+            "query_embeddings": np.asarray(embeddings, dtype=np.float32),
+            "n_results": limit,
+            "include": ["documents", "distances"] + (["metadatas"] if include_metadata else []),
+        }
+        if where:
+            payload["where"] = where
+        try:
+            response = await self._post_json(f"{self._get_collections_url()}/{info['id']}/query", payload)
+        except ChromaV2Error as e:
+            if " 404 " not in str(e):
+                raise
+            # Collection was recreated since it was cached
+            info = await self._cached_collection(physical_name, refresh=True)
+            if info is None:
+                return [[] for _ in embeddings]
+            response = await self._post_json(f"{self._get_collections_url()}/{info['id']}/query", payload)
+
+        space = (info.get('metadata') or {}).get('hnsw:space', 'l2')
+        return [
+            self._parse_query_results(response, i, space, normalized, physical_name)
+            for i in range(len(embeddings))
+        ]
+
+    @staticmethod
+    def _parse_query_results(response: Dict[str, Any], index: int, space: str,
+                             normalized: bool, collection: str) -> List[SearchResult]:
+        def column(key: str) -> List[Any]:
+            rows = response.get(key) or []
+            return (rows[index] if index < len(rows) else None) or []
+
+        ids, documents, metadatas, distances = column("ids"), column("documents"), column("metadatas"), column("distances")
+        results = []
+        for i, chunk_id in enumerate(ids):
+            distance = float(distances[i]) if i < len(distances) else float('inf')
+            results.append(SearchResult(
+                chunk_id=chunk_id,
+                content=documents[i] if i < len(documents) and documents[i] is not None else "",
+                score=distance_to_score(distance, space, normalized),
+                distance=distance,
+                metadata=(metadatas[i] if i < len(metadatas) else None) or {},
+                collection=collection
+            ))
+        return results
+
+    async def count(self, collection_name: str) -> int:
+        """Number of records in a physical collection (0 if missing)."""
+        collection_info = await self.get_collection(collection_name)
+        if not collection_info or not collection_info.get('id'):
+            return 0
+        result = await self._get_json(f"{self._get_collections_url()}/{collection_info['id']}/count")
+        return int(result) if isinstance(result, (int, str)) and str(result).isdigit() else 0
+
+    async def delete_chunks(self, ids: List[str], collection_name: Optional[str] = None,
+                            repository: Optional[str] = None) -> bool:
+        """
+        Delete chunks by ID from a collection (or a repository's shard).
+        Missing collections are treated as already empty.
+
+        With a registry, the chunks are deleted from every physical collection
+        of the logical one, so a shadow being built never resurrects them.
+        """
+        if not ids:
+            return True
+        try:
+            if repository and not collection_name:
+                collection_name = self.shard_for(repository)
+            collection_name = collection_name or self.collection_name
+            physical_names = self.registry.collections_for(collection_name) if self.registry else [collection_name]
+            for physical_name in physical_names:
+                collection_info = await self.get_collection(physical_name)
+                if not collection_info or not collection_info.get('id'):
+                    continue
+
+                url = f"{self._get_collections_url()}/{collection_info['id']}/delete"
+                batch_size = 500
+                for i in range(0, len(ids), batch_size):
+                    await self._post_json(url, {"ids": ids[i:i + batch_size]}, timeout_override=120.0)
+                if self.local_index is not None:
+                    await self.local_index.delete(physical_name, ids)
+
+                logger.info(f"Deleted {len(ids)} chunks from collection {physical_name}")
+            if self.query_cache is not None:
+                await self.query_cache.bump(collection_name)
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to delete chunks from ChromaDB collection {collection_name}: {e}")
+            return False
+
+    async def delete_repository(self, repository: str) -> bool:
+        """
+        Remove every chunk of a repository.
+
+        A repository with its own shard drops the shard's collections (all
+        embedding models); in a shared collection its chunks are deleted by
+        a repository `where`.
+        """
+        collection_name = self.shard_for(repository)
+        physical_names = self.registry.collections_for(collection_name) if self.registry else [collection_name]
+        try:
+            if collection_name == repository:
+                for physical_name in physical_names:
+                    await self.delete_collection(physical_name)
+                if self.registry is not None:
+                    self.registry.remove(collection_name)
+                if self._shards is not None and collection_name in self._shards:
+                    self._shards = [name for name in self._shards if name != collection_name]
+            else:
+                for physical_name in physical_names:
+                    collection_info = await self.get_collection(physical_name)
+                    if not collection_info or not collection_info.get('id'):
+                        continue
+                    url = f"{self._get_collections_url()}/{collection_info['id']}/delete"
+                    await self._post_json(url, {"where": {"repository": {"$eq": repository}}}, timeout_override=300.0)
+                    if self.local_index is not None:
+                        # The local index cannot apply a where delete; rebuild it
+                        self.local_index.drop(physical_name)
+            logger.info(f"Deleted repository {repository} from collection {collection_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete repository {repository} from ChromaDB: {e}")
+            return False
+        finally:
+            if self.query_cache is not None:
+                await self.query_cache.bump(collection_name)
+
+    async def delete_collection(self, name: str) -> bool:
+        """Drop a physical collection; a missing one counts as deleted."""
+        if self._session is None:
+            raise RuntimeError("Client not initialized")
+        url = f"{self._get_collections_url()}/{name}"
+        async with self._session.delete(url, headers=self._headers) as resp:
+            if resp.status >= 400 and resp.status != 404:
+                text = await resp.text()
+                raise ChromaV2Error(f"DELETE {url} failed: {resp.status} {text}")
+        self._collection_info.pop(name, None)
+        if self.local_index is not None:
+            self.local_index.drop(name)
+        logger.info(f"Deleted collection {name}")
+        return True
+
     async def get_statistics(self) -> Dict[str, Any]:
         """Basic stats placeholder; extend if your server exposes more."""
-        stats: Dict[str, Any] = {}
+        stats: Dict[str, Any] = {
+            "performance_metrics": {
+                "total_queries": self.total_queries,
+                "average_query_time": self.total_query_time / max(self.total_queries, 1),
+            },
+            "query_cache": self.query_cache.stats() if self.query_cache is not None else None,
+        }
         # Optionally summarize collections
         try:
             url = self._v2_url("collections")
@@ -596,7 +1295,7 @@ class ChromaDBClient:
         # Use custom timeout if provided, otherwise use default session timeout
         timeout = aiohttp.ClientTimeout(total=timeout_override) if timeout_override else None
         
-        async with self._session.post(url, headers=self._headers, data=json.dumps(payload), timeout=timeout) as resp:
+        async with self._session.post(url, headers=self._headers, data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY), timeout=timeout) as resp:
             if resp.status >= 400:
                 text = await resp.text()
                 raise ChromaV2Error(f"POST {url} failed: {resp.status} {text}")
@@ -0,0 +1,176 @@
+"""
+Inference backends for the CodeBERT embedding client.
+Tokenization and batching stay in the client; a backend only maps padded
+token ids to CLS embeddings. The PyTorch backend runs the fp32 model; the
+ONNX backend runs an exported graph, optionally int8 dynamically quantized,
+on ONNX Runtime with configurable thread pools.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Optional dependency: only needed for backend="onnx"
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNXRUNTIME_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Representative inputs for the fp32 agreement check
+VALIDATION_SNIPPETS: List[str] = [
+    "public class LoginAction extends Action {\n    public ActionForward execute(ActionMapping mapping) {\n        return mapping.findForward(\"success\");\n    }\n}",
+    "def calculate_interest(principal, rate, years):\n    return principal * (1 + rate) ** years",
+    "interface AccountService {\n    double getBalance(in string accountId);\n    void transfer(in string from, in string to, in double amount);\n};",
+    "<%@ page import=\"com.example.Customer\" %>\n<c:forEach items=\"${customers}\" var=\"c\">${c.name}</c:forEach>",
+    "SELECT customer_id, SUM(amount) FROM payments WHERE status = 'SETTLED' GROUP BY customer_id",
+    "if (order.getTotal() > CREDIT_LIMIT) { throw new ValidationException(\"Credit limit exceeded\"); }",
+]
+
+
+class TorchBackend:
+    """fp32 PyTorch model."""
+
+    name = "torch"
+
+    def __init__(self, model: Any, device: str = "cpu"):
+        self.model = model
+        self.device = device
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        import torch
+
+        inputs = {
+            "input_ids": torch.from_numpy(input_ids),
+            "attention_mask": torch.from_numpy(attention_mask),
+        }
+        if self.device != "cpu":
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            # Use CLS token embedding
+            return outputs.last_hidden_state[:, 0, :].cpu().numpy()
+
+
+class OnnxBackend:
+    """Exported graph on ONNX Runtime's CPU execution provider."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: Path, intra_op_threads: int = 0, inter_op_threads: int = 0):
+        """
+        Create the inference session.
+
+        Args:
+            model_path: Graph produced by export_onnx_model
+            intra_op_threads: Threads inside one operator (0 = runtime default)
+            inter_op_threads: Threads across independent operators (0 = runtime default)
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed; pip install onnxruntime onnx")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.model_path = Path(model_path)
+        self.session = ort.InferenceSession(str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(["cls_embedding"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+
+def onnx_model_path(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> Path:
+    """Location of the exported (and optionally quantized) graph for a model."""
+    target_dir = Path(output_dir) / model_name.replace("/", "__")
+    suffix = ".int8.onnx" if quantize else ".onnx"
+    return target_dir / f"model.opset{opset}{suffix}"
+
+
+def export_onnx_model(model: Any, model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> Path:
+    """
+    Export the CLS embedding of a Hugging Face encoder to ONNX, once.
+
+    The fp32 graph and its dynamically int8-quantized copy are cached under
+    output_dir per model name and reused on later starts.
+
+    Args:
+        model: Loaded transformers encoder in eval mode; only used when not yet exported
+        model_name: Model identifier, used for the cache directory
+        output_dir: Root directory for exported graphs
+        quantize: Return the int8 graph instead of the fp32 one
+        opset: ONNX opset version
+
+    Returns:
+        Path of the graph to load
+    """
+    import torch
+
+    fp32_path = onnx_model_path(model_name, output_dir, quantize=False, opset=opset)
+    fp32_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not fp32_path.exists():
+        class _ClsEncoder(torch.nn.Module):
+            def __init__(self, encoder):
+                super().__init__()
+                self.encoder = encoder
+
+            def forward(self, input_ids, attention_mask):
+                return self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state[:, 0, :]
+
+        logger.info(f"Exporting {model_name} to ONNX at {fp32_path}")
+        dummy = torch.ones((2, 16), dtype=torch.long)
+        tmp_path = fp32_path.with_suffix(".tmp")
+        torch.onnx.export(
+            _ClsEncoder(model).eval(),
+            (dummy, dummy),
+            str(tmp_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["cls_embedding"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "cls_embedding": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True
+        )
+        tmp_path.replace(fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = onnx_model_path(model_name, output_dir, quantize=True, opset=opset)
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing {fp32_path.name} to int8")
+        tmp_path = int8_path.with_suffix(".tmp")
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+        tmp_path.replace(int8_path)
+    return int8_path
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Row-wise cosine similarity between two embedding matrices.
+
+    Returns:
+        Mean and minimum cosine over all rows
+    """
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "samples": int(cosines.shape[0]),
+    }
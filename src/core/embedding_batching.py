@@ -0,0 +1,41 @@
+"""
+Length-aware batch planning for transformer inference.
+Sequences are sorted by token count and grouped so each batch stays within a
+padded-token budget; short chunks are no longer padded to the length of one
+long neighbour.
+"""
+
+from typing import List, Sequence
+
+
+def plan_batches(lengths: Sequence[int], max_batch_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group sequence indices into batches of similar length.
+
+    Indices are taken longest first; a batch is closed when adding the next
+    sequence would exceed max_batch_tokens padded tokens (batch size times the
+    longest member) or max_batch_size sequences. A single sequence longer than
+    the budget still gets a batch of its own.
+
+    Args:
+        lengths: Token count per sequence
+        max_batch_tokens: Padded-token budget per batch
+        max_batch_size: Maximum sequences per batch
+
+    Returns:
+        Batches of original indices; callers restore the input order by index
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    padded_length = 0
+    for index in order:
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * padded_length > max_batch_tokens):
+            batches.append(batch)
+            batch = []
+        if not batch:
+            padded_length = max(lengths[index], 1)
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
@@ -0,0 +1,136 @@
+"""
+Persistent embedding cache.
+Stores float32 embedding vectors in SQLite keyed by an embedding namespace
+(model name, max length and preprocessing flags) and the SHA-256 of the input
+text, so re-indexing unchanged code skips the model entirely across restarts.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+def content_hash(text: str) -> str:
+    """Hash of the raw text an embedding was generated from."""
+    return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
+
+
+def embedding_namespace(**settings: Any) -> str:
+    """
+    Identify everything besides the text that changes the resulting vector.
+
+    Args:
+        **settings: Model name, max length, preprocessing flags, ...
+
+    Returns:
+        Short stable digest of the settings
+    """
+    encoded = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+class PersistentEmbeddingCache:
+    """SQLite-backed embedding store; safe to call from worker threads."""
+
+    def __init__(self, path: str, namespace: str, max_entries: Optional[int] = 1_000_000):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: SQLite database file
+            namespace: Embedding namespace from embedding_namespace()
+            max_entries: Oldest vectors are evicted beyond this many rows (None = unbounded)
+        """
+        self.path = Path(path)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " namespace TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " dimension INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (namespace, content_hash))"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up vectors by content hash.
+
+        Returns:
+            Content hash -> float32 vector for the hashes found
+        """
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[i:i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT content_hash, dimension, vector FROM embeddings "
+                    f"WHERE namespace = ? AND content_hash IN ({placeholders})",
+                    [self.namespace, *chunk]
+                ).fetchall()
+                for key, dimension, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if vector.shape[0] == dimension:
+                        found[key] = vector
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """Store vectors by content hash; vectors already cached are kept."""
+        rows: List[Tuple[str, str, int, bytes]] = []
+        for key, vector in items:
+            vector = np.asarray(vector, dtype=np.float32).ravel()
+            rows.append((self.namespace, key, int(vector.shape[0]), vector.tobytes()))
+        if not rows:
+            return
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (namespace, content_hash, dimension, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._count += self._conn.total_changes - before
+            if self.max_entries is not None and self._count > self.max_entries:
+                excess = self._count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                    (excess,)
+                )
+                self._count -= excess
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        """Delete all vectors of this namespace."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -21,19 +21,41 @@ import logging
 import time
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from pathlib import Path
 from typing import Dict, Any, Optional, List, Union
 import torch
 from transformers import AutoModel, AutoTokenizer
 import numpy as np
 
+from .embedding_backends import (
+    VALIDATION_SNIPPETS,
+    OnnxBackend,
+    TorchBackend,
+    cosine_agreement,
+    export_onnx_model,
+    onnx_model_path,
+)
+from .embedding_batching import plan_batches
+from .embedding_cache import PersistentEmbeddingCache, content_hash, embedding_namespace
+from .embedding_scheduler import EmbeddingPriority, EmbeddingScheduler
+from .embedding_telemetry import BatchSample, EmbeddingTelemetry
+from .embedding_workers import EmbeddingWorkerPool, load_shared_weights
+from ..processing.chunk_tokenizer import preprocess_for_embedding
+
 
 class EmbeddingModelType(str, Enum):
     """Supported embedding model types - CodeBERT only."""
     CODEBERT = "codebert"
 
 
+class EmbeddingBackendType(str, Enum):
+    """Inference runtimes for the embedding model."""
+    TORCH = "torch"  # fp32 PyTorch
+    ONNX = "onnx"  # exported graph on ONNX Runtime (int8 when onnx_quantize)
+
+
 @dataclass
 class EmbeddingConfig:
     """Enhanced embedding configuration with code-specific optimizations."""
@@ -45,18 +67,41 @@ class EmbeddingConfig:
     # Model parameters
     dimension: int = 768  # CodeBERT dimension
     max_length: int = 512
-    batch_size: int = 32
+    batch_size: int = 32  # Maximum sequences per inference batch
+    max_batch_tokens: int = 8192  # Padded-token budget per batch (sequences x longest member)
     device: str = "cpu"  # Will auto-detect GPU if available
     
+    # Inference backend
+    backend: EmbeddingBackendType = EmbeddingBackendType.TORCH
+    onnx_model_dir: str = "./data/models/onnx"  # Exported graphs, reused across starts
+    onnx_quantize: bool = True  # Dynamic int8 quantization of weights
+    onnx_intra_op_threads: int = 0  # 0 = ONNX Runtime default (all physical cores)
+    onnx_inter_op_threads: int = 0
+    validate_backend: bool = True  # Compare against fp32 PyTorch before serving
+    min_backend_cosine: float = 0.99  # Minimum per-sample cosine agreement
+    
     # Performance settings
     normalize_embeddings: bool = True
     use_cache: bool = True
     cache_size: int = 10000
+    persistent_cache_path: Optional[str] = None  # SQLite file; survives restarts when set
+    persistent_cache_max_entries: int = 1_000_000
     
     # Async/Threading parameters (Production Architecture)
     max_workers: int = 4
     lazy_init: bool = True  # Initialize CodeBERT only when first needed
-    embedding_timeout: float = 30.0  # Timeout for embedding operations
+    embedding_timeout: float = 30.0  # Timeout per model call; time queued behind other work is not counted
+    warmup_lengths: List[int] = field(default_factory=lambda: [32, 128, 512])  # Sequence lengths run by warm_up()
+    warmup_batch_size: int = 8
+    worker_processes: int = 0  # >0 runs CPU inference in that many pinned processes
+    worker_cores: int = 0  # Cores per worker process (0 = split available cores evenly)
+    shared_weights_dir: str = "./data/models/shared"  # Memory-mapped weights shared by workers
+    
+    # Cross-request micro-batching
+    use_scheduler: bool = True
+    scheduler_max_batch_texts: int = 64  # Texts per shared model call
+    interactive_batch_window: float = 0.002  # Seconds queries wait for other queries
+    bulk_batch_window: float = 0.01  # Seconds indexing batches wait for other indexing work
     
     # Code-specific settings
     include_docstrings: bool = True
@@ -64,8 +109,29 @@ class EmbeddingConfig:
     include_imports: bool = True
     code_preprocessing: bool = True
     
+    def cache_namespace(self) -> str:
+        """Digest of every setting that changes the vector produced for a text."""
+        return embedding_namespace(
+            model_name=self.model_name,
+            max_length=self.max_length,
+            normalize_embeddings=self.normalize_embeddings,
+            code_preprocessing=self.code_preprocessing,
+            include_comments=self.include_comments,
+            backend=self.backend.value,
+            quantization=self.quantization
+        )
+    
+    @property
+    def quantization(self) -> str:
+        """Numeric precision of the weights the backend runs with."""
+        if self.backend == EmbeddingBackendType.ONNX and self.onnx_quantize:
+            return "int8"
+        return "fp32"
+    
     def __post_init__(self):
         """Post-initialization configuration."""
+        self.backend = EmbeddingBackendType(self.backend)
+        
         # Auto-detect device
         if self.device == "auto":
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -96,18 +162,58 @@ class AsyncEnhancedEmbeddingClient:
         # Model instances (lazy loaded)
         self.primary_model = None
         self.tokenizer = None
+        self.backend = None
+        self.backend_validation: Optional[Dict[str, Any]] = None
         self._model_initialized = False
         
+        # Preload/warm-up state reported by readiness()
+        self.warmup_state = "cold"  # cold | loading | warming | ready | failed
+        self.warmup_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        
         # Async infrastructure
         self.executor = ThreadPoolExecutor(max_workers=self.config.max_workers)
         self._init_lock = asyncio.Lock()
+        self.telemetry = EmbeddingTelemetry(labels={'model': self.config.model_name})
+        self.scheduler: Optional[EmbeddingScheduler] = None
+        if self.config.use_scheduler:
+            self.scheduler = EmbeddingScheduler(
+                self._generate_embeddings,
+                max_batch_texts=self.config.scheduler_max_batch_texts,
+                interactive_window=self.config.interactive_batch_window,
+                bulk_window=self.config.bulk_batch_window,
+                max_in_flight=max(1, self.config.worker_processes),
+                telemetry=self.telemetry,
+                batch_timeout=self.config.embedding_timeout
+            )
+        self.worker_pool: Optional[EmbeddingWorkerPool] = None
         
         # Performance tracking
         self.embedding_cache: Dict[str, np.ndarray] = {}
         self.cache_hits = 0
+        self.persistent_cache_hits = 0
+        self.persistent_cache: Optional[PersistentEmbeddingCache] = None
+        if self.config.use_cache and self.config.persistent_cache_path:
+            try:
+                self.persistent_cache = PersistentEmbeddingCache(
+                    self.config.persistent_cache_path,
+                    self.config.cache_namespace(),
+                    max_entries=self.config.persistent_cache_max_entries
+                )
+                self.logger.info(
+                    f"Persistent embedding cache at {self.config.persistent_cache_path} "
+                    f"({len(self.persistent_cache)} vectors)"
+                )
+            except Exception as e:
+                self.logger.warning(f"Persistent embedding cache disabled: {e}")
         self.total_requests = 0
         self.total_embedding_time = 0.0
         
+        # In-flight encode calls; a retired client closes when the last one returns
+        self._active_calls = 0
+        self._retired = False
+        
         self.logger.info(f"Async CodeBERT client created - lazy_init={self.config.lazy_init}")
         
         # Initialize immediately if not lazy  
@@ -140,20 +246,41 @@ class AsyncEnhancedEmbeddingClient:
                 self.logger.error(f"CodeBERT lazy initialization failed: {e}")
                 raise RuntimeError(f"CodeBERT must work - no fallbacks allowed: {e}")
     
-    def _initialize_codebert(self):
-        """Initialize CodeBERT model for code understanding."""
+    def _initialize_codebert(self, shared_weights_path: Optional[Path] = None):
+        """
+        Initialize CodeBERT model for code understanding.
+        
+        Args:
+            shared_weights_path: Memory-map the PyTorch weights from this state
+                dict instead of loading a private copy (worker processes)
+        """
         try:
             self.logger.info("Initializing CodeBERT model...")
             
             # Load CodeBERT model and tokenizer
             self.tokenizer = AutoTokenizer.from_pretrained(self.config.model_name)
-            self.primary_model = AutoModel.from_pretrained(self.config.model_name)
+            
+            if self.config.worker_processes > 0:
+                if self.config.device == "cpu":
+                    self._initialize_worker_pool()
+                    return
+                self.logger.warning("worker_processes only applies to CPU inference; running in-process")
+            
+            if self.config.backend == EmbeddingBackendType.ONNX:
+                self._initialize_onnx_backend()
+                return
+            
+            if shared_weights_path is not None:
+                self.primary_model = load_shared_weights(self.config.model_name, shared_weights_path)
+            else:
+                self.primary_model = AutoModel.from_pretrained(self.config.model_name)
             
             # Move to device
             if self.config.device != "cpu":
                 self.primary_model = self.primary_model.to(self.config.device)
             
             self.primary_model.eval()  # Set to evaluation mode
+            self.backend = TorchBackend(self.primary_model, self.config.device)
             
             self.logger.info(f"CodeBERT model loaded successfully on {self.config.device}")
             
@@ -161,25 +288,150 @@ class AsyncEnhancedEmbeddingClient:
             self.logger.error(f"Failed to initialize CodeBERT: {e}")
             raise
     
+    def _initialize_worker_pool(self):
+        """Start pinned worker processes; the tokenizer stays loaded here for callers."""
+        pool = EmbeddingWorkerPool(self.config, telemetry=self.telemetry)
+        pool.start()
+        self.worker_pool = pool
+        self.backend_validation = pool.backend_validation
+        self.primary_model = pool  # Weights live in the worker processes
+        self.logger.info(f"CodeBERT running in {pool.num_workers} worker processes")
     
+    def _initialize_onnx_backend(self):
+        """
+        Export (once) and load the ONNX graph, validating it against fp32 PyTorch.
+        
+        The PyTorch model is only loaded when the graph has to be exported or
+        validated, and is released afterwards.
+        """
+        torch_model = None
+        graph_path = onnx_model_path(self.config.model_name, self.config.onnx_model_dir, self.config.onnx_quantize)
+        if self.config.validate_backend or not graph_path.exists():
+            torch_model = AutoModel.from_pretrained(self.config.model_name).eval()
+        export_path = export_onnx_model(
+            torch_model,
+            self.config.model_name,
+            self.config.onnx_model_dir,
+            quantize=self.config.onnx_quantize
+        )
+        backend = OnnxBackend(
+            export_path,
+            intra_op_threads=self.config.onnx_intra_op_threads,
+            inter_op_threads=self.config.onnx_inter_op_threads
+        )
+        
+        if self.config.validate_backend:
+            texts = VALIDATION_SNIPPETS
+            reference = self._embed_with(TorchBackend(torch_model), texts)
+            candidate = self._embed_with(backend, texts)
+            report = cosine_agreement(reference, candidate)
+            report['min_required'] = self.config.min_backend_cosine
+            self.backend_validation = report
+            self.logger.info(
+                f"ONNX backend agreement with fp32: mean cosine {report['mean_cosine']:.4f}, "
+                f"min {report['min_cosine']:.4f}"
+            )
+            if report['min_cosine'] < self.config.min_backend_cosine:
+                raise RuntimeError(
+                    f"ONNX backend disagrees with fp32 CodeBERT (min cosine {report['min_cosine']:.4f} "
+                    f"< {self.config.min_backend_cosine}); disable onnx_quantize or use backend='torch'"
+                )
+        
+        self.backend = backend
+        self.primary_model = backend  # The session replaces the PyTorch weights
+        self.logger.info(f"CodeBERT ONNX backend loaded from {export_path}")
+    
+    async def warm_up(self) -> Dict[str, Any]:
+        """
+        Load the model and run inference over representative shapes.
+        
+        Meant to run in the background at startup so the first query or
+        indexing job does not pay for model loading and first-call kernel
+        setup. Every worker process is warmed when a worker pool is used.
+        
+        Returns:
+            Readiness report (see readiness())
+        """
+        if self.warmup_state in ("loading", "warming", "ready"):
+            return self.readiness()
+        
+        self.warmup_state = "loading"
+        self.warmup_error = None
+        start = time.perf_counter()
+        try:
+            await self._ensure_model_initialized()
+            self.load_seconds = time.perf_counter() - start
+            
+            self.warmup_state = "warming"
+            warm_start = time.perf_counter()
+            repeats = self.worker_pool.num_workers if self.worker_pool is not None else 1
+            for batch in self._warmup_batches():
+                # Round-robin dispatch sends consecutive calls to different workers
+                for _ in range(repeats):
+                    await asyncio.to_thread(self._generate_embeddings, batch)
+            self.warmup_seconds = time.perf_counter() - warm_start
+            self.warmup_state = "ready"
+            self.logger.info(
+                f"CodeBERT warmed up - load {self.load_seconds:.1f}s, warm-up {self.warmup_seconds:.1f}s"
+            )
+        except Exception as e:
+            self.warmup_state = "failed"
+            self.warmup_error = str(e)
+            self.logger.error(f"CodeBERT warm-up failed: {e}")
+        return self.readiness()
     
+    def _warmup_batches(self) -> List[List[List[int]]]:
+        """Pre-tokenized batches of warmup_batch_size sequences at each warm-up length."""
+        filler = self.tokenizer(" ".join(VALIDATION_SNIPPETS), add_special_tokens=False)["input_ids"]
+        special_tokens = self.tokenizer.num_special_tokens_to_add(pair=False)
+        batches = []
+        for length in sorted({min(length, self.config.max_length) for length in self.config.warmup_lengths}):
+            body_length = max(length - special_tokens, 1)
+            body = (filler * (body_length // len(filler) + 1))[:body_length]
+            sequence = self.tokenizer.build_inputs_with_special_tokens(body)
+            batches.append([list(sequence) for _ in range(self.config.warmup_batch_size)])
+        return batches
     
-    async def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+    def readiness(self) -> Dict[str, Any]:
+        """Whether the model is loaded and warm, without triggering a load."""
+        state = self.warmup_state
+        if state == "cold" and self._model_initialized:
+            state = "loaded"  # Loaded lazily by a first request
+        return {
+            'state': state,
+            'ready': state in ("ready", "loaded"),
+            'model_loaded': self._model_initialized,
+            'backend': self.config.backend.value,
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'error': self.warmup_error
+        }
+    
+    async def encode(self,
+                     texts: Union[str, List[str]],
+                     priority: EmbeddingPriority = EmbeddingPriority.INTERACTIVE,
+                     token_ids: Optional[List[List[int]]] = None,
+                     **kwargs) -> np.ndarray:
         """
         Generate embeddings for text(s) with async worker pool architecture.
         
+        Concurrent calls are coalesced into shared model batches by the
+        scheduler; interactive requests run before bulk ones. embedding_timeout
+        bounds each model call, not the time spent queued.
+        
         Args:
             texts: Input text(s) to embed
+            priority: INTERACTIVE for queries, BULK for indexing
+            token_ids: Model input ids per text, already tokenized by the chunker
+                (ChunkTokenizer); the texts are then only used as cache keys
             **kwargs: Additional encoding parameters
             
         Returns:
             np.ndarray: Generated embeddings
         """
-        # Ensure model is initialized (lazy loading)
-        await self._ensure_model_initialized()
-        
         start_time = time.time()
         self.total_requests += 1
+        self._active_calls += 1
         
         try:
             # Handle single text
@@ -201,17 +453,27 @@ class AsyncEnhancedEmbeddingClient:
                         uncached_texts.append(text)
                         uncached_indices.append(i)
                 
+                # Consult the on-disk cache before touching the model
+                if uncached_texts and self.persistent_cache is not None:
+                    uncached_texts, uncached_indices = await self._lookup_persistent(
+                        uncached_texts, uncached_indices, cached_embeddings
+                    )
+                self.telemetry.record_cache_lookup(len(texts), len(texts) - len(uncached_texts))
+                
                 # Generate embeddings for uncached texts using async thread pool
                 if uncached_texts:
-                    new_embeddings = await asyncio.wait_for(
-                        asyncio.to_thread(self._generate_embeddings, uncached_texts, **kwargs),
-                        timeout=self.config.embedding_timeout
-                    )
+                    await self._ensure_model_initialized()
+                    model_inputs = uncached_texts
+                    if token_ids is not None:
+                        model_inputs = [token_ids[i] for i in uncached_indices]
+                    new_embeddings = await self._run_model(model_inputs, priority, **kwargs)
                     
                     # Cache new embeddings
                     for text, embedding in zip(uncached_texts, new_embeddings):
                         cache_key = self._get_cache_key(text)
                         self._cache_embedding(cache_key, embedding)
+                    if self.persistent_cache is not None:
+                        await self._store_persistent(uncached_texts, new_embeddings)
                     
                     # Combine cached and new embeddings
                     all_embeddings = [None] * len(texts)
@@ -231,7 +493,8 @@ class AsyncEnhancedEmbeddingClient:
                     result = np.array([emb for _, emb in sorted(cached_embeddings)])
             else:
                 # No caching
-                result = self._generate_embeddings(texts, **kwargs)
+                await self._ensure_model_initialized()
+                result = await self._run_model(token_ids if token_ids is not None else texts, priority, **kwargs)
             
             # Track performance
             self.total_embedding_time += time.time() - start_time
@@ -244,13 +507,85 @@ class AsyncEnhancedEmbeddingClient:
         except Exception as e:
             self.logger.error(f"CodeBERT embedding generation failed: {e}")
             raise RuntimeError(f"CodeBERT must work - no fallbacks: {e}")
+        finally:
+            self._active_calls -= 1
+            if self._retired and self._active_calls == 0:
+                self.close()
+    
+    def retire(self) -> None:
+        """
+        Close the client once every in-flight encode call has returned.
+        
+        Used when another model takes over serving; callers that still hold
+        this client finish on it instead of failing mid-request.
+        """
+        self._retired = True
+        if self._active_calls == 0:
+            self.close()
+    
+    async def _run_model(self, texts: List[str], priority: EmbeddingPriority, **kwargs) -> np.ndarray:
+        """
+        Run the model off the event loop, through the shared scheduler when enabled.
+        
+        The scheduler applies embedding_timeout to each model call it runs, so
+        bulk work queued behind queries does not time out while waiting.
+        """
+        if self.scheduler is not None and not kwargs:
+            return await self.scheduler.submit(texts, priority)
+        return await asyncio.wait_for(
+            asyncio.to_thread(self._generate_embeddings, texts, **kwargs),
+            timeout=self.config.embedding_timeout
+        )
+    
+    async def _lookup_persistent(self,
+                                 texts: List[str],
+                                 indices: List[int],
+                                 cached_embeddings: List) -> tuple:
+        """
+        Resolve memory-cache misses from the persistent cache.
+        
+        Hits are appended to cached_embeddings as (index, embedding) and
+        promoted to the in-memory cache.
+        
+        Returns:
+            Tuple of (texts still uncached, their original indices)
+        """
+        hashes = [content_hash(text) for text in texts]
+        try:
+            stored = await asyncio.to_thread(self.persistent_cache.get_many, hashes)
+        except Exception as e:
+            self.logger.warning(f"Persistent embedding cache lookup failed: {e}")
+            return texts, indices
+        
+        remaining_texts: List[str] = []
+        remaining_indices: List[int] = []
+        for text, index, key in zip(texts, indices, hashes):
+            embedding = stored.get(key)
+            if embedding is None:
+                remaining_texts.append(text)
+                remaining_indices.append(index)
+            else:
+                cached_embeddings.append((index, embedding))
+                self._cache_embedding(self._get_cache_key(text), embedding)
+                self.persistent_cache_hits += 1
+        return remaining_texts, remaining_indices
+    
+    async def _store_persistent(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """Write newly generated embeddings to the persistent cache."""
+        try:
+            await asyncio.to_thread(
+                self.persistent_cache.put_many,
+                [(content_hash(text), embedding) for text, embedding in zip(texts, embeddings)]
+            )
+        except Exception as e:
+            self.logger.warning(f"Persistent embedding cache write failed: {e}")
     
-    def _generate_embeddings(self, texts: List[str], **kwargs) -> np.ndarray:
+    def _generate_embeddings(self, texts: List[Union[str, List[int]]], **kwargs) -> np.ndarray:
         """
         Generate embeddings using the configured model.
         
         Args:
-            texts: List of texts to embed
+            texts: List of texts, or of pre-tokenized model input ids, to embed
             **kwargs: Additional parameters
             
         Returns:
@@ -258,50 +593,32 @@ class AsyncEnhancedEmbeddingClient:
         """
         if self.config.model_type != EmbeddingModelType.CODEBERT:
             raise ValueError("Only CodeBERT is supported - no fallbacks")
+        if self.worker_pool is not None:
+            return self.worker_pool.embed(texts)
         return self._generate_codebert_embeddings(texts)
     
-    def _generate_codebert_embeddings(self, texts: List[str]) -> np.ndarray:
+    def _generate_codebert_embeddings(self, texts: List[Union[str, List[int]]]) -> np.ndarray:
         """
         Generate embeddings using CodeBERT.
         
+        Texts are tokenized once, sorted by token count and batched within
+        max_batch_tokens, so each batch is only padded to the length of its own
+        longest member; results are returned in input order.
+        
         Args:
-            texts: List of texts to embed
+            texts: List of texts, or of pre-tokenized model input ids, to embed
             
         Returns:
             np.ndarray: Generated embeddings
         """
-        embeddings = []
+        if not texts:
+            return np.zeros((0, self.config.dimension), dtype=np.float32)
         
-        # Process in batches
-        for i in range(0, len(texts), self.config.batch_size):
-            batch_texts = texts[i:i + self.config.batch_size]
-            
-            # Preprocess code if enabled
-            if self.config.code_preprocessing:
-                batch_texts = [self._preprocess_code(text) for text in batch_texts]
-            
-            # Tokenize
-            inputs = self.tokenizer(
-                batch_texts,
-                padding=True,
-                truncation=True,
-                max_length=self.config.max_length,
-                return_tensors="pt"
-            )
-            
-            # Move to device
-            if self.config.device != "cpu":
-                inputs = {k: v.to(self.config.device) for k, v in inputs.items()}
-            
-            # Generate embeddings
-            with torch.no_grad():
-                outputs = self.primary_model(**inputs)
-                # Use CLS token embedding
-                batch_embeddings = outputs.last_hidden_state[:, 0, :].cpu().numpy()
-            
-            embeddings.extend(batch_embeddings)
+        # Preprocess code if enabled (pre-tokenized inputs were preprocessed by the chunker)
+        if self.config.code_preprocessing:
+            texts = [self._preprocess_code(text) if isinstance(text, str) else text for text in texts]
         
-        embeddings = np.array(embeddings)
+        embeddings = self._embed_with(self.backend, texts)
         
         # Normalize if requested
         if self.config.normalize_embeddings:
@@ -309,6 +626,43 @@ class AsyncEnhancedEmbeddingClient:
         
         return embeddings
     
+    def _embed_with(self, backend, texts: List[Union[str, List[int]]]) -> np.ndarray:
+        """Tokenize, bucket by length and run a backend; returns raw CLS embeddings in input order."""
+        # Tokenize once without padding to learn each sequence's length; ids
+        # handed over by the chunker are used as they are
+        raw_texts = [text for text in texts if isinstance(text, str)]
+        encoded = iter(self.tokenizer(
+            raw_texts,
+            padding=False,
+            truncation=True,
+            max_length=self.config.max_length
+        )["input_ids"] if raw_texts else [])
+        input_ids = [
+            next(encoded) if isinstance(text, str) else list(text[:self.config.max_length])
+            for text in texts
+        ]
+        lengths = [len(ids) for ids in input_ids]
+        pad_token_id = self.tokenizer.pad_token_id or 0
+        
+        embeddings = np.empty((len(texts), self.config.dimension), dtype=np.float32)
+        for batch_indices in plan_batches(lengths, self.config.max_batch_tokens, self.config.batch_size):
+            padded_length = max(lengths[i] for i in batch_indices)
+            ids = np.full((len(batch_indices), padded_length), pad_token_id, dtype=np.int64)
+            attention_mask = np.zeros((len(batch_indices), padded_length), dtype=np.int64)
+            for row, index in enumerate(batch_indices):
+                ids[row, :lengths[index]] = input_ids[index]
+                attention_mask[row, :lengths[index]] = 1
+            start = time.perf_counter()
+            embeddings[batch_indices] = backend.embed(ids, attention_mask)
+            self.telemetry.record_batch(BatchSample(
+                texts=len(batch_indices),
+                real_tokens=int(attention_mask.sum()),
+                padded_tokens=int(attention_mask.size),
+                seconds=time.perf_counter() - start
+            ))
+        
+        return embeddings
+    
     def _preprocess_code(self, code: str) -> str:
         """
         Preprocess code for better embedding quality.
@@ -319,24 +673,8 @@ class AsyncEnhancedEmbeddingClient:
         Returns:
             str: Preprocessed code
         """
-        # Basic preprocessing for code
-        lines = code.split('\n')
-        processed_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines
-            if not line:
-                continue
-            
-            # Include/exclude based on configuration
-            if not self.config.include_comments and (line.startswith('//') or line.startswith('#')):
-                continue
-            
-            processed_lines.append(line)
-        
-        return '\n'.join(processed_lines)
+        # Shared with the chunker so pre-tokenized chunks match what is embedded here
+        return preprocess_for_embedding(code, self.config.include_comments)
     
     def _get_cache_key(self, text: str) -> str:
         """Generate cache key for text."""
@@ -354,20 +692,30 @@ class AsyncEnhancedEmbeddingClient:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get embedding client statistics."""
-        cache_hit_rate = self.cache_hits / max(self.total_requests, 1)
+        # Per text, over memory and persistent cache hits
+        cache_hit_rate = self.telemetry.cache_hit_texts / max(self.telemetry.lookup_texts, 1)
         avg_time = self.total_embedding_time / max(self.total_requests, 1)
         
         return {
             'model_type': self.config.model_type.value,
             'model_name': self.config.model_name,
+            'backend': self.config.backend.value,
+            'backend_validation': self.backend_validation,
+            'readiness': self.readiness(),
             'dimension': self.config.dimension,
             'device': self.config.device,
             'total_requests': self.total_requests,
             'cache_hits': self.cache_hits,
             'cache_hit_rate': cache_hit_rate,
             'cache_size': len(self.embedding_cache),
+            'persistent_cache_enabled': self.persistent_cache is not None,
+            'persistent_cache_hits': self.persistent_cache_hits,
+            'persistent_cache_size': len(self.persistent_cache) if self.persistent_cache is not None else 0,
             'average_embedding_time': avg_time,
-            'total_embedding_time': self.total_embedding_time
+            'total_embedding_time': self.total_embedding_time,
+            'scheduler': self.scheduler.get_statistics() if self.scheduler is not None else None,
+            'worker_pool': self.worker_pool.get_statistics() if self.worker_pool is not None else None,
+            'telemetry': self.telemetry.summary()
         }
     
     async def health_check(self) -> Dict[str, Any]:
@@ -401,9 +749,19 @@ class AsyncEnhancedEmbeddingClient:
         """Cleanup resources."""
         try:
             self.clear_cache()
+            if self.persistent_cache is not None:
+                self.persistent_cache.close()
+                self.persistent_cache = None
+            if self.scheduler is not None:
+                self.scheduler.shutdown()
+                self.scheduler = None
+            if self.worker_pool is not None:
+                self.worker_pool.shutdown()
+                self.worker_pool = None
             
             # Clear models
             self.primary_model = None
+            self.backend = None
             self.tokenizer = None
             
             self.logger.info("Embedding client closed successfully")
@@ -0,0 +1,262 @@
+"""
+Embedding model registry.
+Vectors from different models (or preprocessing settings) live in different
+spaces, so each logical collection (one per repository) maps to the physical
+Chroma collection holding vectors of exactly one embedding fingerprint.
+A re-embedding job fills a shadow collection for the new fingerprint and then
+activates it in one registry write; queries always resolve the collection
+that matches the fingerprint of the model that embedded the query.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .exceptions import ProcessingError
+
+
+logger = logging.getLogger(__name__)
+
+# Chroma collection names: 3-63 characters from [a-zA-Z0-9._-]
+_MAX_COLLECTION_NAME = 63
+
+
+@dataclass
+class CollectionBinding:
+    """Physical collection holding the vectors of one model fingerprint."""
+    fingerprint: str
+    collection: str
+    model_name: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    activated_at: Optional[float] = None
+
+
+@dataclass
+class ShadowBuild:
+    """Progress of a background re-embedding into a shadow collection."""
+    fingerprint: str
+    collection: str
+    model_name: Optional[str] = None
+    status: str = "building"  # building, failed
+    total: int = 0
+    embedded: int = 0
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    error: Optional[str] = None
+
+    def binding(self) -> CollectionBinding:
+        return CollectionBinding(
+            fingerprint=self.fingerprint,
+            collection=self.collection,
+            model_name=self.model_name,
+            created_at=self.started_at
+        )
+
+
+@dataclass
+class RegistryEntry:
+    """Active, shadow and previous collections of one logical collection."""
+    active: Optional[CollectionBinding] = None
+    shadow: Optional[ShadowBuild] = None
+    previous: Optional[CollectionBinding] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'active': asdict(self.active) if self.active else None,
+            'shadow': asdict(self.shadow) if self.shadow else None,
+            'previous': asdict(self.previous) if self.previous else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RegistryEntry':
+        return cls(
+            active=CollectionBinding(**data['active']) if data.get('active') else None,
+            shadow=ShadowBuild(**data['shadow']) if data.get('shadow') else None,
+            previous=CollectionBinding(**data['previous']) if data.get('previous') else None,
+        )
+
+
+def physical_collection_name(logical: str, fingerprint: str) -> str:
+    """Name of the collection holding a logical collection's vectors for one fingerprint."""
+    suffix = f"_emb_{fingerprint[:8]}"
+    base = re.sub(r"[^a-zA-Z0-9._-]", "_", logical)[:_MAX_COLLECTION_NAME - len(suffix)]
+    return f"{base}{suffix}"
+
+
+class EmbeddingRegistry:
+    """JSON-file registry of embedding fingerprints per logical collection; thread-safe."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, RegistryEntry] = self._load()
+
+    def _load(self) -> Dict[str, RegistryEntry]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {name: RegistryEntry.from_dict(entry) for name, entry in data.get('collections', {}).items()}
+        except Exception as e:
+            # Refuse to start over: an empty registry would re-adopt collections blindly
+            raise ProcessingError(
+                f"Unreadable embedding registry {self.path}: {e}",
+                error_code="EMBEDDING_REGISTRY_CORRUPT",
+                recoverable=False
+            )
+
+    def _save(self) -> None:
+        """Write atomically so a crash never leaves a truncated registry."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        data = {'collections': {name: entry.to_dict() for name, entry in self._entries.items()}}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def write_collection(self, logical: str, fingerprint: str, model_name: Optional[str] = None) -> str:
+        """
+        Physical collection that vectors of this fingerprint must be written to.
+
+        The first write binds a logical collection to its writer's fingerprint,
+        adopting the existing collection of the same name. Writes whose
+        fingerprint matches neither the active nor the shadow collection are
+        refused instead of mixing vector spaces.
+
+        Raises:
+            ProcessingError: The fingerprint is not bound to this collection
+        """
+        with self._lock:
+            entry = self._entries.get(logical)
+            if entry is None or entry.active is None:
+                entry = entry or RegistryEntry()
+                entry.active = CollectionBinding(
+                    fingerprint=fingerprint,
+                    collection=logical,
+                    model_name=model_name,
+                    activated_at=time.time()
+                )
+                self._entries[logical] = entry
+                self._save()
+                logger.info(f"Bound collection {logical} to embedding fingerprint {fingerprint}")
+            if entry.active.fingerprint == fingerprint:
+                return entry.active.collection
+            if entry.shadow is not None and entry.shadow.fingerprint == fingerprint:
+                return entry.shadow.collection
+            if entry.previous is not None and entry.previous.fingerprint == fingerprint:
+                # A write embedded just before a switch; the migrator reconciles it
+                return entry.previous.collection
+        raise ProcessingError(
+            f"Embedding fingerprint {fingerprint} does not match collection {logical} "
+            f"(active: {entry.active.fingerprint}); re-embed the collection before writing",
+            error_code="EMBEDDING_FINGERPRINT_MISMATCH",
+            recoverable=False
+        )
+
+    def query_collection(self, logical: str, fingerprint: str) -> Optional[str]:
+        """
+        Physical collection to search with a query embedded under this fingerprint.
+
+        Returns:
+            The active collection, the previous one for queries embedded just
+            before a switch, the logical name if unregistered, or None when no
+            collection holds vectors of this fingerprint
+        """
+        with self._lock:
+            entry = self._entries.get(logical)
+            if entry is None or entry.active is None:
+                return logical
+            if entry.active.fingerprint == fingerprint:
+                return entry.active.collection
+            if entry.previous is not None and entry.previous.fingerprint == fingerprint:
+                return entry.previous.collection
+        return None
+
+    def collections_for(self, logical: str) -> List[str]:
+        """Every physical collection of a logical collection (deletes go to all of them)."""
+        with self._lock:
+            entry = self._entries.get(logical)
+            if entry is None:
+                return [logical]
+            bindings = [entry.active, entry.shadow, entry.previous]
+            return list(dict.fromkeys(b.collection for b in bindings if b is not None))
+
+    def remove(self, logical: str) -> None:
+        """Forget a logical collection whose physical collections were dropped."""
+        with self._lock:
+            if self._entries.pop(logical, None) is not None:
+                self._save()
+
+    def active(self, logical: str) -> Optional[CollectionBinding]:
+        with self._lock:
+            entry = self._entries.get(logical)
+            return entry.active if entry else None
+
+    def logical_collections(self) -> List[str]:
+        with self._lock:
+            return sorted(self._entries)
+
+    def begin_shadow(self, logical: str, fingerprint: str, model_name: Optional[str] = None) -> ShadowBuild:
+        """Start (or restart) building the shadow collection for a new fingerprint."""
+        with self._lock:
+            entry = self._entries.get(logical)
+            if entry is None or entry.active is None:
+                raise ProcessingError(
+                    f"Collection {logical} has no active embeddings to re-embed",
+                    error_code="EMBEDDING_REGISTRY_UNKNOWN_COLLECTION",
+                    recoverable=False
+                )
+            entry.shadow = ShadowBuild(
+                fingerprint=fingerprint,
+                collection=physical_collection_name(logical, fingerprint),
+                model_name=model_name
+            )
+            self._save()
+            return entry.shadow
+
+    def update_shadow(self, logical: str, **progress: Any) -> None:
+        """Record shadow build progress (total, embedded, status, error)."""
+        with self._lock:
+            entry = self._entries.get(logical)
+            if entry is None or entry.shadow is None:
+                return
+            for key, value in progress.items():
+                setattr(entry.shadow, key, value)
+            entry.shadow.updated_at = time.time()
+            self._save()
+
+    def activate(self, logical: str) -> CollectionBinding:
+        """
+        Switch queries and writes to the shadow collection in one registry write.
+
+        The replaced binding is kept as previous so queries embedded by the old
+        model just before the switch still resolve to a matching collection.
+
+        Returns:
+            The new active binding
+        """
+        with self._lock:
+            entry = self._entries.get(logical)
+            if entry is None or entry.shadow is None:
+                raise ProcessingError(
+                    f"Collection {logical} has no shadow collection to activate",
+                    error_code="EMBEDDING_REGISTRY_NO_SHADOW",
+                    recoverable=False
+                )
+            binding = entry.shadow.binding()
+            binding.activated_at = time.time()
+            entry.previous, entry.active, entry.shadow = entry.active, binding, None
+            self._save()
+        logger.info(f"Collection {logical} now serves embedding fingerprint {binding.fingerprint} from {binding.collection}")
+        return binding
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: entry.to_dict() for name, entry in self._entries.items()}
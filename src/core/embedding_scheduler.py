@@ -0,0 +1,245 @@
+"""
+Cross-request micro-batching for embedding inference.
+Concurrent encode calls are queued by priority and coalesced into shared
+model batches within a short latency window. Inference threads run at most
+max_in_flight batches at a time (one per model worker); interactive (query)
+work always goes before bulk (indexing) work, and bulk requests are split
+into bounded slices so a large repository never holds the model for longer
+than one slice. The optional batch timeout bounds each model call, never the
+time a request spends queued behind other work.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingPriority(IntEnum):
+    """Scheduling class of an encode request; lower values run first."""
+    INTERACTIVE = 0  # query embeddings on a request path
+    BULK = 1  # repository indexing
+
+
+@dataclass
+class _EncodeRequest:
+    texts: List[str]
+    future: asyncio.Future
+    priority: EmbeddingPriority = EmbeddingPriority.INTERACTIVE
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    rows: List[Optional[np.ndarray]] = field(default_factory=list)
+    next_index: int = 0
+    remaining: int = 0
+
+    def __post_init__(self):
+        self.rows = [None] * len(self.texts)
+        self.remaining = len(self.texts)
+
+
+class EmbeddingScheduler:
+    """Coalesces concurrent encode requests into prioritized shared batches."""
+
+    def __init__(self,
+                 embed_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_texts: int = 64,
+                 interactive_window: float = 0.002,
+                 bulk_window: float = 0.01,
+                 max_in_flight: int = 1,
+                 telemetry: Optional[Any] = None,
+                 batch_timeout: Optional[float] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            embed_fn: Synchronous batch embedding function, run on the inference thread
+            max_batch_texts: Maximum texts per model call (bounds bulk slices)
+            interactive_window: Seconds to wait for more interactive requests before running
+            bulk_window: Seconds to wait for more bulk requests before running
+            max_in_flight: Batches run concurrently; match the number of model workers
+            telemetry: Optional EmbeddingTelemetry receiving per-request queue waits
+            batch_timeout: Seconds one model call may take before its requests fail
+                with TimeoutError (None = no limit)
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_texts = max(1, max_batch_texts)
+        self.windows = {
+            EmbeddingPriority.INTERACTIVE: interactive_window,
+            EmbeddingPriority.BULK: bulk_window,
+        }
+        self._queues: Dict[EmbeddingPriority, Deque[_EncodeRequest]] = {
+            priority: deque() for priority in EmbeddingPriority
+        }
+        self.max_in_flight = max(1, max_in_flight)
+        self.telemetry = telemetry
+        self.batch_timeout = batch_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embedding")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.batches = 0
+        self.batched_texts = 0
+        self.requests = {priority: 0 for priority in EmbeddingPriority}
+
+    async def submit(self, texts: List[str], priority: EmbeddingPriority = EmbeddingPriority.INTERACTIVE) -> np.ndarray:
+        """
+        Embed texts as part of the next shared batch of their priority.
+
+        Returns:
+            Embeddings in input order
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop and not self._loop.is_closed():
+            # Called from a short-lived loop (e.g. asyncio.run in a sync adapter)
+            return await asyncio.to_thread(self.embed_fn, list(texts))
+        if self._loop is not loop or self._task is None or self._task.done():
+            if self._loop is not loop:
+                for queue in self._queues.values():
+                    queue.clear()
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+        request = _EncodeRequest(texts=list(texts), future=loop.create_future(), priority=priority)
+        self._queues[priority].append(request)
+        self.requests[priority] += 1
+        self._wakeup.set()
+        return await request.future
+
+    def _queued_texts(self, priority: EmbeddingPriority) -> int:
+        return sum(len(r.texts) - r.next_index for r in self._queues[priority] if not r.future.done())
+
+    def _next_priority(self) -> Optional[EmbeddingPriority]:
+        for priority in EmbeddingPriority:
+            queue = self._queues[priority]
+            while queue and queue[0].future.done():
+                queue.popleft()
+            if queue:
+                return priority
+        return None
+
+    def _take_batch(self, priority: EmbeddingPriority) -> List[Tuple[_EncodeRequest, int, int]]:
+        """Slice up to max_batch_texts texts off the head of a priority queue."""
+        queue = self._queues[priority]
+        batch: List[Tuple[_EncodeRequest, int, int]] = []
+        count = 0
+        while queue and count < self.max_batch_texts:
+            request = queue[0]
+            if request.future.done():
+                queue.popleft()
+                continue
+            take = min(len(request.texts) - request.next_index, self.max_batch_texts - count)
+            batch.append((request, request.next_index, request.next_index + take))
+            request.next_index += take
+            count += take
+            if request.next_index == len(request.texts):
+                queue.popleft()
+        return batch
+
+    async def _run(self) -> None:
+        slots = asyncio.Semaphore(self.max_in_flight)
+        running = set()
+        try:
+            while True:
+                priority = self._next_priority()
+                if priority is None:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                # Pick the batch only once a slot is free so queries can still overtake
+                await slots.acquire()
+                batch = await self._collect_batch(priority)
+                if not batch:
+                    slots.release()
+                    continue
+                task = asyncio.ensure_future(self._run_batch(batch))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(lambda _: slots.release())
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _collect_batch(self, priority: EmbeddingPriority) -> List[Tuple[_EncodeRequest, int, int]]:
+        """Wait out the batching window, then take the batch of the highest pending priority."""
+        window = self.windows[priority]
+        if window > 0 and self._queued_texts(priority) < self.max_batch_texts:
+            # Let concurrent callers join this batch
+            await asyncio.sleep(window)
+            priority = self._next_priority()
+            if priority is None:
+                return []
+        return self._take_batch(priority)
+
+    async def _run_batch(self, batch: List[Tuple[_EncodeRequest, int, int]]) -> None:
+        loop = asyncio.get_running_loop()
+        texts = [text for request, start, end in batch for text in request.texts[start:end]]
+        if self.telemetry is not None:
+            now = time.perf_counter()
+            for request, start, _ in batch:
+                if start == 0:  # first slice of the request
+                    self.telemetry.record_queue_wait(now - request.enqueued_at, request.priority.name.lower())
+        call = loop.run_in_executor(self._executor, self.embed_fn, texts)
+        try:
+            done, _ = await asyncio.wait({call}, timeout=self.batch_timeout)
+            if not done:
+                self._fail(batch, asyncio.TimeoutError(f"Embedding batch exceeded {self.batch_timeout}s"))
+                # The thread cannot be interrupted; hold the slot until it is free again
+                await asyncio.gather(call, return_exceptions=True)
+                return
+            embeddings = call.result()
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        self.batches += 1
+        self.batched_texts += len(texts)
+        offset = 0
+        for request, start, end in batch:
+            request.rows[start:end] = list(embeddings[offset:offset + end - start])
+            offset += end - start
+            request.remaining -= end - start
+            if request.remaining == 0 and not request.future.done():
+                request.future.set_result(np.stack(request.rows))
+
+    @staticmethod
+    def _fail(batch: List[Tuple[_EncodeRequest, int, int]], error: BaseException) -> None:
+        for request, _, _ in batch:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def get_statistics(self) -> Dict[str, float]:
+        return {
+            'batches': self.batches,
+            'batched_texts': self.batched_texts,
+            'average_batch_size': self.batched_texts / max(self.batches, 1),
+            'interactive_requests': self.requests[EmbeddingPriority.INTERACTIVE],
+            'bulk_requests': self.requests[EmbeddingPriority.BULK],
+            'queued_interactive_texts': self._queued_texts(EmbeddingPriority.INTERACTIVE),
+            'queued_bulk_texts': self._queued_texts(EmbeddingPriority.BULK),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the scheduler task, failing queued requests."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for queue in self._queues.values():
+            while queue:
+                request = queue.popleft()
+                if not request.future.done():
+                    request.future.set_exception(RuntimeError("Embedding scheduler shut down"))
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,138 @@
+"""
+Embedding throughput and cache-efficiency telemetry.
+Records one sample per model batch (texts, real and padded tokens, latency),
+per scheduler queue wait and per cache lookup into PerformanceCollector
+histograms, which are exported with the other metrics. Worker processes buffer
+their batch samples and hand them back with each result, so the parent's
+collector sees every batch no matter where it ran.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .performance_metrics import (
+    COUNT_BUCKETS,
+    LATENCY_BUCKETS,
+    RATE_BUCKETS,
+    RATIO_BUCKETS,
+    PerformanceCollector,
+    performance_collector,
+)
+
+
+@dataclass
+class BatchSample:
+    """One padded batch run through an inference backend."""
+    texts: int
+    real_tokens: int
+    padded_tokens: int
+    seconds: float
+
+
+class EmbeddingTelemetry:
+    """Embedding histograms in a PerformanceCollector, plus running totals."""
+
+    PREFIX = "embedding_"
+
+    def __init__(self,
+                 collector: Optional[PerformanceCollector] = None,
+                 labels: Optional[Dict[str, str]] = None,
+                 buffer: bool = False):
+        """
+        Initialize telemetry.
+
+        Args:
+            collector: Collector receiving the histograms (default: global collector)
+            labels: Labels added to every series (e.g. model and backend)
+            buffer: Keep batch samples for drain() instead of recording them
+                (used inside worker processes)
+        """
+        self.collector = collector or performance_collector
+        self.labels = dict(labels or {})
+        self.buffer = buffer
+        self._pending: List[BatchSample] = []
+        self._lock = threading.Lock()
+
+        # Running totals since start
+        self.batches = 0
+        self.batched_texts = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.inference_seconds = 0.0
+        self.lookup_texts = 0
+        self.cache_hit_texts = 0
+
+    def _observe(self, name: str, value: float, buckets, description: str, **labels: str) -> None:
+        self.collector.observe_histogram(
+            self.PREFIX + name, value,
+            buckets=buckets,
+            labels={**self.labels, **labels},
+            description=description
+        )
+
+    def record_batch(self, sample: BatchSample) -> None:
+        """Record one model batch."""
+        if self.buffer:
+            with self._lock:
+                self._pending.append(sample)
+            return
+        with self._lock:
+            self.batches += 1
+            self.batched_texts += sample.texts
+            self.real_tokens += sample.real_tokens
+            self.padded_tokens += sample.padded_tokens
+            self.inference_seconds += sample.seconds
+        self._observe("batch_size_texts", sample.texts, COUNT_BUCKETS, "Texts per model batch")
+        self._observe("batch_real_tokens", sample.real_tokens, COUNT_BUCKETS, "Non-padding tokens per model batch")
+        self._observe("batch_padded_tokens", sample.padded_tokens, COUNT_BUCKETS, "Tokens per model batch including padding")
+        self._observe(
+            "batch_padding_ratio",
+            1.0 - sample.real_tokens / sample.padded_tokens if sample.padded_tokens else 0.0,
+            RATIO_BUCKETS, "Share of padding tokens per model batch"
+        )
+        self._observe("batch_latency_seconds", sample.seconds, LATENCY_BUCKETS, "Inference time per model batch")
+        if sample.seconds > 0:
+            self._observe("texts_per_second", sample.texts / sample.seconds, RATE_BUCKETS, "Texts embedded per second within a batch")
+
+    def drain(self) -> List[BatchSample]:
+        """Buffered batch samples since the last drain."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def record_queue_wait(self, seconds: float, priority: str) -> None:
+        """Record how long a request waited in the scheduler before its batch ran."""
+        self._observe("queue_wait_seconds", seconds, LATENCY_BUCKETS, "Scheduler queue wait per request", priority=priority)
+
+    def record_cache_lookup(self, texts: int, hits: int) -> None:
+        """Record the cache hits (memory and persistent) of one encode call."""
+        if texts <= 0:
+            return
+        with self._lock:
+            self.lookup_texts += texts
+            self.cache_hit_texts += hits
+        self._observe("cache_hit_ratio", hits / texts, RATIO_BUCKETS, "Share of texts per request served from cache")
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals and histogram summaries for status endpoints."""
+        with self._lock:
+            totals = {
+                'batches': self.batches,
+                'batched_texts': self.batched_texts,
+                'real_tokens': self.real_tokens,
+                'padded_tokens': self.padded_tokens,
+                'padding_ratio': 1.0 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0,
+                'texts_per_second': self.batched_texts / self.inference_seconds if self.inference_seconds else 0.0,
+                'cache_lookup_texts': self.lookup_texts,
+                'cache_hit_texts': self.cache_hit_texts,
+                'cache_hit_ratio': self.cache_hit_texts / self.lookup_texts if self.lookup_texts else 0.0,
+            }
+        histograms = {
+            name[len(self.PREFIX):]: [
+                series for series in all_series
+                if all(series['labels'].get(k) == v for k, v in self.labels.items())
+            ]
+            for name, all_series in self.collector.get_histogram_summary(self.PREFIX).items()
+        }
+        return {'totals': totals, 'histograms': histograms}
@@ -0,0 +1,271 @@
+"""
+Process-based embedding inference.
+Each worker process is pinned to its own subset of cores and runs the
+tokenizer and model with intra-op threads limited to that subset, so batches
+dispatched round-robin across workers scale with the core count instead of
+contending for one model and the GIL. PyTorch weights are written once to a
+state-dict file and memory-mapped by every worker, so all processes share the
+same page-cache copy; ONNX Runtime sessions load the (int8) graph per worker.
+Result matrices come back through shared memory rather than pickled arrays.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def worker_core_sets(num_workers: int,
+                     cores_per_worker: int = 0,
+                     available: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Split the cores this process may run on between workers.
+
+    Args:
+        num_workers: Number of worker processes
+        cores_per_worker: Cores per worker (0 = divide the available cores evenly)
+        available: Core ids to use (defaults to the current affinity mask)
+
+    Returns:
+        Core ids per worker; subsets wrap around when more cores are requested than exist
+    """
+    if available is None:
+        if hasattr(os, "sched_getaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+        else:
+            available = list(range(os.cpu_count() or 1))
+    available = list(available)
+    per_worker = cores_per_worker or max(1, len(available) // max(num_workers, 1))
+    per_worker = min(per_worker, len(available))
+    return [
+        sorted({available[(i * per_worker + j) % len(available)] for j in range(per_worker)})
+        for i in range(num_workers)
+    ]
+
+
+def shared_weights_path(model_name: str, directory: str) -> Path:
+    """Location of the memory-mappable state dict for a model."""
+    return Path(directory) / model_name.replace("/", "__") / "state_dict.pt"
+
+
+def save_shared_weights(model_name: str, path: Path) -> None:
+    """Write a model's state dict once, in a format torch.load can memory-map."""
+    import torch
+    from transformers import AutoModel
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Writing shared weights for {model_name} to {path}")
+    model = AutoModel.from_pretrained(model_name)
+    tmp_path = path.with_suffix(".tmp")
+    torch.save(model.state_dict(), str(tmp_path))
+    tmp_path.replace(path)
+
+
+def load_shared_weights(model_name: str, path: Path) -> Any:
+    """
+    Build a model whose parameters are memory-mapped from a shared state dict.
+
+    Pages are mapped copy-on-write and never written during inference, so every
+    process reading the same file shares one physical copy.
+    """
+    import torch
+    from transformers import AutoConfig, AutoModel
+
+    model = AutoModel.from_config(AutoConfig.from_pretrained(model_name))
+    state_dict = torch.load(str(path), mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+    return model.eval()
+
+
+def _write_shared(array: np.ndarray) -> Tuple[str, Tuple[int, ...]]:
+    """Copy a float32 matrix into a new shared-memory block owned by the reader."""
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=np.float32, buffer=block.buf)[...] = array
+        return block.name, array.shape
+    finally:
+        block.close()
+
+
+def _read_shared(name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    """Take a matrix written by _write_shared and release its block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+# Per-process state, populated by the pool initializer
+_worker_client: Optional[Any] = None
+_worker_cores: List[int] = []
+
+
+def _init_embedding_worker(config: Any, cores: List[int], weights_path: Optional[str], validate: bool) -> None:
+    """Pool initializer: pin the process and load one embedding model."""
+    global _worker_client, _worker_cores
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    _worker_cores = list(cores)
+    threads = len(cores) or os.cpu_count() or 1
+
+    import torch
+    from .embedding_config import AsyncEnhancedEmbeddingClient
+    from .embedding_telemetry import EmbeddingTelemetry
+
+    torch.set_num_threads(threads)
+    worker_config = replace(
+        config,
+        worker_processes=0,
+        use_scheduler=False,
+        use_cache=False,
+        persistent_cache_path=None,
+        validate_backend=config.validate_backend and validate,
+        onnx_intra_op_threads=config.onnx_intra_op_threads or threads
+    )
+    client = AsyncEnhancedEmbeddingClient(worker_config)
+    # Batch samples travel back with each result and are recorded by the parent
+    client.telemetry = EmbeddingTelemetry(buffer=True)
+    if weights_path is not None:
+        path = Path(weights_path)
+        if not path.exists():
+            save_shared_weights(config.model_name, path)
+        client._initialize_codebert(shared_weights_path=path)
+    else:
+        client._initialize_codebert()
+    _worker_client = client
+
+
+def _worker_info() -> Dict[str, Any]:
+    """Report that the worker is loaded, with its pinning and validation result."""
+    if _worker_client is None:
+        raise RuntimeError("Embedding worker is not initialized")
+    return {
+        'pid': os.getpid(),
+        'cores': _worker_cores,
+        'backend_validation': _worker_client.backend_validation,
+    }
+
+
+def _embed_job(texts: List[str]) -> Tuple[str, Tuple[int, ...], List[Any]]:
+    """Entry point executed inside a worker process; returns the result block and batch samples."""
+    if _worker_client is None:
+        raise RuntimeError("Embedding worker is not initialized")
+    name, shape = _write_shared(_worker_client._generate_embeddings(texts))
+    return name, shape, _worker_client.telemetry.drain()
+
+
+class EmbeddingWorkerPool:
+    """Pinned embedding processes with round-robin batch dispatch."""
+
+    def __init__(self, config: Any, start_method: str = "spawn", telemetry: Optional[Any] = None):
+        """
+        Initialize the worker pool.
+
+        Args:
+            config: EmbeddingConfig; worker_processes, worker_cores and
+                shared_weights_dir control the pool
+            start_method: Multiprocessing start method ("spawn" avoids forking the event loop)
+            telemetry: Optional EmbeddingTelemetry receiving the workers' batch samples
+        """
+        self.config = config
+        self.telemetry = telemetry
+        self.num_workers = max(1, config.worker_processes)
+        self.core_sets = worker_core_sets(self.num_workers, config.worker_cores)
+        self.start_method = start_method
+        self.backend_validation: Optional[Dict[str, Any]] = None
+        self.workers: List[Dict[str, Any]] = []
+        self._executors: List[ProcessPoolExecutor] = []
+        self._next_worker = itertools.cycle(range(self.num_workers))
+        self._dispatch_lock = threading.Lock()
+
+        # Statistics
+        self.dispatched = [0] * self.num_workers
+        self.dispatched_texts = [0] * self.num_workers
+
+    def _new_executor(self, index: int, weights_path: Optional[str]) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_embedding_worker,
+            initargs=(self.config, self.core_sets[index], weights_path, index == 0)
+        )
+
+    def start(self) -> None:
+        """
+        Start and load all workers; blocks until every model is ready.
+
+        Worker 0 loads first so it alone writes the shared weight file (or
+        ONNX export) and runs backend validation; the rest then start in parallel.
+        """
+        if self._executors:
+            return
+        from .embedding_config import EmbeddingBackendType
+
+        weights_path = None
+        if EmbeddingBackendType(self.config.backend) == EmbeddingBackendType.TORCH:
+            weights_path = str(shared_weights_path(self.config.model_name, self.config.shared_weights_dir))
+
+        try:
+            self._executors.append(self._new_executor(0, weights_path))
+            first = self._executors[0].submit(_worker_info).result()
+            self._executors.extend(self._new_executor(i, weights_path) for i in range(1, self.num_workers))
+            rest = [executor.submit(_worker_info) for executor in self._executors[1:]]
+            self.workers = [first] + [future.result() for future in rest]
+        except Exception as e:
+            self.shutdown()
+            raise RuntimeError(f"Embedding worker pool failed to start: {e}")
+
+        self.backend_validation = first.get('backend_validation')
+        logger.info(
+            f"Embedding worker pool started with {self.num_workers} processes "
+            f"({len(self.core_sets[0])} cores each)"
+        )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch on the next worker in round-robin order (blocking)."""
+        if not self._executors:
+            raise RuntimeError("Embedding worker pool is not running")
+        with self._dispatch_lock:
+            index = next(self._next_worker)
+            self.dispatched[index] += 1
+            self.dispatched_texts[index] += len(texts)
+        name, shape, samples = self._executors[index].submit(_embed_job, list(texts)).result(
+            timeout=self.config.embedding_timeout
+        )
+        if self.telemetry is not None:
+            for sample in samples:
+                self.telemetry.record_batch(sample)
+        return _read_shared(name, shape)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'workers': self.num_workers,
+            'core_sets': self.core_sets,
+            'dispatched_batches': list(self.dispatched),
+            'dispatched_texts': list(self.dispatched_texts),
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop worker processes."""
+        for executor in self._executors:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self._executors = []
+        self.workers = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._executors)
@@ -23,6 +23,10 @@ from .multi_repo_schema import (
 )
 
 
+# Per-file analysis nodes written by the ingestion pipeline; each carries repository and file_path
+FILE_SCOPED_LABELS = ('BusinessRule', 'StrutsAction', 'CORBAInterface', 'JSPComponent')
+
+
 @dataclass
 class GraphNode:
     """Represents a node in the graph database."""
@@ -170,6 +174,16 @@ class Neo4jClient:
         try:
             cypher_statements = self.schema_manager.generate_schema_cypher()
             
+            # Incremental re-indexing deletes chunks by id and analysis nodes by file
+            cypher_statements.append(
+                "CREATE INDEX codechunk_id_index IF NOT EXISTS FOR (c:CodeChunk) ON (c.id)"
+            )
+            for label in FILE_SCOPED_LABELS:
+                cypher_statements.append(
+                    f"CREATE INDEX {label.lower()}_repo_file_index IF NOT EXISTS "
+                    f"FOR (n:{label}) ON (n.repository, n.file_path)"
+                )
+            
             for statement in cypher_statements:
                 query = GraphQuery(cypher=statement, read_only=False)
                 await self.execute_query(query)
@@ -360,7 +374,84 @@ class Neo4jClient:
         )
         
         await self.execute_query(query)
-    
+
+    async def delete_file_nodes(self, repository_name: str, file_paths: List[str], chunk_ids: List[str]) -> bool:
+        """Delete code chunk nodes and per-file analysis nodes for files that changed or were removed."""
+        try:
+            if chunk_ids:
+                for i in range(0, len(chunk_ids), self.batch_size):
+                    query = GraphQuery(
+                        cypher="""
+                        UNWIND $ids as chunk_id
+                        MATCH (c:CodeChunk {id: chunk_id})
+                        DETACH DELETE c
+                        """,
+                        parameters={'ids': chunk_ids[i:i + self.batch_size]},
+                        read_only=False
+                    )
+                    await self.execute_query(query)
+
+            if file_paths:
+                # One labelled lookup per label so each batch is served by the (repository, file_path) index
+                for label in FILE_SCOPED_LABELS:
+                    for i in range(0, len(file_paths), self.batch_size):
+                        query = GraphQuery(
+                            cypher=f"""
+                            UNWIND $file_paths as file_path
+                            MATCH (n:{label} {{repository: $repository, file_path: file_path}})
+                            DETACH DELETE n
+                            """,
+                            parameters={'repository': repository_name, 'file_paths': file_paths[i:i + self.batch_size]},
+                            read_only=False
+                        )
+                        await self.execute_query(query)
+
+            self.logger.debug(f"Deleted graph nodes for {len(file_paths)} files in {repository_name}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to delete graph nodes for {repository_name}: {e}")
+            return False
+
+    async def create_business_rules(self, rules: List[Dict[str, Any]]) -> bool:
+        """Bulk-create BusinessRule nodes (each record needs 'id' and 'repository')."""
+        return await self._merge_repository_nodes('BusinessRule', rules)
+
+    async def create_struts_actions(self, actions: List[Dict[str, Any]]) -> bool:
+        """Bulk-create StrutsAction nodes (each record needs 'id' and 'repository')."""
+        return await self._merge_repository_nodes('StrutsAction', actions)
+
+    async def create_corba_interfaces(self, interfaces: List[Dict[str, Any]]) -> bool:
+        """Bulk-create CORBAInterface nodes (each record needs 'id' and 'repository')."""
+        return await self._merge_repository_nodes('CORBAInterface', interfaces)
+
+    async def create_jsp_components(self, components: List[Dict[str, Any]]) -> bool:
+        """Bulk-create JSPComponent nodes (each record needs 'id' and 'repository')."""
+        return await self._merge_repository_nodes('JSPComponent', components)
+
+    async def _merge_repository_nodes(self, label: str, records: List[Dict[str, Any]]) -> bool:
+        """MERGE nodes by id with UNWIND, one transaction per batch, linked to their repository."""
+        try:
+            for i in range(0, len(records), self.batch_size):
+                query = GraphQuery(
+                    cypher=f"""
+                    UNWIND $records as record
+                    MERGE (repo:Repository {{name: record.repository}})
+                    MERGE (n:{label} {{id: record.id}})
+                    SET n += record
+                    SET n.updated_at = datetime()
+                    MERGE (repo)-[:CONTAINS]->(n)
+                    """,
+                    parameters={'records': records[i:i + self.batch_size]},
+                    read_only=False
+                )
+                await self.execute_query(query)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to create {label} nodes: {e}")
+            return False
+
     async def create_maven_dependencies(self, pom: PomFile, resolved_deps: List[ResolvedDependency]) -> bool:
         """Create Maven dependency nodes and relationships."""
         try:
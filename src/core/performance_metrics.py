@@ -19,14 +19,15 @@ Last Updated: 2025-08-03
 """
 
 import asyncio
+import bisect
 import psutil
 import time
 import threading
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, Any, List, Optional, Callable, Union
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple, Union
 import logging
 import weakref
 
@@ -101,6 +102,119 @@ class OperationMetrics:
         return sum(self.recent_times) / len(self.recent_times)
 
 
+@dataclass
+class StageMetrics:
+    """Accumulated resource usage of one ingestion stage within a single run."""
+    stage: str
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    bytes_read: int = 0
+    items: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    queue_samples: int = 0
+    queue_depth_total: int = 0
+    
+    @property
+    def average_queue_depth(self) -> float:
+        """Average depth of the stage's input queue over all samples."""
+        return self.queue_depth_total / max(self.queue_samples, 1)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize with derived throughput figures."""
+        return {
+            "stage": self.stage,
+            "calls": self.calls,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "cpu_utilization": self.cpu_time / self.wall_time if self.wall_time > 0 else 0.0,
+            "bytes_read": self.bytes_read,
+            "items": self.items,
+            "items_per_second": self.items / self.wall_time if self.wall_time > 0 else 0.0,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "average_queue_depth": self.average_queue_depth
+        }
+
+
+# Default histogram bucket upper bounds
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS: Tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+RATIO_BUCKETS: Tuple[float, ...] = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+RATE_BUCKETS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass
+class HistogramMetrics:
+    """Cumulative bucketed distribution of one metric (Prometheus histogram semantics)."""
+    name: str
+    buckets: Tuple[float, ...]
+    labels: Dict[str, str] = field(default_factory=dict)
+    description: str = ""
+    bucket_counts: List[int] = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+    min: float = float('inf')
+    max: float = float('-inf')
+    
+    def __post_init__(self):
+        if not self.bucket_counts:
+            # One slot per upper bound plus +Inf
+            self.bucket_counts = [0] * (len(self.buckets) + 1)
+    
+    def observe(self, value: float):
+        """Add one observation."""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else min(self.min, self.buckets[0])
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize with summary statistics."""
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(list(self.buckets) + [float('inf')], self.bucket_counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float('inf') else str(bound)] = cumulative
+        return {
+            "name": self.name,
+            "labels": self.labels,
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets
+        }
+
+
+@dataclass
+class StageSample:
+    """Counters filled in by the caller inside PerformanceCollector.time_stage."""
+    items: int = 0
+    bytes_read: int = 0
+
+
 class PerformanceCollector:
     """
     High-performance metrics collector with minimal overhead.
@@ -109,22 +223,31 @@ class PerformanceCollector:
     comprehensive performance monitoring.
     """
     
-    def __init__(self, collection_interval: float = 1.0, max_metrics_history: int = 1000):
+    def __init__(self, collection_interval: float = 1.0, max_metrics_history: int = 1000,
+                 max_stage_runs: int = 100):
         """
         Initialize performance collector.
         
         Args:
             collection_interval: Interval between system metrics collection (seconds)
             max_metrics_history: Maximum number of metric values to retain
+            max_stage_runs: Number of most recent runs whose per-stage metrics are retained
         """
         self.collection_interval = collection_interval
         self.max_metrics_history = max_metrics_history
+        self.max_stage_runs = max_stage_runs
         
         # Metrics storage
         self.metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_metrics_history))
         self.operation_metrics: Dict[str, OperationMetrics] = {}
         self.thresholds: Dict[str, PerformanceThreshold] = {}
         
+        # Bucketed distributions, keyed by name and sorted label pairs
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], HistogramMetrics] = {}
+        
+        # Per-run ingestion stage metrics (run_id -> stage -> metrics), oldest first
+        self.stage_metrics: "OrderedDict[str, Dict[str, StageMetrics]]" = OrderedDict()
+        
         # System monitoring
         self.system_metrics_enabled = True
         self.system_metrics_task: Optional[asyncio.Task] = None
@@ -297,6 +420,146 @@ class PerformanceCollector:
         """
         self.record_metric(name, value, MetricType.GAUGE, labels)
     
+    def observe_histogram(self, name: str, value: Union[float, int],
+                          buckets: Sequence[float] = LATENCY_BUCKETS,
+                          labels: Optional[Dict[str, str]] = None,
+                          description: str = ""):
+        """
+        Add an observation to a histogram metric.
+        
+        Args:
+            name: Histogram name
+            value: Observed value
+            buckets: Bucket upper bounds; fixed by the first observation
+            labels: Optional labels; each label set is its own series
+            description: Help text used in exports
+        """
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = HistogramMetrics(
+                    name=name,
+                    buckets=tuple(sorted(buckets)),
+                    labels=dict(labels or {}),
+                    description=description
+                )
+            histogram.observe(value)
+    
+    def get_histogram_summary(self, prefix: str = "") -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Summaries of all histograms whose name starts with prefix.
+        
+        Returns:
+            Histogram name -> one summary per label set
+        """
+        summary: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        with self._lock:
+            for (name, _), histogram in sorted(self.histograms.items()):
+                if name.startswith(prefix):
+                    summary[name].append(histogram.to_dict())
+        return dict(summary)
+    
+    def _get_stage(self, run_id: str, stage: str) -> StageMetrics:
+        """Return the metrics entry for a run's stage; caller holds the lock."""
+        stages = self.stage_metrics.get(run_id)
+        if stages is None:
+            stages = self.stage_metrics[run_id] = {}
+            while len(self.stage_metrics) > self.max_stage_runs:
+                self.stage_metrics.popitem(last=False)
+        if stage not in stages:
+            stages[stage] = StageMetrics(stage=stage)
+        return stages[stage]
+    
+    def record_stage(self, run_id: Optional[str], stage: str, wall_time: float = 0.0,
+                     cpu_time: float = 0.0, bytes_read: int = 0, items: int = 0):
+        """
+        Accumulate one execution of an ingestion stage for a run.
+        
+        Args:
+            run_id: Run correlation ID; nothing is recorded when None
+            stage: Stage name (discovery, read, parse, chunk, ...)
+            wall_time: Elapsed wall-clock seconds
+            cpu_time: CPU seconds spent by the stage
+            bytes_read: Bytes read from disk
+            items: Items processed (files, chunks or records)
+        """
+        if run_id is None:
+            return
+        with self._lock:
+            metrics = self._get_stage(run_id, stage)
+            metrics.calls += 1
+            metrics.wall_time += wall_time
+            metrics.cpu_time += cpu_time
+            metrics.bytes_read += bytes_read
+            metrics.items += items
+        
+        self.record_timing(f"stage_{stage}", wall_time)
+    
+    def record_queue_depth(self, run_id: Optional[str], stage: str, depth: int):
+        """
+        Sample the depth of a stage's input queue for a run.
+        
+        Args:
+            run_id: Run correlation ID; nothing is recorded when None
+            stage: Stage consuming the queue
+            depth: Items waiting in the queue
+        """
+        if run_id is None:
+            return
+        with self._lock:
+            metrics = self._get_stage(run_id, stage)
+            metrics.queue_depth = depth
+            metrics.max_queue_depth = max(metrics.max_queue_depth, depth)
+            metrics.queue_samples += 1
+            metrics.queue_depth_total += depth
+    
+    @contextmanager
+    def time_stage(self, run_id: Optional[str], stage: str,
+                   cpu_clock: Callable[[], float] = time.thread_time):
+        """
+        Context manager recording wall and CPU time of an ingestion stage.
+        
+        Yields a StageSample whose items/bytes_read the caller fills in. The
+        default CPU clock is per-thread, which is exact for work done
+        synchronously on the calling thread; pass time.process_time for stages
+        that hand work to other threads (the figure then includes concurrent work).
+        
+        Args:
+            run_id: Run correlation ID; nothing is recorded when None
+            stage: Stage name
+            cpu_clock: Clock used to measure CPU time
+        """
+        sample = StageSample()
+        start_wall = time.perf_counter()
+        start_cpu = cpu_clock()
+        try:
+            yield sample
+        finally:
+            self.record_stage(
+                run_id, stage,
+                wall_time=time.perf_counter() - start_wall,
+                cpu_time=cpu_clock() - start_cpu,
+                bytes_read=sample.bytes_read,
+                items=sample.items
+            )
+    
+    def get_stage_metrics(self, run_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Get the per-stage breakdown of a run.
+        
+        Args:
+            run_id: Run correlation ID
+            
+        Returns:
+            Stage name -> stage metrics, or None if the run is unknown
+        """
+        with self._lock:
+            stages = self.stage_metrics.get(run_id)
+            if stages is None:
+                return None
+            return {name: metrics.to_dict() for name, metrics in stages.items()}
+    
     def add_threshold(self, threshold: PerformanceThreshold):
         """
         Add a performance threshold for monitoring.
@@ -550,6 +813,7 @@ class PerformanceCollector:
                               for name, values in self.metrics.items()},
                     "operations": {name: op.__dict__ for name, op in self.operation_metrics.items()},
                     "thresholds": {name: th.__dict__ for name, th in self.thresholds.items()},
+                    "histograms": self.get_histogram_summary(),
                     "export_timestamp": time.time()
                 }
             elif format == "json":
@@ -594,6 +858,24 @@ class PerformanceCollector:
             lines.append(f"# TYPE operation_success_rate_{safe_name} gauge")
             lines.append(f"operation_success_rate_{safe_name} {op_metrics.success_rate}")
         
+        # Export histograms (cumulative buckets, sum and count per label set)
+        described = set()
+        for (name, _), histogram in sorted(self.histograms.items()):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {histogram.description or name}")
+                lines.append(f"# TYPE {name} histogram")
+            label_pairs = [f'{k}="{v}"' for k, v in histogram.labels.items()]
+            cumulative = 0
+            for bound, bucket_count in zip(list(histogram.buckets) + [float('inf')], histogram.bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float('inf') else repr(float(bound))
+                bucket_labels = ",".join(label_pairs + [f'le="{le}"'])
+                lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+            labels_str = "{" + ",".join(label_pairs) + "}" if label_pairs else ""
+            lines.append(f"{name}_sum{labels_str} {histogram.sum}")
+            lines.append(f"{name}_count{labels_str} {histogram.count}")
+        
         return "\n".join(lines)
     
     def reset_metrics(self, metric_names: Optional[List[str]] = None):
@@ -608,6 +890,8 @@ class PerformanceCollector:
                 self.metrics.clear()
                 self.operation_metrics.clear()
                 self.collection_overhead.clear()
+                self.stage_metrics.clear()
+                self.histograms.clear()
                 self.logger.info("All metrics reset")
             else:
                 for name in metric_names:
@@ -615,6 +899,8 @@ class PerformanceCollector:
                         del self.metrics[name]
                     if name in self.operation_metrics:
                         del self.operation_metrics[name]
+                    for key in [key for key in self.histograms if key[0] == name]:
+                        del self.histograms[key]
                 self.logger.info(f"Reset metrics: {metric_names}")
 
 
@@ -0,0 +1,195 @@
+"""
+Semantic search result cache.
+Results are kept in an in-process LRU and, when a Redis client is available,
+shared through Redis. Every key embeds the version of the collection it was
+computed from; a write to a collection bumps its version, so results cached
+before the write are never served again and simply age out. Bumps made while
+Redis is unreachable are replayed there before Redis is used again.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class QueryResultCache:
+    """Version-keyed LRU of serialized search results with an optional Redis tier."""
+
+    KEY_PREFIX = "semantic_query"
+    REDIS_RETRY_SECONDS = 30.0  # Redis is skipped this long after an error
+
+    def __init__(self,
+                 max_entries: int = 1000,
+                 ttl_seconds: float = 300.0,
+                 redis_provider: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: In-process entries kept (least recently used are evicted)
+            ttl_seconds: Lifetime of an entry, in process and in Redis
+            redis_provider: Returns the current RedisClient or None; Redis
+                errors degrade to the in-process cache
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.redis_provider = redis_provider
+        self._entries: "OrderedDict[str, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._pending_bumps: Dict[str, int] = {}  # bumps Redis has not seen yet
+        self.generation = 0  # bumped by clear() so Redis entries of this process are dropped too
+        self._redis_retry_at = 0.0
+
+        # Statistics
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _redis(self) -> Optional[Any]:
+        if self.redis_provider is None or time.time() < self._redis_retry_at:
+            return None
+        return self.redis_provider()
+
+    async def _synced_redis(self) -> Optional[Any]:
+        """Redis client once it has seen every bump made without it, else None."""
+        redis = self._redis()
+        if redis is None or not self._pending_bumps:
+            return redis
+        pending, self._pending_bumps = self._pending_bumps, {}
+        try:
+            pipeline = redis.client.pipeline(transaction=False)
+            for collection, count in pending.items():
+                pipeline.incrby(self._version_key(collection), count)
+            await pipeline.execute()
+        except Exception as e:
+            # A partly applied replay only invalidates some collections twice
+            for collection, count in pending.items():
+                self._pending_bumps[collection] = self._pending_bumps.get(collection, 0) + count
+            self._redis_failed("version bump replay", e)
+            return None
+        logger.info(f"Replayed query cache invalidations of {len(pending)} collections to Redis")
+        return redis
+
+    def _redis_failed(self, action: str, error: Exception) -> None:
+        if time.time() >= self._redis_retry_at:
+            # Local versions did not see other processes' writes while Redis was up
+            self._entries.clear()
+        self._redis_retry_at = time.time() + self.REDIS_RETRY_SECONDS
+        logger.debug(f"Query cache {action} failed in Redis, using the in-process cache only: {error}")
+
+    def _version_key(self, collection: str) -> str:
+        return f"{self.KEY_PREFIX}:version:{collection}"
+
+    async def versions(self, collections: Iterable[str]) -> Dict[str, str]:
+        """
+        Current version of each collection.
+
+        Versions come from Redis when it is reachable (so all API processes
+        agree) and from this process otherwise; the source is part of the
+        version so the two never collide.
+        """
+        collections = list(dict.fromkeys(collections))
+        redis = await self._synced_redis()
+        if redis is not None and collections:
+            try:
+                values = await redis.client.mget([self._version_key(c) for c in collections])
+                return {c: f"r{int(v or 0)}" for c, v in zip(collections, values)}
+            except Exception as e:
+                self._redis_failed("version lookup", e)
+        return {c: f"l{self._versions.get(c, 0)}" for c in collections}
+
+    async def bump(self, collection: str) -> None:
+        """Invalidate every cached result of a collection."""
+        self._versions[collection] = self._versions.get(collection, 0) + 1
+        self.invalidations += 1
+        if self.redis_provider is None:
+            return
+        redis = await self._synced_redis()
+        if redis is not None:
+            try:
+                await redis.client.incr(self._version_key(collection))
+                return
+            except Exception as e:
+                self._redis_failed(f"version bump of {collection}", e)
+        self._pending_bumps[collection] = self._pending_bumps.get(collection, 0) + 1
+
+    def key(self, collection: str, version: str, *parts: Any) -> str:
+        """Cache key of a query against one collection version."""
+        digest = hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+        return f"{self.KEY_PREFIX}:{collection}:{version}:{self.generation}:{digest}"
+
+    async def get_many(self, keys: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+        """Cached results per key (None for misses); Redis hits are copied into the LRU."""
+        now = time.time()
+        found: List[Optional[List[Dict[str, Any]]]] = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                found.append(entry[0])
+            else:
+                self._entries.pop(key, None)
+                found.append(None)
+
+        missing = [i for i, value in enumerate(found) if value is None]
+        redis = await self._synced_redis()
+        if redis is not None and missing:
+            try:
+                values = await redis.client.mget([keys[i] for i in missing])
+                for i, value in zip(missing, values):
+                    if value:
+                        found[i] = orjson.loads(value)
+                        self._store(keys[i], found[i], now)
+                        self.redis_hits += 1
+            except Exception as e:
+                self._redis_failed("lookup", e)
+
+        served = sum(value is not None for value in found)
+        self.hits += served
+        self.misses += len(keys) - served
+        return found
+
+    def _store(self, key: str, results: List[Dict[str, Any]], now: float) -> None:
+        self._entries[key] = (results, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def set_many(self, items: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+        now = time.time()
+        for key, results in items:
+            self._store(key, results, now)
+        redis = await self._synced_redis()
+        if redis is not None and items:
+            try:
+                pipeline = redis.client.pipeline(transaction=False)
+                for key, results in items:
+                    pipeline.set(key, orjson.dumps(results).decode(), ex=max(1, int(self.ttl_seconds)))
+                await pipeline.execute()
+            except Exception as e:
+                self._redis_failed("write", e)
+
+    def clear(self) -> None:
+        """Drop the in-process entries and stop reading this process's Redis entries."""
+        self._entries.clear()
+        self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'pending_redis_invalidations': sum(self._pending_bumps.values()),
+            'redis_enabled': self._redis() is not None,
+        }
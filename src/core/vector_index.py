@@ -0,0 +1,608 @@
+"""
+Local approximate nearest neighbour index over Chroma collections.
+An in-process, read-mostly copy of a collection: float32 vectors in a
+memory-mapped matrix on disk, an HNSW graph over them (hnswlib, which
+chromadb already installs) and per-field metadata codes from which query
+filters are evaluated as row bitsets. Queries the index can answer skip the
+HTTP hop to Chroma; queries it cannot (filters on other fields, a collection
+still building) fall back to Chroma. Local searches run on worker threads, so
+one waiting behind a bulk insert never stalls the event loop. Writes made
+through ChromaDBClient are applied as they happen, so this suits indexing
+that runs in the API process.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Optional dependency: without it every query is an exact scan of the matrix
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    hnswlib = None
+    HNSWLIB_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields that can be pre-filtered locally
+FILTER_FIELDS = ('repository', 'language', 'business_domain', 'chunk_type', 'file_path')
+
+_RECORDS_FILE = "records.json"
+_VECTORS_FILE = "vectors.f32"
+_GRAPH_FILE = "hnsw.bin"
+
+
+def where_conditions(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Field equalities of a Chroma where clause built by build_where.
+
+    Returns:
+        {field: value}, or None when the clause uses anything the local
+        index cannot evaluate
+    """
+    if not where:
+        return {}
+    clauses = where["$and"] if set(where) == {"$and"} else [where]
+    conditions = {}
+    for clause in clauses:
+        if not isinstance(clause, dict) or len(clause) != 1:
+            return None
+        (field, condition), = clause.items()
+        if field not in FILTER_FIELDS or not isinstance(condition, dict) or set(condition) != {"$eq"}:
+            return None
+        conditions[field] = condition["$eq"]
+    return conditions
+
+
+class LocalVectorIndex:
+    """Vectors, documents and filterable metadata of one physical collection; thread-safe."""
+
+    def __init__(self,
+                 path: Path,
+                 dim: int,
+                 space: str = "l2",
+                 ef_search: int = 64,
+                 exact_threshold: int = 2048,
+                 m: int = 16,
+                 ef_construction: int = 200):
+        """
+        Create an empty index in path.
+
+        Args:
+            path: Directory for the matrix, records and graph
+            dim: Embedding dimension
+            space: Distance of the Chroma collection (hnsw:space): l2, ip or cosine
+            ef_search: HNSW search breadth (recall versus latency)
+            exact_threshold: Filtered row counts at or below this are scanned exactly
+            m: HNSW graph degree
+            ef_construction: HNSW build breadth
+        """
+        self.path = Path(path)
+        self.dim = dim
+        self.space = space
+        self.ef_search = ef_search
+        self.exact_threshold = exact_threshold
+        self.m = m
+        self.ef_construction = ef_construction
+        self._lock = threading.RLock()
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        self.live = np.zeros(0, dtype=bool)
+        self.codes: Dict[str, np.ndarray] = {field: np.zeros(0, dtype=np.int32) for field in FILTER_FIELDS}
+        self._values: Dict[str, Dict[Any, int]] = {field: {} for field in FILTER_FIELDS}
+        self.graph = None
+        self.updated_at = time.time()
+
+    @property
+    def count(self) -> int:
+        """Rows in use, deleted ones included."""
+        return len(self.ids)
+
+    @property
+    def live_count(self) -> int:
+        with self._lock:
+            return int(self.live[:self.count].sum())
+
+    def _new_graph(self, capacity: int):
+        if not HNSWLIB_AVAILABLE:
+            return None
+        graph = hnswlib.Index(space=self.space, dim=self.dim)
+        graph.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.m)
+        graph.set_ef(self.ef_search)
+        return graph
+
+    def _ensure_capacity(self, needed: int) -> None:
+        """Grow the matrix file in place (no copy) and every per-row array with it."""
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.path / _VECTORS_FILE, 'ab') as f:
+            f.truncate(capacity * self.dim * 4)
+        self.vectors = np.memmap(self.path / _VECTORS_FILE, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        self.live = np.concatenate([self.live, np.zeros(capacity - self.capacity, dtype=bool)])
+        for field in FILTER_FIELDS:
+            self.codes[field] = np.concatenate([self.codes[field], np.full(capacity - self.capacity, -1, dtype=np.int32)])
+        if self.graph is None:
+            self.graph = self._new_graph(capacity)
+        else:
+            self.graph.resize_index(capacity)
+        self.capacity = capacity
+
+    def _code(self, field: str, value: Any) -> int:
+        values = self._values[field]
+        if value not in values:
+            values[value] = len(values)
+        return values[value]
+
+    def add(self, ids: Sequence[str], embeddings: np.ndarray, documents: Sequence[str],
+            metadatas: Sequence[Dict[str, Any]]) -> None:
+        """Insert or overwrite records by id."""
+        if not ids:
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dim)
+        with self._lock:
+            new_ids = [record_id for record_id in dict.fromkeys(ids) if record_id not in self._row_by_id]
+            self._ensure_capacity(self.count + len(new_ids))
+            rows = []
+            for i, record_id in enumerate(ids):
+                row = self._row_by_id.get(record_id)
+                metadata = dict(metadatas[i] or {}) if i < len(metadatas) else {}
+                document = documents[i] if i < len(documents) and documents[i] is not None else ""
+                if row is None:
+                    row = self.count
+                    self._row_by_id[record_id] = row
+                    self.ids.append(record_id)
+                    self.documents.append(document)
+                    self.metadatas.append(metadata)
+                else:
+                    self.documents[row] = document
+                    self.metadatas[row] = metadata
+                for field in FILTER_FIELDS:
+                    value = metadata.get(field)
+                    self.codes[field][row] = -1 if value is None else self._code(field, value)
+                rows.append(row)
+            rows_array = np.asarray(rows, dtype=np.int64)
+            self.vectors[rows_array] = embeddings
+            self.live[rows_array] = True
+            if self.graph is not None:
+                # Existing labels are updated (and undeleted) in place
+                self.graph.add_items(embeddings, rows_array)
+            self.updated_at = time.time()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for record_id in ids:
+                row = self._row_by_id.get(record_id)
+                if row is None or not self.live[row]:
+                    continue
+                self.live[row] = False
+                if self.graph is not None:
+                    self.graph.mark_deleted(row)
+            self.updated_at = time.time()
+
+    def live_ids(self) -> List[str]:
+        with self._lock:
+            return [self.ids[row] for row in np.flatnonzero(self.live[:self.count])]
+
+    def vector(self, record_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._row_by_id.get(record_id)
+            return None if row is None or not self.live[row] else np.array(self.vectors[row])
+
+    def _filter_mask(self, conditions: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Live rows matching every condition; None when a value never occurs."""
+        mask = self.live[:self.count].copy()
+        for field, value in conditions.items():
+            code = self._values[field].get(value)
+            if code is None:
+                return None
+            mask &= self.codes[field][:self.count] == code
+        return mask
+
+    def _distances(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Distances in the collection's space, as Chroma reports them."""
+        vectors = self.vectors[rows]
+        if self.space == "ip":
+            return 1.0 - vectors @ query
+        if self.space == "cosine":
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+            return 1.0 - (vectors @ query) / np.maximum(norms, 1e-12)
+        # hnswlib and Chroma report squared L2
+        return np.einsum('ij,ij->i', vectors - query, vectors - query)
+
+    def search(self, query: np.ndarray, k: int, conditions: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Nearest live rows matching conditions.
+
+        Unfiltered queries and broad filters search the HNSW graph, over-fetching
+        in proportion to the filter's selectivity and dropping rows outside the
+        filter bitset afterwards (no Python callback per visited node). Small or
+        selective filters, and searches that come up short, scan the filtered
+        rows exactly.
+
+        Returns:
+            (row, distance) pairs, nearest first
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            mask = self._filter_mask(conditions or {})
+            if mask is None:
+                return []
+            allowed = int(mask.sum())
+            k = min(k, allowed)
+            if k <= 0:
+                return []
+            if self.graph is not None and allowed > self.exact_threshold:
+                live = int(self.live[:self.count].sum())
+                fetch = k if allowed == live else min(live, 2 * -(-k * live // allowed))
+                # Over-fetching further than a scan of the filtered rows is not worth it
+                if fetch == k or fetch <= allowed:
+                    try:
+                        labels, distances = self.graph.knn_query(query, k=fetch)
+                        keep = mask[labels[0]]
+                        hits = [(int(row), float(d)) for row, d in zip(labels[0][keep], distances[0][keep])]
+                        if len(hits) >= k:
+                            return hits[:k]
+                    except RuntimeError:
+                        # Fewer reachable rows than requested
+                        pass
+            rows = np.flatnonzero(mask)
+            distances = self._distances(query, rows)
+            nearest = np.argpartition(distances, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+            nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+            return [(int(rows[i]), float(distances[i])) for i in nearest]
+
+    def query(self, embeddings: Sequence[np.ndarray], k: int, conditions: Dict[str, Any],
+              include_metadata: bool = True) -> Dict[str, Any]:
+        """Search several embeddings; the result has the shape of a Chroma query response."""
+        response: Dict[str, Any] = {"ids": [], "documents": [], "distances": [], "metadatas": []}
+        for embedding in embeddings:
+            hits = self.search(embedding, k, conditions)
+            with self._lock:
+                response["ids"].append([self.ids[row] for row, _ in hits])
+                response["documents"].append([self.documents[row] for row, _ in hits])
+                response["metadatas"].append([dict(self.metadatas[row]) for row, _ in hits] if include_metadata else [])
+            response["distances"].append([distance for _, distance in hits])
+        return response
+
+    def save(self) -> None:
+        """Persist records and graph; the matrix is already on disk."""
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            if self.vectors is not None:
+                self.vectors.flush()
+            if self.graph is not None:
+                self.graph.save_index(str(self.path / _GRAPH_FILE))
+            data = {
+                'dim': self.dim,
+                'space': self.space,
+                'capacity': self.capacity,
+                'ids': self.ids,
+                'documents': self.documents,
+                'metadatas': self.metadatas,
+                'deleted': [int(row) for row in np.flatnonzero(~self.live[:self.count])],
+                'saved_at': time.time(),
+            }
+            tmp_path = self.path / (_RECORDS_FILE + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path / _RECORDS_FILE)
+
+    @classmethod
+    def load(cls, path: Path, **options: Any) -> 'LocalVectorIndex':
+        """Open a saved index; the matrix is mapped, not read."""
+        path = Path(path)
+        with open(path / _RECORDS_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(path, data['dim'], data['space'], **options)
+        index.capacity = data['capacity']
+        index.vectors = np.memmap(path / _VECTORS_FILE, dtype=np.float32, mode='r+', shape=(index.capacity, index.dim))
+        index.ids = data['ids']
+        index.documents = data['documents']
+        index.metadatas = data['metadatas']
+        index._row_by_id = {record_id: row for row, record_id in enumerate(index.ids)}
+        index.live = np.zeros(index.capacity, dtype=bool)
+        index.live[:index.count] = True
+        index.live[data['deleted']] = False
+        for field in FILTER_FIELDS:
+            index.codes[field] = np.full(index.capacity, -1, dtype=np.int32)
+        for row, metadata in enumerate(index.metadatas):
+            for field in FILTER_FIELDS:
+                value = metadata.get(field)
+                if value is not None:
+                    index.codes[field][row] = index._code(field, value)
+        if HNSWLIB_AVAILABLE:
+            graph_path = path / _GRAPH_FILE
+            if graph_path.exists():
+                index.graph = hnswlib.Index(space=index.space, dim=index.dim)
+                index.graph.load_index(str(graph_path), max_elements=index.capacity)
+                index.graph.set_ef(index.ef_search)
+            else:
+                # Saved without hnswlib: rebuild the graph from the matrix
+                index.graph = index._new_graph(index.capacity)
+                if index.count:
+                    index.graph.add_items(np.asarray(index.vectors[:index.count]), np.arange(index.count))
+                    for row in data['deleted']:
+                        index.graph.mark_deleted(row)
+        index.updated_at = data.get('saved_at', time.time())
+        return index
+
+    def close(self) -> None:
+        with self._lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+            self.vectors = None
+            self.graph = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'records': self.count,
+                'live_records': int(self.live[:self.count].sum()),
+                'dim': self.dim,
+                'space': self.space,
+                'capacity': self.capacity,
+                'hnsw': self.graph is not None,
+                'updated_at': self.updated_at,
+            }
+
+
+class LocalIndexManager:
+    """Local indexes per physical Chroma collection: built from Chroma on demand, kept current by writes."""
+
+    def __init__(self,
+                 chroma_client: Any,
+                 root: str,
+                 ef_search: int = 64,
+                 exact_threshold: int = 2048,
+                 page_size: int = 1000):
+        """
+        Initialize the manager.
+
+        Args:
+            chroma_client: ChromaDBClient the indexes mirror
+            root: Directory holding one subdirectory per indexed collection
+            ef_search: HNSW search breadth
+            exact_threshold: Filtered row counts at or below this are scanned exactly
+            page_size: Records read from Chroma per request while building
+        """
+        self.chroma_client = chroma_client
+        self.root = Path(root)
+        self.options = {'ef_search': ef_search, 'exact_threshold': exact_threshold}
+        self.page_size = page_size
+        self.indexes: Dict[str, LocalVectorIndex] = {}
+        # Writes that arrive while a collection is being built, replayed before it goes live
+        self._building: Dict[str, List[Tuple[str, tuple]]] = {}
+        self._build_tasks: Dict[str, asyncio.Task] = {}
+        self._build_slots = asyncio.Semaphore(1)
+
+        # Query statistics
+        self.local_queries = 0
+        self.fallback_queries = 0
+
+    def _directory(self, collection: str) -> Path:
+        safe = re.sub(r"[^a-zA-Z0-9._-]", "_", collection)
+        return self.root / f"{safe}-{int(time.time() * 1000)}"
+
+    async def load(self) -> List[str]:
+        """Open saved indexes (latest build per collection) and drop superseded builds."""
+        if not self.root.exists():
+            return []
+        latest: Dict[str, Path] = {}
+        for path in sorted(self.root.iterdir()):
+            if not (path / _RECORDS_FILE).exists():
+                shutil.rmtree(path, ignore_errors=True)  # interrupted build
+                continue
+            collection = path.name.rsplit('-', 1)[0]
+            if collection in latest:
+                shutil.rmtree(latest[collection], ignore_errors=True)
+            latest[collection] = path
+        for collection, path in latest.items():
+            try:
+                self.indexes[collection] = await asyncio.to_thread(LocalVectorIndex.load, path, **self.options)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable local index {path}: {e}")
+                shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Loaded {len(self.indexes)} local vector indexes from {self.root}")
+        return list(self.indexes)
+
+    async def start(self) -> None:
+        """Load saved indexes and rebuild any that no longer match Chroma."""
+        for collection in await self.load():
+            report = await self.verify(collection, sample=0)
+            if not report['consistent']:
+                logger.info(f"Local index of {collection} is stale ({report}); rebuilding")
+                self.ensure_build(collection, force=True)
+
+    def ensure_build(self, collection: str, force: bool = False) -> Optional[asyncio.Task]:
+        """Start a background build of collection unless one is running (or, without force, it exists)."""
+        if collection in self._build_tasks and not self._build_tasks[collection].done():
+            return self._build_tasks[collection]
+        if collection in self.indexes and not force:
+            return None
+        task = asyncio.create_task(self.build(collection))
+        self._build_tasks[collection] = task
+        return task
+
+    async def build(self, collection: str) -> Optional[LocalVectorIndex]:
+        """Copy a collection from Chroma into a new local index and swap it in."""
+        async with self._build_slots:
+            self._building[collection] = []
+            path = self._directory(collection)
+            try:
+                info = await self.chroma_client.get_collection(collection)
+                if not info:
+                    return None
+                space = (info.get('metadata') or {}).get('hnsw:space', 'l2')
+                index: Optional[LocalVectorIndex] = None
+                offset = 0
+                start = time.perf_counter()
+                while True:
+                    page = await self.chroma_client.get_records(
+                        collection, limit=self.page_size, offset=offset,
+                        include=["documents", "metadatas", "embeddings"]
+                    )
+                    ids = page.get('ids') or []
+                    if not ids:
+                        break
+                    embeddings = np.asarray(page['embeddings'], dtype=np.float32)
+                    if index is None:
+                        index = LocalVectorIndex(path, embeddings.shape[1], space, **self.options)
+                    await asyncio.to_thread(
+                        index.add, ids, embeddings,
+                        page.get('documents') or [], page.get('metadatas') or []
+                    )
+                    offset += len(ids)
+                if index is None:
+                    return None
+
+                # Replay writes made during the build; nothing awaits between the last one and the swap
+                while self._building[collection]:
+                    operations, self._building[collection] = self._building[collection], []
+                    for operation, args in operations:
+                        await asyncio.to_thread(getattr(index, operation), *args)
+                previous = self.indexes.get(collection)
+                self.indexes[collection] = index
+                self._building.pop(collection, None)
+                if previous is not None:
+                    previous.close()
+                    shutil.rmtree(previous.path, ignore_errors=True)
+                await asyncio.to_thread(index.save)
+                logger.info(f"Built local index of {collection}: {index.count} records in {time.perf_counter() - start:.1f}s")
+                return index
+            except Exception as e:
+                logger.error(f"Local index build of {collection} failed: {e}")
+                shutil.rmtree(path, ignore_errors=True)
+                return None
+            finally:
+                self._building.pop(collection, None)
+
+    async def add(self, collection: str, ids: Sequence[str], documents: Sequence[str],
+                  metadatas: Sequence[Dict[str, Any]], embeddings: np.ndarray) -> None:
+        """Apply a write that Chroma accepted."""
+        args = (list(ids), np.asarray(embeddings, dtype=np.float32), list(documents), list(metadatas))
+        if collection in self._building:
+            self._building[collection].append(("add", args))
+        index = self.indexes.get(collection)
+        if index is not None:
+            await asyncio.to_thread(index.add, *args)
+
+    async def delete(self, collection: str, ids: Sequence[str]) -> None:
+        if collection in self._building:
+            self._building[collection].append(("delete", (list(ids),)))
+        index = self.indexes.get(collection)
+        if index is not None:
+            await asyncio.to_thread(index.delete, list(ids))
+
+    def drop(self, collection: str) -> None:
+        """Forget a collection that was deleted from Chroma."""
+        index = self.indexes.pop(collection, None)
+        if index is not None:
+            index.close()
+            shutil.rmtree(index.path, ignore_errors=True)
+
+    async def query(self, collection: str, embeddings: Sequence[np.ndarray], limit: int,
+                    where: Optional[Dict[str, Any]] = None, include_metadata: bool = True) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Answer a collection query locally, on a worker thread.
+
+        Returns:
+            (Chroma-shaped query response, distance space), or None when the
+            query must go to Chroma; a missing index is then built in the background
+        """
+        conditions = where_conditions(where)
+        index = self.indexes.get(collection)
+        if index is None or conditions is None:
+            if index is None:
+                self.ensure_build(collection)
+            self.fallback_queries += 1
+            return None
+        self.local_queries += 1
+        response = await asyncio.to_thread(index.query, embeddings, limit, conditions, include_metadata)
+        return response, index.space
+
+    async def verify(self, collection: str, sample: int = 16) -> Dict[str, Any]:
+        """
+        Compare a local index with its Chroma collection.
+
+        Checks the record count, the id sets and, for a random sample of
+        ids, that the stored vectors are equal.
+        """
+        index = self.indexes.get(collection)
+        report: Dict[str, Any] = {'collection': collection, 'indexed': index is not None}
+        chroma_count = await self.chroma_client.count(collection)
+        report['chroma_count'] = chroma_count
+        if index is None:
+            report['consistent'] = False
+            return report
+        local_ids = set(index.live_ids())
+        report['local_count'] = len(local_ids)
+        if len(local_ids) != chroma_count:
+            report['consistent'] = False
+            return report
+        if sample <= 0:
+            report['consistent'] = True
+            return report
+
+        chroma_ids: List[str] = []
+        while True:
+            page = await self.chroma_client.get_records(collection, limit=10_000, offset=len(chroma_ids), include=[])
+            if not page.get('ids'):
+                break
+            chroma_ids.extend(page['ids'])
+        missing = [record_id for record_id in chroma_ids if record_id not in local_ids]
+        extra = local_ids.difference(chroma_ids)
+        checked = random.sample(chroma_ids, min(sample, len(chroma_ids))) if not missing else []
+        mismatched = 0
+        if checked:
+            page = await self.chroma_client.get_records(collection, ids=checked, include=["embeddings"])
+            for record_id, embedding in zip(page.get('ids') or [], page.get('embeddings') or []):
+                local = index.vector(record_id)
+                if local is None or not np.allclose(local, np.asarray(embedding, dtype=np.float32), atol=1e-5):
+                    mismatched += 1
+        report.update({
+            'missing': len(missing),
+            'extra': len(extra),
+            'sampled': len(checked),
+            'mismatched_vectors': mismatched,
+            'consistent': not missing and not extra and mismatched == 0,
+        })
+        return report
+
+    async def close(self) -> None:
+        for task in self._build_tasks.values():
+            task.cancel()
+        for index in self.indexes.values():
+            await asyncio.to_thread(index.save)
+            index.close()
+        self.indexes.clear()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'hnswlib_available': HNSWLIB_AVAILABLE,
+            'local_queries': self.local_queries,
+            'fallback_queries': self.fallback_queries,
+            'building': sorted(self._building),
+            'collections': {name: index.stats() for name, index in self.indexes.items()},
+        }
@@ -16,6 +16,7 @@ repository_processor: Optional[object] = None  # RepositoryProcessor or Enhanced
 embedding_client: Optional[object] = None  # AsyncEnhancedEmbeddingClient
 oracle_client: Optional[object] = None  # OracleDBClient
 oracle_analyzer: Optional[object] = None  # OracleDatabaseAnalyzer
+embedding_migrator: Optional[object] = None  # EmbeddingMigrator
 
 # Configuration flags
 use_enhanced_processor: bool = True  # Switch to v2.0 processor
@@ -66,6 +67,25 @@ def get_embedding_client() -> object:  # AsyncEnhancedEmbeddingClient
     return embedding_client
 
 
+def set_embedding_client(embedding: object) -> None:  # AsyncEnhancedEmbeddingClient
+    """Replace the serving embedding client (after a re-embedding switch)."""
+    global embedding_client
+    embedding_client = embedding
+
+
+def set_embedding_migrator(migrator: Optional[object]) -> None:  # EmbeddingMigrator
+    """Set the background re-embedding service."""
+    global embedding_migrator
+    embedding_migrator = migrator
+
+
+def get_embedding_migrator() -> object:  # EmbeddingMigrator
+    """Get the background re-embedding service."""
+    if not embedding_migrator:
+        raise HTTPException(status_code=503, detail="Embedding registry not enabled")
+    return embedding_migrator
+
+
 def get_oracle_client() -> object:  # OracleDBClient
     """Get Oracle database client."""
     if not oracle_client:
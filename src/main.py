@@ -129,13 +129,15 @@ async def initialize_clients_async(app: FastAPI):
                 # Import our v2-native client
                 from src.core.chromadb_client import ChromaDBClient as V2ChromaDBClient
                 # Use settings for v2 tenant/database configuration
-                return V2ChromaDBClient(
+                client = V2ChromaDBClient(
                     host=settings.chroma_host,
                     port=settings.chroma_port,
                     collection_name=settings.chroma_collection_name,
                     tenant=settings.chroma_tenant,
                     database=settings.chroma_database,
                 )
+                client.configure_sharding(settings.chroma_sharding, settings.chroma_shard_groups)
+                return client
             # Run ChromaDB import/creation in thread pool to avoid blocking event loop
             chroma_client = await asyncio.to_thread(_import_and_create_chromadb)
             # Ensure the target collection exists (self-healing, v2 endpoints)
@@ -185,10 +187,19 @@ async def initialize_clients_async(app: FastAPI):
                     device="auto",
                     use_cache=True,
                     cache_size=10000,
+                    persistent_cache_path=settings.embedding_cache_path or None,
+                    backend=settings.embedding_backend,
+                    onnx_intra_op_threads=settings.embedding_onnx_threads,
+                    worker_processes=settings.embedding_worker_processes,
                     lazy_init=True
                 )
             embedding_client = await asyncio.to_thread(_import_and_create_embedding_client)
-            logger.info("Async CodeBERT embedding client created - models will load on first use")
+            if settings.embedding_preload:
+                # Load and warm up while the databases initialize; readiness reports progress
+                app.state.embedding_warmup_task = asyncio.create_task(embedding_client.warm_up())
+                logger.info("Async CodeBERT embedding client created - preloading model in background")
+            else:
+                logger.info("Async CodeBERT embedding client created - models will load on first use")
         except Exception as emb_e:
             logger.warning(f"Embedding initialization skipped (non-blocking): {emb_e}")
             embedding_client = None
@@ -254,14 +265,86 @@ async def initialize_clients_async(app: FastAPI):
                 max_concurrent_repos=3,  # Conservative for stability
                 workspace_dir="./data/repositories",
                 use_codebert=(embedding_client is not None),
-                embedding_client=embedding_client
+                embedding_client=embedding_client,
+                parse_workers=settings.parse_workers,
+                io_workers=settings.io_workers
             )
         else:
             repository_processor = None
             logger.warning("Repository processor not created (missing dependencies)", chroma_ready=bool(chroma_client), neo4j_ready=bool(neo4j_client))
         
+        if chroma_client and embedding_client:
+            # Semantic search embeds queries with the serving model
+            chroma_client.embedding_client = embedding_client
+        
+        if chroma_client:
+            if settings.query_cache_enabled:
+                from .core import redis_client as redis_client_module
+                from .core.query_cache import QueryResultCache
+
+                chroma_client.query_cache = QueryResultCache(
+                    max_entries=settings.cache_size,
+                    ttl_seconds=settings.cache_ttl,
+                    redis_provider=(lambda: redis_client_module.redis_client) if settings.query_cache_redis else None
+                )
+            else:
+                chroma_client.query_cache = None
+        
+        # Route vectors by embedding model fingerprint so model upgrades never mix spaces
+        embedding_migrator = None
+        if chroma_client and embedding_client and settings.embedding_registry_path:
+            try:
+                from .core.embedding_registry import EmbeddingRegistry
+                from .services.embedding_migrator import EmbeddingMigrator
+
+                chroma_client.registry = EmbeddingRegistry(settings.embedding_registry_path)
+                chroma_client.embedding_fingerprint = embedding_client.config.cache_namespace()
+
+                def _switch_embedding_client(new_client):
+                    """Serve the re-embedded collections' model; runs right after registry activation."""
+                    old_client = dependencies.embedding_client
+                    chroma_client.embedding_fingerprint = new_client.config.cache_namespace()
+                    chroma_client.embedding_client = new_client
+                    dependencies.set_embedding_client(new_client)
+                    app.state.embedding_client = new_client
+                    if dependencies.repository_processor is not None:
+                        dependencies.repository_processor.set_embedding_client(new_client)
+                    if old_client is not None and old_client is not new_client:
+                        # Closed once in-flight queries and indexing batches on the old model finish
+                        old_client.retire()
+
+                embedding_migrator = EmbeddingMigrator(
+                    chroma_client,
+                    chroma_client.registry,
+                    on_switch=_switch_embedding_client,
+                    page_size=settings.embedding_reembed_page_size,
+                    throttle_seconds=settings.embedding_reembed_throttle_seconds
+                )
+                logger.info(f"Embedding registry enabled (fingerprint {chroma_client.embedding_fingerprint})")
+            except Exception as reg_e:
+                logger.error(f"Embedding registry unavailable: {reg_e}")
+                app.state.initialization_error = (app.state.initialization_error or "") + f" | Embedding registry: {reg_e}"
+        
+        # Serve semantic search from in-process ANN indexes, built from Chroma in the background
+        if chroma_client and settings.local_index_enabled:
+            try:
+                from .core.vector_index import LocalIndexManager
+
+                chroma_client.local_index = LocalIndexManager(
+                    chroma_client,
+                    settings.local_index_dir,
+                    ef_search=settings.local_index_ef_search,
+                    exact_threshold=settings.local_index_exact_threshold
+                )
+                app.state.local_index_task = asyncio.create_task(chroma_client.local_index.start())
+                logger.info(f"Local vector index enabled ({settings.local_index_dir})")
+            except Exception as li_e:
+                logger.error(f"Local vector index unavailable: {li_e}")
+        
         # Set clients in dependencies module
         dependencies.set_clients(chroma_client, neo4j_client, repository_processor, embedding_client, oracle_client, oracle_analyzer)
+        dependencies.set_embedding_migrator(embedding_migrator)
+        app.state.embedding_migrator = embedding_migrator
         
         # Store clients in app state
         app.state.chroma_client = chroma_client
@@ -538,6 +621,24 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logging.error(f"Error cleaning up repository processor: {e}")
     
+    warmup_task = getattr(app.state, "embedding_warmup_task", None)
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    
+    migrator_ref = getattr(app.state, "embedding_migrator", None)
+    if migrator_ref:
+        try:
+            await migrator_ref.cancel()
+        except Exception as e:
+            logging.error(f"Error stopping embedding migrator: {e}")
+    
+    local_index_ref = getattr(getattr(app.state, "chroma_client", None), "local_index", None)
+    if local_index_ref:
+        try:
+            await local_index_ref.close()
+        except Exception as e:
+            logging.error(f"Error saving local vector indexes: {e}")
+    
     emb_ref = getattr(app.state, "embedding_client", None) or getattr(dependencies, "embedding_client", None)
     if emb_ref:
         try:
@@ -0,0 +1,158 @@
+"""
+Business analysis extraction from parsed code chunks.
+Aggregates business rules, framework patterns and migration complexity per file.
+"""
+
+import re
+from typing import Any, Dict, List
+
+from .tree_sitter_parser import CodeChunk, RelationshipInfo
+
+
+def empty_business_analysis() -> Dict[str, Any]:
+    """Return the default (empty) business analysis structure."""
+    return {
+        'business_rules': [],
+        'framework_patterns': {},
+        'migration_complexity': 'low',
+        'struts_components': [],
+        'corba_interfaces': [],
+        'jsp_patterns': [],
+        'migration_notes': []
+    }
+
+
+def build_business_analysis(chunks: List[CodeChunk],
+                            relationships: List[RelationshipInfo],
+                            content: str,
+                            file_path: str) -> Dict[str, Any]:
+    """
+    Aggregate business rules and framework patterns from parsed chunks.
+
+    Args:
+        chunks: Chunks returned by TreeSitterParser.parse_code
+        relationships: Relationships returned by TreeSitterParser.parse_code
+        content: File content
+        file_path: File path for context
+
+    Returns:
+        Dict containing business analysis results
+    """
+    analysis = empty_business_analysis()
+
+    # Aggregate business information from chunks
+    total_business_rules = 0
+
+    for chunk in chunks:
+        if chunk.business_rules:
+            analysis['business_rules'].extend(chunk.business_rules)
+            total_business_rules += len(chunk.business_rules)
+
+        if chunk.framework_patterns:
+            analysis['framework_patterns'].update(chunk.framework_patterns)
+
+            # Categorize framework-specific patterns
+            if 'struts_namespace' in chunk.framework_patterns:
+                analysis['struts_components'].append({
+                    'type': chunk.chunk_type,
+                    'name': chunk.name,
+                    'business_purpose': chunk.framework_patterns.get('business_purpose', ''),
+                    'location': f"{file_path}:{chunk.start_line}"
+                })
+
+            if 'corba_interface' in chunk.framework_patterns:
+                analysis['corba_interfaces'].append({
+                    'interface': chunk.framework_patterns['corba_interface'],
+                    'operations': chunk.framework_patterns.get('business_operations', []),
+                    'location': f"{file_path}:{chunk.start_line}"
+                })
+
+        if chunk.migration_notes:
+            analysis['migration_notes'].extend(chunk.migration_notes)
+
+    # Calculate migration complexity based on patterns found
+    complexity_score = 0
+
+    # JSP/Servlet complexity
+    if file_path.endswith(('.jsp', '.tag', '.tagx')):
+        analysis['jsp_patterns'] = analyze_jsp_complexity(content)
+        complexity_score += len(analysis['jsp_patterns']) * 2
+
+    # Struts complexity
+    if any('struts' in pattern.lower() for pattern in analysis['framework_patterns'].keys()):
+        complexity_score += 5
+
+    # CORBA complexity
+    if analysis['corba_interfaces']:
+        complexity_score += len(analysis['corba_interfaces']) * 3
+
+    # Business rules complexity
+    complexity_score += total_business_rules
+
+    # Determine migration complexity level
+    if complexity_score <= 3:
+        analysis['migration_complexity'] = 'low'
+    elif complexity_score <= 10:
+        analysis['migration_complexity'] = 'medium'
+    else:
+        analysis['migration_complexity'] = 'high'
+
+    # Add relationships information
+    analysis['relationships'] = [
+        {
+            'type': rel.relationship_type,
+            'source': rel.source_id,
+            'target': rel.target_id,
+            'location': rel.source_location
+        }
+        for rel in relationships
+    ]
+
+    return analysis
+
+
+_SCRIPTLET_PATTERN = re.compile(r'<%[^@](.*?)%>', re.DOTALL)
+_STRUTS_TAG_PATTERN = re.compile(r'<(html|bean|logic|nested):(\w+)')
+
+
+def analyze_jsp_complexity(content: str) -> List[Dict[str, Any]]:
+    """Analyze JSP-specific complexity patterns."""
+    patterns = []
+
+    # Check for embedded Java code (scriptlets)
+    scriptlets = _SCRIPTLET_PATTERN.findall(content)
+    if scriptlets:
+        patterns.append({
+            'type': 'scriptlets',
+            'count': len(scriptlets),
+            'complexity': 'high' if len(scriptlets) > 5 else 'medium',
+            'migration_note': 'Scriptlets need to be converted to Angular components'
+        })
+
+    # Check for direct database access
+    if any(db_pattern in content for db_pattern in ['Connection', 'PreparedStatement', 'ResultSet']):
+        patterns.append({
+            'type': 'direct_db_access',
+            'complexity': 'high',
+            'migration_note': 'Direct DB access should be moved to GraphQL resolvers'
+        })
+
+    # Check for session management
+    if 'session.' in content:
+        patterns.append({
+            'type': 'session_management',
+            'complexity': 'medium',
+            'migration_note': 'Session usage needs Angular state management'
+        })
+
+    # Check for Struts tags
+    struts_tags = _STRUTS_TAG_PATTERN.findall(content)
+    if struts_tags:
+        patterns.append({
+            'type': 'struts_tags',
+            'count': len(struts_tags),
+            'complexity': 'medium',
+            'migration_note': 'Struts tags need Angular component equivalents'
+        })
+
+    return patterns
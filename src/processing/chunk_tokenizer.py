@@ -0,0 +1,138 @@
+"""
+Token-budget sizing for embedded chunks.
+Measures chunks with the embedding model's own (fast, per-process cached)
+tokenizer on exactly the text the embedding client feeds the model, splits
+chunks that would be truncated at the model's max length, and returns the
+token ids so the embedding client does not tokenize them again.
+"""
+
+import functools
+import logging
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def preprocess_for_embedding(code: str, include_comments: bool = True) -> str:
+    """
+    Normalize code the way the embedding client does before tokenizing.
+
+    Lines are stripped, blank lines dropped and, unless include_comments,
+    single-line comments removed.
+    """
+    processed_lines = []
+    for line in code.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if not include_comments and (line.startswith('//') or line.startswith('#')):
+            continue
+        processed_lines.append(line)
+    return '\n'.join(processed_lines)
+
+
+@functools.lru_cache(maxsize=4)
+def load_tokenizer(name: str) -> Any:
+    """Load a fast (Rust) tokenizer once per process."""
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name, use_fast=True)
+    if not tokenizer.is_fast:
+        logger.warning(f"No fast tokenizer available for {name}; chunk sizing will be slow")
+    return tokenizer
+
+
+class ChunkTokenizer:
+    """Counts, splits and encodes chunk text against a model's token limit."""
+
+    def __init__(self, tokenizer: Any, max_tokens: int = 512, preprocess: bool = True, include_comments: bool = True):
+        """
+        Initialize the chunk tokenizer.
+
+        Args:
+            tokenizer: Hugging Face fast tokenizer of the embedding model
+            max_tokens: Model max length, special tokens included
+            preprocess: Apply the embedding client's code preprocessing before tokenizing
+            include_comments: Keep single-line comments when preprocessing
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.preprocess = preprocess
+        self.include_comments = include_comments
+        self.budget = max(1, max_tokens - tokenizer.num_special_tokens_to_add(pair=False))
+
+    def prepare(self, text: str) -> str:
+        """Text exactly as the embedding client would tokenize it."""
+        if self.preprocess:
+            return preprocess_for_embedding(text, self.include_comments)
+        return text.strip()
+
+    def encode_many(self, texts: List[str], truncate: bool = False) -> List[List[int]]:
+        """Model input ids (special tokens included) for each text."""
+        if not texts:
+            return []
+        return self.tokenizer(
+            [self.prepare(text) for text in texts],
+            truncation=truncate,
+            max_length=self.max_tokens if truncate else None
+        )["input_ids"]
+
+    def fits(self, token_ids: List[int]) -> bool:
+        """Whether the model sees every one of these ids."""
+        return len(token_ids) <= self.max_tokens
+
+    def windows(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into character ranges that each fit the token budget.
+
+        Ranges follow line boundaries; a single line over budget is cut at
+        token offsets. Lines are counted independently, which matches the
+        byte-level BPE used by CodeBERT where the newline is its own token.
+
+        Returns:
+            (start, end) character offsets into text, in order
+        """
+        lines: List[Tuple[int, str]] = []
+        offset = 0
+        for line in text.split('\n'):
+            lines.append((offset, line))
+            offset += len(line) + 1
+        prepared = [self.prepare(line) if self.preprocess else line for _, line in lines]
+        counts = [len(ids) for ids in self.tokenizer(prepared, add_special_tokens=False)["input_ids"]]
+
+        windows: List[Tuple[int, int]] = []
+        window_start = None
+        running = 0
+        last_end = 0
+        for (start, line), count in zip(lines, counts):
+            end = start + len(line)
+            if count == 0:
+                continue
+            if count > self.budget:
+                if window_start is not None:
+                    windows.append((window_start, last_end))
+                    window_start, running = None, 0
+                windows.extend(self._split_line(line, start))
+                continue
+            cost = count + (1 if running else 0)  # joining newline token
+            if window_start is not None and running + cost > self.budget:
+                windows.append((window_start, last_end))
+                window_start, running, cost = None, 0, count
+            if window_start is None:
+                window_start = start
+            running += cost
+            last_end = end
+        if window_start is not None:
+            windows.append((window_start, last_end))
+        return windows
+
+    def _split_line(self, line: str, line_start: int) -> List[Tuple[int, int]]:
+        """Cut one over-budget line into token windows."""
+        stripped = line.strip()
+        lead = line_start + (len(line) - len(line.lstrip()))
+        offsets = self.tokenizer(stripped, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        windows = []
+        for i in range(0, len(offsets), self.budget):
+            piece = offsets[i:i + self.budget]
+            windows.append((lead + piece[0][0], lead + piece[-1][1]))
+        return windows
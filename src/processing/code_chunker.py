@@ -3,13 +3,18 @@ Intelligent code chunking system for optimal RAG performance.
 Implements advanced chunking strategies with semantic boundary detection.
 """
 
+import logging
 import re
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Set, Tuple
 
+from .chunk_tokenizer import ChunkTokenizer, load_tokenizer
 from .tree_sitter_parser import CodeChunk, RelationshipInfo, SupportedLanguage, TreeSitterParser
 
 
+logger = logging.getLogger(__name__)
+
+
 @dataclass
 class ChunkingConfig:
     """Configuration for code chunking strategies."""
@@ -23,6 +28,11 @@ class ChunkingConfig:
     context_lines: int = 3
     semantic_splitting: bool = True
     complexity_threshold: float = 5.0
+    # Token budget of the embedding model; chunks are split so none is truncated
+    tokenizer_name: Optional[str] = None  # Embedding model name; None = character sizing only
+    max_chunk_tokens: int = 512  # Model max length, special tokens included
+    token_preprocessing: bool = True  # Mirror the embedding client's code preprocessing
+    token_include_comments: bool = True
 
 
 @dataclass
@@ -35,76 +45,175 @@ class EnhancedChunk:
     business_domain: Optional[str] = None
     importance_score: float = 0.0
     embedding_metadata: Dict = None
+    token_ids: Optional[List[int]] = None  # Embedding model input ids, when sized by tokens
+    tokenizer_name: Optional[str] = None  # Tokenizer that produced token_ids
     
     def __post_init__(self):
         if self.embedding_metadata is None:
             self.embedding_metadata = {}
 
 
+# Business domain classifications; shared by all chunkers
+_BUSINESS_DOMAINS: Dict[str, Set[str]] = {
+    'authentication': {
+        'auth', 'login', 'logout', 'signin', 'signup', 'password', 'token', 'jwt',
+        'session', 'user', 'credential', 'verify', 'authenticate', 'authorize',
+        'oauth', 'sso', 'ldap', 'saml', 'bearer', 'basic_auth'
+    },
+    'database': {
+        'db', 'database', 'sql', 'query', 'select', 'insert', 'update', 'delete',
+        'table', 'schema', 'model', 'orm', 'migration', 'connection', 'pool',
+        'transaction', 'commit', 'rollback', 'index', 'foreign_key', 'primary_key'
+    },
+    'api': {
+        'api', 'rest', 'graphql', 'endpoint', 'route', 'controller', 'handler',
+        'request', 'response', 'http', 'get', 'post', 'put', 'patch', 'delete',
+        'middleware', 'cors', 'rate_limit', 'swagger', 'openapi', 'json', 'xml'
+    },
+    'business_logic': {
+        'business', 'logic', 'rule', 'workflow', 'process', 'service', 'domain',
+        'entity', 'aggregate', 'repository', 'factory', 'strategy', 'command',
+        'event', 'handler', 'validator', 'calculator', 'processor', 'manager'
+    },
+    'ui': {
+        'ui', 'component', 'view', 'template', 'render', 'display', 'form',
+        'button', 'input', 'modal', 'dialog', 'menu', 'navigation', 'layout',
+        'style', 'css', 'html', 'dom', 'event', 'click', 'hover', 'focus'
+    },
+    'integration': {
+        'integration', 'external', 'third_party', 'webhook', 'notification',
+        'email', 'sms', 'push', 'queue', 'message', 'event', 'publish',
+        'subscribe', 'kafka', 'rabbitmq', 'redis', 'cache', 'cdn', 'aws', 'azure'
+    },
+    'security': {
+        'security', 'encrypt', 'decrypt', 'hash', 'ssl', 'tls', 'certificate',
+        'key', 'secret', 'sanitize', 'validate', 'xss', 'csrf', 'injection',
+        'firewall', 'permission', 'role', 'acl', 'audit', 'log', 'monitor'
+    },
+    'testing': {
+        'test', 'spec', 'mock', 'stub', 'fixture', 'assert', 'expect', 'should',
+        'unit', 'integration', 'e2e', 'scenario', 'given', 'when', 'then',
+        'setup', 'teardown', 'before', 'after', 'describe', 'it', 'jest', 'pytest'
+    },
+    'configuration': {
+        'config', 'setting', 'option', 'parameter', 'property', 'environment',
+        'env', 'variable', 'constant', 'default', 'initialize', 'setup',
+        'bootstrap', 'start', 'init', 'load', 'parse', 'validate', 'schema'
+    },
+    'monitoring': {
+        'monitor', 'metric', 'log', 'trace', 'debug', 'error', 'warn', 'info',
+        'alert', 'notification', 'dashboard', 'report', 'analytics', 'performance',
+        'benchmark', 'profiler', 'health', 'status', 'ping', 'heartbeat'
+    }
+}
+
+
+def _trie_regex(words: Set[str]) -> str:
+    """Build a prefix-trie regex; at any position it matches the longest word starting there."""
+    trie: Dict[str, Dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(trie)
+
+
+class DomainMatcher:
+    """
+    Precompiled business-domain keyword matcher.
+
+    A single trie-regex pass finds every keyword occurring in a text, giving
+    the same scores as testing each domain keyword as a substring.
+    """
+
+    def __init__(self, domains: Dict[str, Set[str]]):
+        self.domains = list(domains)
+        keywords = sorted({kw for kws in domains.values() for kw in kws})
+        self.keyword_domains: Dict[str, List[str]] = {
+            kw: [domain for domain, kws in domains.items() if kw in kws] for kw in keywords
+        }
+        # At each position the longest keyword is reported; shorter keywords
+        # matching there are its prefixes
+        self.prefix_closure: Dict[str, List[str]] = {
+            kw: [other for other in keywords if kw.startswith(other)] for kw in keywords
+        }
+        self.pattern = re.compile('(?=(' + _trie_regex(set(keywords)) + '))')
+
+    def keywords_in(self, text: str) -> Set[str]:
+        """Return every keyword that occurs in the (lower-cased) text."""
+        found: Set[str] = set()
+        for longest in set(self.pattern.findall(text)):
+            found.update(self.prefix_closure[longest])
+        return found
+
+    def score(self, name_lower: str, content_lower: str) -> Dict[str, int]:
+        """Domain scores: 3 per keyword in the name, 1 per keyword in the content."""
+        scores = dict.fromkeys(self.domains, 0)
+        for keyword in self.keywords_in(name_lower):
+            for domain in self.keyword_domains[keyword]:
+                scores[domain] += 3
+        for keyword in self.keywords_in(content_lower):
+            for domain in self.keyword_domains[keyword]:
+                scores[domain] += 1
+        return {domain: score for domain, score in scores.items() if score > 0}
+
+
+_DOMAIN_MATCHER = DomainMatcher(_BUSINESS_DOMAINS)
+
+
+@dataclass
+class ParsedSource:
+    """Parser output for one file, shared by chunking and business analysis."""
+    chunks: List[CodeChunk]
+    relationships: List[RelationshipInfo]
+
+
 class CodeChunker:
     """Advanced code chunking with semantic boundary detection."""
     
-    def __init__(self, config: ChunkingConfig = None):
+    def __init__(self,
+                 config: ChunkingConfig = None,
+                 parser: Optional[TreeSitterParser] = None,
+                 tokenizer: Optional[ChunkTokenizer] = None):
         self.config = config or ChunkingConfig()
-        self.parser = TreeSitterParser()
+        self.parser = parser or TreeSitterParser()
         self.business_domains = self._initialize_business_domains()
+        self.domain_matcher = _DOMAIN_MATCHER
+        self.tokenizer = tokenizer
+        if self.tokenizer is None and self.config.tokenizer_name:
+            try:
+                self.tokenizer = ChunkTokenizer(
+                    load_tokenizer(self.config.tokenizer_name),
+                    max_tokens=self.config.max_chunk_tokens,
+                    preprocess=self.config.token_preprocessing,
+                    include_comments=self.config.token_include_comments
+                )
+            except Exception as e:
+                logger.warning(f"Tokenizer {self.config.tokenizer_name} unavailable, sizing chunks by characters: {e}")
     
     def _initialize_business_domains(self) -> Dict[str, Set[str]]:
         """Initialize business domain classifications."""
-        return {
-            'authentication': {
-                'auth', 'login', 'logout', 'signin', 'signup', 'password', 'token', 'jwt',
-                'session', 'user', 'credential', 'verify', 'authenticate', 'authorize',
-                'oauth', 'sso', 'ldap', 'saml', 'bearer', 'basic_auth'
-            },
-            'database': {
-                'db', 'database', 'sql', 'query', 'select', 'insert', 'update', 'delete',
-                'table', 'schema', 'model', 'orm', 'migration', 'connection', 'pool',
-                'transaction', 'commit', 'rollback', 'index', 'foreign_key', 'primary_key'
-            },
-            'api': {
-                'api', 'rest', 'graphql', 'endpoint', 'route', 'controller', 'handler',
-                'request', 'response', 'http', 'get', 'post', 'put', 'patch', 'delete',
-                'middleware', 'cors', 'rate_limit', 'swagger', 'openapi', 'json', 'xml'
-            },
-            'business_logic': {
-                'business', 'logic', 'rule', 'workflow', 'process', 'service', 'domain',
-                'entity', 'aggregate', 'repository', 'factory', 'strategy', 'command',
-                'event', 'handler', 'validator', 'calculator', 'processor', 'manager'
-            },
-            'ui': {
-                'ui', 'component', 'view', 'template', 'render', 'display', 'form',
-                'button', 'input', 'modal', 'dialog', 'menu', 'navigation', 'layout',
-                'style', 'css', 'html', 'dom', 'event', 'click', 'hover', 'focus'
-            },
-            'integration': {
-                'integration', 'external', 'third_party', 'webhook', 'notification',
-                'email', 'sms', 'push', 'queue', 'message', 'event', 'publish',
-                'subscribe', 'kafka', 'rabbitmq', 'redis', 'cache', 'cdn', 'aws', 'azure'
-            },
-            'security': {
-                'security', 'encrypt', 'decrypt', 'hash', 'ssl', 'tls', 'certificate',
-                'key', 'secret', 'sanitize', 'validate', 'xss', 'csrf', 'injection',
-                'firewall', 'permission', 'role', 'acl', 'audit', 'log', 'monitor'
-            },
-            'testing': {
-                'test', 'spec', 'mock', 'stub', 'fixture', 'assert', 'expect', 'should',
-                'unit', 'integration', 'e2e', 'scenario', 'given', 'when', 'then',
-                'setup', 'teardown', 'before', 'after', 'describe', 'it', 'jest', 'pytest'
-            },
-            'configuration': {
-                'config', 'setting', 'option', 'parameter', 'property', 'environment',
-                'env', 'variable', 'constant', 'default', 'initialize', 'setup',
-                'bootstrap', 'start', 'init', 'load', 'parse', 'validate', 'schema'
-            },
-            'monitoring': {
-                'monitor', 'metric', 'log', 'trace', 'debug', 'error', 'warn', 'info',
-                'alert', 'notification', 'dashboard', 'report', 'analytics', 'performance',
-                'benchmark', 'profiler', 'health', 'status', 'ping', 'heartbeat'
-            }
-        }
+        return _BUSINESS_DOMAINS
+    
+    def parse_file(self, file_path: str, content: str, language: SupportedLanguage) -> ParsedSource:
+        """Parse a file into semantic units once, for reuse by chunk_file and other consumers."""
+        chunks, relationships = self.parser.parse_code(content, language, file_path)
+        return ParsedSource(chunks=chunks, relationships=relationships)
     
-    def chunk_file(self, file_path: str, content: str, language: SupportedLanguage) -> List[EnhancedChunk]:
+    def chunk_file(self,
+                   file_path: str,
+                   content: str,
+                   language: SupportedLanguage,
+                   parsed: Optional[ParsedSource] = None) -> List[EnhancedChunk]:
         """
         Chunk a file with semantic boundary detection.
         
@@ -112,26 +221,37 @@ class CodeChunker:
             file_path: Path to the source file
             content: Source code content
             language: Programming language
+            parsed: Result of parse_file for this content; parsed here when omitted
             
         Returns:
             List of enhanced chunks
         """
         # Parse code into semantic units
-        chunks, relationships = self.parser.parse_code(content, language, file_path)
+        if parsed is None:
+            parsed = self.parse_file(file_path, content, language)
+        chunks, relationships = parsed.chunks, parsed.relationships
         
         # Apply chunking strategies
-        enhanced_chunks = []
-        
+        sized_chunks: List[CodeChunk] = []
         for chunk in chunks:
             # Check if chunk needs splitting
             if self._needs_splitting(chunk):
-                split_chunks = self._split_large_chunk(chunk, content, language)
-                for split_chunk in split_chunks:
-                    enhanced_chunk = self._enhance_chunk(split_chunk, content, chunks, relationships)
-                    enhanced_chunks.append(enhanced_chunk)
+                sized_chunks.extend(self._split_large_chunk(chunk, content, language))
             else:
-                enhanced_chunk = self._enhance_chunk(chunk, content, chunks, relationships)
-                enhanced_chunks.append(enhanced_chunk)
+                sized_chunks.append(chunk)
+        
+        # Enforce the embedding model's token limit
+        token_ids: List[Optional[List[int]]] = [None] * len(sized_chunks)
+        if self.tokenizer is not None:
+            sized_chunks, token_ids = self._fit_token_budget(sized_chunks)
+        
+        enhanced_chunks = []
+        for chunk, ids in zip(sized_chunks, token_ids):
+            enhanced_chunk = self._enhance_chunk(chunk, content, chunks, relationships)
+            enhanced_chunk.token_ids = ids
+            if ids is not None:
+                enhanced_chunk.tokenizer_name = self.config.tokenizer_name
+            enhanced_chunks.append(enhanced_chunk)
         
         # Add contextual relationships
         self._add_contextual_relationships(enhanced_chunks, relationships)
@@ -154,6 +274,50 @@ class CodeChunker:
             chunk.complexity_score > self.config.complexity_threshold
         )
     
+    def _fit_token_budget(self, chunks: List[CodeChunk]) -> Tuple[List[CodeChunk], List[List[int]]]:
+        """
+        Split chunks the embedding model would truncate and tokenize every chunk once.
+        
+        Returns:
+            Tuple of (chunks, model input ids per chunk)
+        """
+        fitted: List[CodeChunk] = []
+        fitted_ids: List[List[int]] = []
+        for chunk, ids in zip(chunks, self.tokenizer.encode_many([c.content for c in chunks])):
+            if self.tokenizer.fits(ids):
+                fitted.append(chunk)
+                fitted_ids.append(ids)
+                continue
+            pieces = self._split_by_tokens(chunk)
+            # Byte-level BPE can merge differently at a cut; never hand over more than the model reads
+            fitted.extend(pieces)
+            fitted_ids.extend(self.tokenizer.encode_many([piece.content for piece in pieces], truncate=True))
+        return fitted, fitted_ids
+    
+    def _split_by_tokens(self, chunk: CodeChunk) -> List[CodeChunk]:
+        """Split a chunk at line boundaries into pieces within the token budget."""
+        pieces = []
+        for i, (start, end) in enumerate(self.tokenizer.windows(chunk.content)):
+            piece_content = chunk.content[start:end]
+            first_line = chunk.content.count('\n', 0, start)
+            pieces.append(CodeChunk(
+                id=f"{chunk.id}_tok_{i}",
+                content=piece_content,
+                language=chunk.language,
+                chunk_type=chunk.chunk_type,
+                name=f"{chunk.name}_part_{i}" if chunk.name else None,
+                start_line=chunk.start_line + first_line,
+                end_line=chunk.start_line + first_line + piece_content.count('\n'),
+                start_byte=chunk.start_byte + start,
+                end_byte=chunk.start_byte + end,
+                parent_id=chunk.parent_id or chunk.id,
+                imports=list(chunk.imports),
+                docstring=chunk.docstring if i == 0 else None,
+                annotations=dict(chunk.annotations),
+                complexity_score=self.parser._calculate_complexity(piece_content)
+            ))
+        return pieces or [chunk]
+    
     def _split_large_chunk(self, chunk: CodeChunk, content: str, language: SupportedLanguage) -> List[CodeChunk]:
         """Split a large chunk into smaller semantic units."""
         split_chunks = []
@@ -462,21 +626,8 @@ class CodeChunker:
             # Check name-based classification
             name_lower = chunk.name.lower() if chunk.name else ""
             
-            # Score each domain
-            domain_scores = {}
-            
-            for domain, keywords in self.business_domains.items():
-                score = 0
-                for keyword in keywords:
-                    # Higher weight for name matches
-                    if keyword in name_lower:
-                        score += 3
-                    # Lower weight for content matches
-                    if keyword in content_lower:
-                        score += 1
-                
-                if score > 0:
-                    domain_scores[domain] = score
+            # Score each domain (higher weight for name matches)
+            domain_scores = self.domain_matcher.score(name_lower, content_lower)
             
             # Assign to highest scoring domain
             if domain_scores:
@@ -0,0 +1,263 @@
+"""
+Repository file manifest built by a single discovery pass.
+Records path, size, mtime, detected language and content hash per file and
+keeps a bounded amount of file content cached for the parsing stage. The persisted index
+state lets re-indexing skip files whose content has not changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileManifestEntry:
+    """A single discovered file."""
+    path: Path
+    relative_path: str
+    size: int
+    mtime: float
+    language: Optional[str]
+    content_hash: str
+    lines: int
+    encoding: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'relative_path': self.relative_path,
+            'size': self.size,
+            'mtime': self.mtime,
+            'language': self.language,
+            'content_hash': self.content_hash,
+            'lines': self.lines,
+            'encoding': self.encoding
+        }
+
+
+def hash_content(content: str) -> str:
+    """Stable content hash used to detect changed files."""
+    return hashlib.sha256(content.encode('utf-8', errors='ignore')).hexdigest()
+
+
+class FileManifest:
+    """Ordered set of discovered files with a bounded content cache."""
+
+    def __init__(self, repo_path: Path, max_cached_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize an empty manifest.
+
+        Args:
+            repo_path: Repository root the entries are relative to
+            max_cached_bytes: Upper bound on cached content; files beyond it are re-read on demand
+        """
+        self.repo_path = repo_path
+        self.max_cached_bytes = max_cached_bytes
+        self.entries: Dict[str, FileManifestEntry] = {}
+        self._content_cache: Dict[str, str] = {}
+        self._cached_bytes = 0
+
+    def add(self, entry: FileManifestEntry, content: Optional[str] = None) -> None:
+        """Add an entry, caching its content while the cache has room."""
+        self.entries[entry.relative_path] = entry
+        if content is not None and self._cached_bytes + len(content) <= self.max_cached_bytes:
+            self._content_cache[entry.relative_path] = content
+            self._cached_bytes += len(content)
+
+    def get(self, relative_path: str) -> Optional[FileManifestEntry]:
+        return self.entries.get(relative_path)
+
+    def get_content(self, relative_path: str) -> Optional[str]:
+        """Return cached content, or None if it must be re-read from disk."""
+        return self._content_cache.get(relative_path)
+
+    def release(self, relative_path: str) -> None:
+        """Drop cached content once the last stage that needs it is done."""
+        content = self._content_cache.pop(relative_path, None)
+        if content is not None:
+            self._cached_bytes -= len(content)
+
+    def release_all(self) -> None:
+        """Drop all cached content; entries stay available."""
+        self._content_cache.clear()
+        self._cached_bytes = 0
+
+    @property
+    def paths(self) -> List[Path]:
+        return [entry.path for entry in self.entries.values()]
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._cached_bytes
+
+    def __iter__(self) -> Iterator[FileManifestEntry]:
+        return iter(self.entries.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+@dataclass
+class IndexedFileState:
+    """What was indexed for one file on the last successful run."""
+    relative_path: str
+    content_hash: str
+    size: int
+    mtime: float
+    language: Optional[str]
+    lines: int
+    chunk_ids: List[str] = field(default_factory=list)
+    encoding: Optional[str] = None
+
+    @classmethod
+    def from_entry(cls, entry: FileManifestEntry, chunk_ids: List[str]) -> 'IndexedFileState':
+        return cls(
+            relative_path=entry.relative_path,
+            content_hash=entry.content_hash,
+            size=entry.size,
+            mtime=entry.mtime,
+            language=entry.language,
+            lines=entry.lines,
+            chunk_ids=list(chunk_ids),
+            encoding=entry.encoding
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_path': self.relative_path,
+            'content_hash': self.content_hash,
+            'size': self.size,
+            'mtime': self.mtime,
+            'language': self.language,
+            'lines': self.lines,
+            'chunk_ids': self.chunk_ids,
+            'encoding': self.encoding
+        }
+
+
+@dataclass
+class RepositoryIndexState:
+    """Persisted per-repository manifest of file hashes and chunk IDs."""
+    repository_name: str
+    source: Dict[str, Any]
+    commit: Optional[str] = None
+    files: Dict[str, IndexedFileState] = field(default_factory=dict)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def chunk_count(self) -> int:
+        return sum(len(f.chunk_ids) for f in self.files.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'repository_name': self.repository_name,
+            'source': self.source,
+            'commit': self.commit,
+            'updated_at': self.updated_at,
+            'files': [f.to_dict() for f in self.files.values()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RepositoryIndexState':
+        files = [IndexedFileState(**f) for f in data.get('files', [])]
+        return cls(
+            repository_name=data['repository_name'],
+            source=data.get('source', {}),
+            commit=data.get('commit'),
+            files={f.relative_path: f for f in files},
+            updated_at=data.get('updated_at', 0.0)
+        )
+
+
+@dataclass
+class ManifestDiff:
+    """Difference between the persisted index state and a fresh manifest."""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def to_process(self) -> List[str]:
+        """Files that need parsing, embedding and upserting."""
+        return self.added + self.changed
+
+    @property
+    def stale(self) -> List[str]:
+        """Files whose previously indexed chunks must be deleted."""
+        return self.changed + self.removed
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'added': len(self.added),
+            'changed': len(self.changed),
+            'removed': len(self.removed),
+            'unchanged': len(self.unchanged)
+        }
+
+
+def diff_manifest(previous: Optional[RepositoryIndexState], manifest: FileManifest) -> ManifestDiff:
+    """Compare a fresh manifest against the last indexed state by content hash."""
+    diff = ManifestDiff()
+    previous_files = previous.files if previous else {}
+
+    for entry in manifest:
+        old = previous_files.get(entry.relative_path)
+        if old is None:
+            diff.added.append(entry.relative_path)
+        elif old.content_hash != entry.content_hash:
+            diff.changed.append(entry.relative_path)
+        else:
+            diff.unchanged.append(entry.relative_path)
+
+    diff.removed = [path for path in previous_files if manifest.get(path) is None]
+    return diff
+
+
+class IndexStateStore:
+    """JSON-file store for RepositoryIndexState, one file per repository."""
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = Path(state_dir)
+
+    def _path_for(self, repository_name: str) -> Path:
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in repository_name)
+        return self.state_dir / f"{safe_name}.json"
+
+    def load(self, repository_name: str) -> Optional[RepositoryIndexState]:
+        path = self._path_for(repository_name)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return RepositoryIndexState.from_dict(json.load(f))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index state {path}: {e}")
+            return None
+
+    def save(self, state: RepositoryIndexState) -> None:
+        """Write atomically so a crash never leaves a truncated state file."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path_for(state.repository_name)
+        tmp_path = path.with_suffix('.json.tmp')
+        state.updated_at = time.time()
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def delete(self, repository_name: str) -> None:
+        path = self._path_for(repository_name)
+        if path.exists():
+            path.unlink()
@@ -0,0 +1,139 @@
+"""
+Non-blocking file reader for repository ingestion.
+Reads run on a shared thread pool so the event loop never blocks on disk I/O,
+batches are read concurrently, large files are memory-mapped, and the text
+encoding is detected once per file and reported back to the caller.
+"""
+
+import asyncio
+import codecs
+import logging
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Byte-order marks checked before falling back to trial decoding
+_BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Tried in order; latin-1 never fails and is the last resort
+_FALLBACK_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+
+
+@dataclass
+class DecodedFile:
+    """Decoded file content and the encoding it was read with."""
+    path: Path
+    content: str
+    encoding: str
+    size: int
+    cpu_time: float = 0.0
+
+
+def _decode(data, encoding: Optional[str]) -> Tuple[str, str]:
+    """
+    Decode raw bytes, detecting the encoding only when not already known.
+
+    Detection checks for a BOM, then decodes strictly with each fallback
+    encoding; the first successful decode is returned, so content is decoded once.
+    """
+    if encoding:
+        return str(data, encoding, 'replace'), encoding
+    head = bytes(data[:4])
+    for bom, bom_encoding in _BOMS:
+        if head.startswith(bom):
+            return str(data, bom_encoding, 'replace'), bom_encoding
+    for candidate in _FALLBACK_ENCODINGS:
+        try:
+            return str(data, candidate), candidate
+        except UnicodeDecodeError:
+            continue
+    return str(data, 'latin-1', 'replace'), 'latin-1'
+
+
+def read_file_sync(path: Path, encoding: Optional[str] = None, mmap_threshold: int = 8 * 1024 * 1024) -> DecodedFile:
+    """
+    Read and decode a file; runs on a worker thread.
+
+    Args:
+        path: File to read
+        encoding: Previously detected encoding; skips detection when given
+        mmap_threshold: Files at least this large are memory-mapped instead of read
+
+    Returns:
+        DecodedFile with content, encoding and the reading thread's CPU time
+    """
+    start_cpu = time.thread_time()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return DecodedFile(path=path, content="", encoding=encoding or 'utf-8', size=0)
+        if size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                content, used = _decode(mapped, encoding)
+        else:
+            content, used = _decode(f.read(), encoding)
+    return DecodedFile(path=path, content=content, encoding=used, size=size,
+                       cpu_time=time.thread_time() - start_cpu)
+
+
+class AsyncFileReader:
+    """Reads files off the event loop on a thread pool shared across repositories."""
+
+    def __init__(self, max_workers: int = 8, mmap_threshold: int = 8 * 1024 * 1024):
+        """
+        Initialize the reader.
+
+        Args:
+            max_workers: I/O threads; shared by all concurrently processed repositories
+            mmap_threshold: Size in bytes from which files are memory-mapped
+        """
+        self.max_workers = max(1, max_workers)
+        self.mmap_threshold = mmap_threshold
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="file-io")
+        return self._executor
+
+    async def read(self, path: Path, encoding: Optional[str] = None) -> DecodedFile:
+        """Read a single file off-loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), read_file_sync, path, encoding, self.mmap_threshold
+        )
+
+    async def read_batch(self, paths: Sequence[Path]) -> List[Optional[DecodedFile]]:
+        """
+        Read a batch of files concurrently.
+
+        Returns results in input order; unreadable files yield None.
+        """
+        results = await asyncio.gather(*(self.read(path) for path in paths), return_exceptions=True)
+        decoded: List[Optional[DecodedFile]] = []
+        for path, result in zip(paths, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Error reading file {path}: {result}")
+                decoded.append(None)
+            else:
+                decoded.append(result)
+        return decoded
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the I/O threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
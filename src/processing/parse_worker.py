@@ -0,0 +1,248 @@
+"""
+Process-pool parsing stage for repository ingestion.
+Each worker process holds its own TreeSitterParser/CodeChunker and returns
+compact, picklable chunk records so parsing never runs on the event loop.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .business_analysis import build_business_analysis, empty_business_analysis
+from .code_chunker import ChunkingConfig, CodeChunker, EnhancedChunk
+from .tree_sitter_parser import CodeChunk, SupportedLanguage
+
+
+logger = logging.getLogger(__name__)
+
+# CodeChunk fields carried across the process boundary
+_CHUNK_RECORD_FIELDS = (
+    'id', 'content', 'chunk_type', 'name', 'start_line', 'end_line',
+    'start_byte', 'end_byte', 'parent_id', 'imports', 'dependencies',
+    'docstring', 'annotations', 'complexity_score', 'business_rules',
+    'framework_patterns', 'migration_notes'
+)
+
+
+@dataclass
+class ParsedFile:
+    """Picklable result of parsing a single file."""
+    path: str
+    language: str
+    size: int
+    lines: int
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    business_analysis: Dict[str, Any] = field(default_factory=empty_business_analysis)
+    timings: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    def to_file_data(self) -> Dict[str, Any]:
+        """Convert to the processor's per-file result dictionary."""
+        return {
+            'path': self.path,
+            'language': self.language,
+            'size': self.size,
+            'lines': self.lines,
+            'chunks_count': len(self.chunks),
+            'chunk_ids': [record['id'] for record in self.chunks],
+            'business_analysis': self.business_analysis
+        }
+
+    def to_enhanced_chunks(self) -> List[EnhancedChunk]:
+        """Rebuild EnhancedChunk objects from the compact chunk records."""
+        return [chunk_from_record(record) for record in self.chunks]
+
+
+def chunk_to_record(enhanced_chunk: EnhancedChunk) -> Dict[str, Any]:
+    """Flatten an EnhancedChunk into a compact, picklable record."""
+    chunk = enhanced_chunk.chunk
+    record = {name: getattr(chunk, name) for name in _CHUNK_RECORD_FIELDS}
+    record['language'] = chunk.language.value
+    record['context_before'] = enhanced_chunk.context_before
+    record['context_after'] = enhanced_chunk.context_after
+    record['related_chunks'] = list(enhanced_chunk.related_chunks)
+    record['business_domain'] = enhanced_chunk.business_domain
+    record['importance_score'] = enhanced_chunk.importance_score
+    record['token_ids'] = enhanced_chunk.token_ids
+    record['tokenizer_name'] = enhanced_chunk.tokenizer_name
+    return record
+
+
+def chunk_from_record(record: Dict[str, Any]) -> EnhancedChunk:
+    """Rebuild an EnhancedChunk from a record produced by chunk_to_record."""
+    chunk_fields = {name: record.get(name) for name in _CHUNK_RECORD_FIELDS}
+    chunk = CodeChunk(language=SupportedLanguage(record['language']), **chunk_fields)
+    return EnhancedChunk(
+        chunk=chunk,
+        context_before=record.get('context_before', ''),
+        context_after=record.get('context_after', ''),
+        related_chunks=record.get('related_chunks', []),
+        business_domain=record.get('business_domain'),
+        importance_score=record.get('importance_score', 0.0),
+        token_ids=record.get('token_ids'),
+        tokenizer_name=record.get('tokenizer_name')
+    )
+
+
+def _clocks() -> Tuple[float, float]:
+    return time.perf_counter(), time.thread_time()
+
+
+def _elapsed(start: Tuple[float, float]) -> Tuple[float, float]:
+    wall, cpu = _clocks()
+    return wall - start[0], cpu - start[1]
+
+
+def analyze_file(chunker: CodeChunker,
+                 rel_path: str,
+                 content: str,
+                 language: SupportedLanguage,
+                 timings: Optional[Dict[str, Tuple[float, float]]] = None) -> Tuple[List[EnhancedChunk], Dict[str, Any]]:
+    """
+    Parse a file once, then chunk it and extract its business analysis from that parse.
+
+    Args:
+        chunker: Chunker (and parser) to use
+        rel_path: Path relative to the repository root
+        content: File content
+        language: Detected language
+        timings: Optional dict receiving (wall, cpu) seconds for the 'parse',
+            'chunk' and 'business_analysis' steps
+
+    Returns:
+        Tuple of (enhanced chunks, business analysis)
+    """
+    start = _clocks()
+    parsed = chunker.parse_file(rel_path, content, language)
+    parse_time = _elapsed(start)
+
+    start = _clocks()
+    enhanced_chunks = chunker.chunk_file(rel_path, content, language, parsed=parsed)
+    chunk_time = _elapsed(start)
+
+    start = _clocks()
+    try:
+        business_analysis = build_business_analysis(parsed.chunks, parsed.relationships, content, rel_path)
+    except Exception as e:
+        logger.warning(f"Business analysis failed for {rel_path}: {e}")
+        business_analysis = empty_business_analysis()
+
+    if timings is not None:
+        timings['parse'] = parse_time
+        timings['chunk'] = chunk_time
+        timings['business_analysis'] = _elapsed(start)
+
+    return enhanced_chunks, business_analysis
+
+
+def parse_file(chunker: CodeChunker, rel_path: str, content: str, language: SupportedLanguage) -> ParsedFile:
+    """
+    Chunk a file and extract its business analysis as a picklable ParsedFile.
+
+    Args:
+        chunker: Chunker (and parser) to use
+        rel_path: Path relative to the repository root
+        content: File content
+        language: Detected language
+
+    Returns:
+        ParsedFile with compact chunk records and per-step timings
+    """
+    timings: Dict[str, Tuple[float, float]] = {}
+    enhanced_chunks, business_analysis = analyze_file(chunker, rel_path, content, language, timings)
+
+    return ParsedFile(
+        path=rel_path,
+        language=language.value,
+        size=len(content),
+        lines=len(content.split('\n')),
+        chunks=[chunk_to_record(c) for c in enhanced_chunks],
+        business_analysis=business_analysis,
+        timings=timings
+    )
+
+
+# Per-process state, populated by the pool initializer
+_worker_chunker: Optional[CodeChunker] = None
+
+
+def _init_parse_worker(config_kwargs: Dict[str, Any]) -> None:
+    """Pool initializer: build one long-lived chunker per worker process."""
+    global _worker_chunker
+    _worker_chunker = CodeChunker(ChunkingConfig(**config_kwargs))
+
+
+def _parse_file_job(rel_path: str, content: str, language_value: str) -> ParsedFile:
+    """Entry point executed inside a worker process."""
+    if _worker_chunker is None:
+        raise RuntimeError("Parse worker is not initialized")
+    return parse_file(_worker_chunker, rel_path, content, SupportedLanguage(language_value))
+
+
+class ParseWorkerPool:
+    """Process pool that parses and chunks files off the event loop."""
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 chunking_config: Optional[ChunkingConfig] = None,
+                 start_method: str = "spawn"):
+        """
+        Initialize the parse worker pool.
+
+        Args:
+            max_workers: Number of worker processes (defaults to CPU count)
+            chunking_config: Chunking configuration shared by all workers
+            start_method: Multiprocessing start method ("spawn" avoids forking the event loop)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunking_config = chunking_config or ChunkingConfig()
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._retired = False
+
+    def start(self) -> None:
+        """Start worker processes if not already running."""
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_parse_worker,
+            initargs=(asdict(self.chunking_config),)
+        )
+        logger.info(f"Parse worker pool started with {self.max_workers} processes")
+
+    async def parse(self, rel_path: str, content: str, language: SupportedLanguage) -> ParsedFile:
+        """Parse a single file in a worker process."""
+        if self._retired and self._executor is None:
+            raise RuntimeError("Parse worker pool was retired")
+        self.start()
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, _parse_file_job, rel_path, content, language.value)
+        finally:
+            self._in_flight -= 1
+            if self._retired and self._in_flight == 0:
+                self.shutdown(wait=False)
+
+    def retire(self) -> None:
+        """Stop worker processes once the parses already submitted have finished."""
+        self._retired = True
+        if self._in_flight == 0:
+            self.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
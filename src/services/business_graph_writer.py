@@ -0,0 +1,96 @@
+"""
+Batched Neo4j writer for per-file business analysis.
+Buffers business rule, Struts, CORBA and JSP records across files and writes
+them with UNWIND bulk queries, flushing on size, on elapsed time and once at
+the end of a repository.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from ..core.neo4j_client import Neo4jClient
+from ..core.performance_metrics import performance_collector
+
+
+logger = logging.getLogger(__name__)
+
+# Record kind -> bulk Neo4jClient method
+_WRITERS = {
+    'business_rules': 'create_business_rules',
+    'struts_actions': 'create_struts_actions',
+    'corba_interfaces': 'create_corba_interfaces',
+    'jsp_components': 'create_jsp_components',
+}
+
+
+class BusinessAnalysisBatchWriter:
+    """Accumulates business analysis records for one repository and bulk-writes them."""
+
+    def __init__(self,
+                 neo4j_client: Neo4jClient,
+                 max_records: int = 5000,
+                 max_interval: float = 5.0,
+                 run_id: Optional[str] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            neo4j_client: Graph client providing the bulk create methods
+            max_records: Flush once this many records are buffered
+            max_interval: Flush on the next add once this many seconds passed since the last flush
+            run_id: Run correlation ID under which flushes are recorded as the neo4j_write stage
+        """
+        self.neo4j_client = neo4j_client
+        self.max_records = max_records
+        self.max_interval = max_interval
+        self.run_id = run_id
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in _WRITERS}
+        self._pending = 0
+        self._last_flush = time.time()
+        self._lock = asyncio.Lock()
+        self.flush_count = 0
+        self.written_records = 0
+        self.failed_records = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def add(self, records: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Buffer one file's records, flushing when the size or time threshold is reached."""
+        for kind, items in records.items():
+            if items:
+                self._buffers[kind].extend(items)
+                self._pending += len(items)
+
+        if self._pending >= self.max_records or (
+                self._pending and time.time() - self._last_flush >= self.max_interval):
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything buffered so far."""
+        async with self._lock:
+            if not self._pending:
+                return
+            buffers = self._buffers
+            self._buffers = {kind: [] for kind in _WRITERS}
+            self._pending = 0
+            self._last_flush = time.time()
+
+            with performance_collector.time_stage(self.run_id, "neo4j_write", cpu_clock=time.process_time) as sample:
+                for kind, items in buffers.items():
+                    if not items:
+                        continue
+                    try:
+                        success = await getattr(self.neo4j_client, _WRITERS[kind])(items)
+                    except Exception as e:
+                        logger.warning(f"Failed to write {len(items)} {kind}: {e}")
+                        success = False
+                    if success:
+                        self.written_records += len(items)
+                    else:
+                        self.failed_records += len(items)
+                    sample.items += len(items)
+            self.flush_count += 1
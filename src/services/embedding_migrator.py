@@ -0,0 +1,216 @@
+"""
+Background re-embedding for embedding model upgrades.
+Every registered collection is copied into a shadow collection embedded by
+the new model, page by page at bulk priority with a pause between pages, while
+the current model keeps serving queries and indexing. Once all shadows have
+caught up, the registry activates them and the serving embedding client is
+swapped in the same step, so queries never compare vectors from two models.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..core.chromadb_client import ChromaDBClient
+from ..core.embedding_registry import EmbeddingRegistry
+from ..core.embedding_scheduler import EmbeddingPriority
+from ..core.exceptions import ProcessingError
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingMigrator:
+    """Builds shadow collections for a new embedding model and switches over atomically."""
+
+    def __init__(self,
+                 chroma_client: ChromaDBClient,
+                 registry: EmbeddingRegistry,
+                 on_switch: Optional[Callable[[Any], None]] = None,
+                 page_size: int = 256,
+                 throttle_seconds: float = 0.05):
+        """
+        Initialize the migrator.
+
+        Args:
+            chroma_client: Client used for reads and shadow writes
+            registry: Embedding registry shared with the serving Chroma client
+            on_switch: Called with the new embedding client right after activation;
+                must swap the serving client synchronously
+            page_size: Records read, embedded and written per step
+            throttle_seconds: Pause between pages so indexing and queries keep priority
+        """
+        self.chroma_client = chroma_client
+        self.registry = registry
+        self.on_switch = on_switch
+        self.page_size = max(1, page_size)
+        self.throttle_seconds = max(0.0, throttle_seconds)
+        self._task: Optional[asyncio.Task] = None
+
+        # Status of the current or last job
+        self.state = "idle"  # idle, running, completed, failed
+        self.target_fingerprint: Optional[str] = None
+        self.target_model: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, target_client: Any, collections: Optional[List[str]] = None) -> asyncio.Task:
+        """
+        Re-embed in the background.
+
+        Raises:
+            ProcessingError: A re-embedding job is already running
+        """
+        if self.is_running:
+            raise ProcessingError(
+                f"Re-embedding to {self.target_model} is already running",
+                error_code="REEMBED_ALREADY_RUNNING",
+                recoverable=True
+            )
+        self._task = asyncio.create_task(self.reembed(target_client, collections))
+        return self._task
+
+    async def cancel(self) -> None:
+        if self.is_running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def reembed(self, target_client: Any, collections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Re-embed collections with target_client and switch queries over.
+
+        Args:
+            target_client: Embedding client of the new model
+            collections: Logical collections to migrate (default: all registered)
+
+        Returns:
+            Final status
+        """
+        fingerprint = target_client.config.cache_namespace()
+        self.state = "running"
+        self.target_fingerprint = fingerprint
+        self.target_model = target_client.config.model_name
+        self.started_at, self.finished_at, self.error = time.time(), None, None
+        names = collections or self.registry.logical_collections()
+        bindings = {name: self.registry.active(name) for name in names}
+        pending = [name for name, binding in bindings.items() if binding and binding.fingerprint != fingerprint]
+        logger.info(f"Re-embedding {len(pending)} collections with {self.target_model} ({fingerprint})")
+
+        switched = False
+        try:
+            for name in pending:
+                await self._build_shadow(name, target_client, fingerprint)
+
+            # Writes made by the old model while the shadows were built
+            for name in pending:
+                await self._catch_up(name, self.registry.active(name).collection, target_client, fingerprint)
+
+            # No awaits between the activations and the client swap
+            previous = {name: self.registry.active(name).collection for name in pending}
+            for name in pending:
+                self.registry.activate(name)
+            switched = True
+            if self.on_switch is not None:
+                self.on_switch(target_client)
+
+            # Old-model writes that were in flight during the switch
+            for name in pending:
+                await self._catch_up(name, previous[name], target_client, fingerprint)
+
+        except asyncio.CancelledError:
+            self.state, self.error = "failed", "cancelled"
+            for name in pending:
+                self.registry.update_shadow(name, status="failed", error="cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Re-embedding with {self.target_model} failed: {e}", exc_info=True)
+            self.state, self.error = "failed", str(e)
+            for name in pending:
+                self.registry.update_shadow(name, status="failed", error=str(e))
+            return self.status()
+        finally:
+            self.finished_at = time.time()
+            if not switched:
+                target_client.close()
+
+        self.state = "completed"
+        logger.info(f"Re-embedding with {self.target_model} completed in {self.finished_at - self.started_at:.1f}s")
+        return self.status()
+
+    async def _build_shadow(self, logical: str, target_client: Any, fingerprint: str) -> None:
+        source = self.registry.active(logical).collection
+        shadow = self.registry.begin_shadow(logical, fingerprint, target_client.config.model_name)
+        total = await self.chroma_client.count(source)
+        self.registry.update_shadow(logical, total=total)
+        logger.info(f"Building shadow collection {shadow.collection} for {logical} ({total} records)")
+
+        embedded = 0
+        offset = 0
+        while True:
+            page = await self.chroma_client.get_records(source, limit=self.page_size, offset=offset)
+            if not page.get('ids'):
+                break
+            await self._copy_page(page, shadow.collection, target_client, fingerprint)
+            embedded += len(page['ids'])
+            offset += len(page['ids'])
+            self.registry.update_shadow(logical, embedded=embedded, total=max(total, embedded))
+            await asyncio.sleep(self.throttle_seconds)
+
+    async def _catch_up(self, logical: str, source: str, target_client: Any, fingerprint: str) -> None:
+        """Copy records of source that the new model's collection does not have yet."""
+        target = self.registry.write_collection(logical, fingerprint)
+        if target == source:
+            return
+        target_ids = set(await self._all_ids(target))
+        missing = [record_id for record_id in await self._all_ids(source) if record_id not in target_ids]
+        if not missing:
+            return
+        logger.info(f"Catching up {len(missing)} records from {source} into {target}")
+        for i in range(0, len(missing), self.page_size):
+            page = await self.chroma_client.get_records(source, ids=missing[i:i + self.page_size])
+            if page.get('ids'):
+                await self._copy_page(page, target, target_client, fingerprint)
+            await asyncio.sleep(self.throttle_seconds)
+
+    async def _all_ids(self, collection: str) -> List[str]:
+        ids: List[str] = []
+        while True:
+            page = await self.chroma_client.get_records(collection, limit=10_000, offset=len(ids), include=[])
+            if not page.get('ids'):
+                return ids
+            ids.extend(page['ids'])
+
+    async def _copy_page(self, page: Dict[str, Any], collection: str, target_client: Any, fingerprint: str) -> None:
+        ids = page['ids']
+        documents = [doc if doc is not None else "" for doc in (page.get('documents') or [""] * len(ids))]
+        metadatas = [dict(meta or {}) for meta in (page.get('metadatas') or [None] * len(ids))]
+        for metadata in metadatas:
+            metadata['embedding_fingerprint'] = fingerprint
+
+        # Same input normalization the indexing pipeline applies
+        texts = [doc.strip() or "# Empty or invalid content" for doc in documents]
+        embeddings = await target_client.encode(texts, priority=EmbeddingPriority.BULK)
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        # Upsert so a restarted build can rewrite what an interrupted one left behind
+        await self.chroma_client.add_records(collection, ids, documents, metadatas, embeddings, upsert=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'target_model': self.target_model,
+            'target_fingerprint': self.target_fingerprint,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+            'collections': self.registry.status(),
+        }
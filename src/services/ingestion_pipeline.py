@@ -0,0 +1,292 @@
+"""
+Bounded streaming ingestion pipeline.
+===================================
+
+Connects the repository ingestion stages with bounded asyncio queues so chunks
+flow from the file reader to the vector/graph writers as they are produced:
+
+    read -> parse/chunk -> embed -> write
+
+Each stage runs with its own concurrency, and a full downstream queue blocks
+the upstream stage (backpressure). Memory therefore stays proportional to the
+queue sizes rather than to repository size, and the first chunks become
+searchable long before the whole repository has been parsed.
+
+The pipeline is agnostic of the processor: stages are supplied as async
+callables.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+ReadFn = Callable[[Any], Awaitable[Optional[Any]]]
+ParseFn = Callable[[Any], Awaitable[Optional[Tuple[Dict[str, Any], List[Any]]]]]
+EmbedFn = Callable[[List[Any]], Awaitable[List[Any]]]
+WriteFn = Callable[[List[Any]], Awaitable[None]]
+FileFn = Callable[[Dict[str, Any]], Awaitable[None]]
+ProgressFn = Callable[[str, 'PipelineStats'], Awaitable[None]]
+QueueDepthFn = Callable[[str, int], None]
+
+_DONE = object()
+
+
+async def _get_with_timeout(queue: asyncio.Queue, timeout: Optional[float]) -> Any:
+    """
+    Get from a queue, returning None on timeout.
+
+    Unlike asyncio.wait_for, this never swallows a cancellation of the calling
+    task, and a timed-out get leaves the item in the queue.
+    """
+    if not queue.empty():
+        return queue.get_nowait()
+    if timeout is None:
+        return await queue.get()
+    getter = asyncio.ensure_future(queue.get())
+    try:
+        done, _ = await asyncio.wait({getter}, timeout=timeout)
+    except BaseException:
+        getter.cancel()
+        raise
+    if getter in done:
+        return getter.result()
+    getter.cancel()
+    return None
+
+
+@dataclass
+class PipelineConfig:
+    """Queue bounds and per-stage concurrency."""
+    read_queue_size: int = 64
+    chunk_queue_size: int = 512
+    write_queue_size: int = 4
+    read_concurrency: int = 1
+    parse_concurrency: int = 1
+    embed_batch_size: int = 64
+    embed_max_wait: float = 0.5
+    write_concurrency: int = 2
+
+
+@dataclass
+class PipelineStats:
+    """Running counters, also used for progress reporting."""
+    total_items: int = 0
+    files_read: int = 0
+    files_parsed: int = 0
+    chunks_generated: int = 0
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    started_at: float = field(default_factory=time.time)
+    first_write_at: Optional[float] = None
+    last_file: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_items': self.total_items,
+            'files_read': self.files_read,
+            'files_parsed': self.files_parsed,
+            'chunks_generated': self.chunks_generated,
+            'chunks_embedded': self.chunks_embedded,
+            'chunks_written': self.chunks_written,
+            'elapsed': self.elapsed,
+            'time_to_first_write': (self.first_write_at - self.started_at) if self.first_write_at else None
+        }
+
+
+@dataclass
+class PipelineResult:
+    """Final counters; neither chunks nor per-file data are retained."""
+    stats: PipelineStats
+
+
+class IngestionPipeline:
+    """Staged ingestion with bounded queues between stages."""
+
+    def __init__(self,
+                 read_fn: ReadFn,
+                 parse_fn: ParseFn,
+                 embed_fn: Optional[EmbedFn] = None,
+                 write_fn: Optional[WriteFn] = None,
+                 config: Optional[PipelineConfig] = None,
+                 progress_fn: Optional[ProgressFn] = None,
+                 queue_depth_fn: Optional[QueueDepthFn] = None,
+                 file_fn: Optional[FileFn] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            read_fn: Loads one input item; returns None to skip it
+            parse_fn: Parses a loaded item into (file_data, chunks); returns None to skip it
+            embed_fn: Adds embeddings to a batch of chunks (optional)
+            write_fn: Persists a batch of chunks; raising aborts the pipeline (optional)
+            config: Queue sizes and stage concurrency
+            progress_fn: Optional async callback receiving (event, stats)
+            queue_depth_fn: Optional callback receiving (stage, depth) each time a
+                stage ('read', 'parse', 'embed', 'write') takes an item from its input queue
+            file_fn: Optional sink receiving each parsed file's data; the
+                pipeline keeps only counters, so callers aggregate what they need here
+
+        Without write_fn chunks are counted and dropped (dry runs).
+        """
+        self.read_fn = read_fn
+        self.parse_fn = parse_fn
+        self.embed_fn = embed_fn
+        self.write_fn = write_fn
+        self.config = config or PipelineConfig()
+        self.progress_fn = progress_fn
+        self.queue_depth_fn = queue_depth_fn
+        self.file_fn = file_fn
+        self.stats = PipelineStats()
+
+    async def run(self, items: Iterable[Any]) -> PipelineResult:
+        """Run all stages to completion; the first stage failure cancels the rest."""
+        items = list(items)
+        self.stats = PipelineStats(total_items=len(items))
+
+        cfg = self.config
+        item_queue: asyncio.Queue = asyncio.Queue()
+        read_queue: asyncio.Queue = asyncio.Queue(maxsize=cfg.read_queue_size)
+        chunk_queue: Optional[asyncio.Queue] = None
+        write_queue: Optional[asyncio.Queue] = None
+
+        for item in items:
+            item_queue.put_nowait(item)
+        for _ in range(cfg.read_concurrency):
+            item_queue.put_nowait(_DONE)
+
+        tasks = []
+        remaining_readers = [cfg.read_concurrency]
+        remaining_parsers = [cfg.parse_concurrency]
+
+        if self.write_fn is not None:
+            chunk_queue = asyncio.Queue(maxsize=cfg.chunk_queue_size)
+            write_queue = asyncio.Queue(maxsize=cfg.write_queue_size)
+
+        for _ in range(cfg.read_concurrency):
+            tasks.append(asyncio.create_task(self._reader(item_queue, read_queue, remaining_readers)))
+        for _ in range(cfg.parse_concurrency):
+            tasks.append(asyncio.create_task(self._parser(read_queue, chunk_queue, remaining_parsers)))
+        if self.write_fn is not None:
+            tasks.append(asyncio.create_task(self._embedder(chunk_queue, write_queue)))
+            for _ in range(cfg.write_concurrency):
+                tasks.append(asyncio.create_task(self._writer(write_queue)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return PipelineResult(stats=self.stats)
+
+    async def _notify(self, event: str) -> None:
+        if self.progress_fn is None:
+            return
+        try:
+            await self.progress_fn(event, self.stats)
+        except Exception as e:
+            logger.warning(f"Pipeline progress callback error: {e}")
+
+    def _sample_queue(self, stage: str, queue: asyncio.Queue) -> None:
+        if self.queue_depth_fn is not None:
+            self.queue_depth_fn(stage, queue.qsize())
+
+    async def _reader(self, item_queue: asyncio.Queue, read_queue: asyncio.Queue, remaining: List[int]) -> None:
+        while True:
+            item = item_queue.get_nowait()
+            if item is _DONE:
+                break
+            self._sample_queue("read", item_queue)
+            try:
+                loaded = await self.read_fn(item)
+            except Exception as e:
+                logger.warning(f"Error reading {item}: {e}")
+                continue
+            if loaded is not None:
+                self.stats.files_read += 1
+                await read_queue.put(loaded)
+
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            for _ in range(self.config.parse_concurrency):
+                await read_queue.put(_DONE)
+
+    async def _parser(self, read_queue: asyncio.Queue, chunk_queue: Optional[asyncio.Queue], remaining: List[int]) -> None:
+        while True:
+            loaded = await read_queue.get()
+            if loaded is _DONE:
+                break
+            self._sample_queue("parse", read_queue)
+            try:
+                parsed = await self.parse_fn(loaded)
+            except Exception as e:
+                logger.warning(f"Error processing file: {e}")
+                continue
+            if parsed is None:
+                continue
+
+            file_data, chunks = parsed
+            if self.file_fn is not None:
+                await self.file_fn(file_data)
+            self.stats.files_parsed += 1
+            self.stats.chunks_generated += len(chunks)
+            self.stats.last_file = file_data.get('path')
+
+            if chunk_queue is not None:
+                for chunk in chunks:
+                    await chunk_queue.put(chunk)
+            await self._notify("parsed")
+            # Inline parsing is CPU-bound; let downstream stages run between files
+            await asyncio.sleep(0)
+
+        remaining[0] -= 1
+        if remaining[0] == 0 and chunk_queue is not None:
+            await chunk_queue.put(_DONE)
+
+    async def _embedder(self, chunk_queue: asyncio.Queue, write_queue: asyncio.Queue) -> None:
+        batch: List[Any] = []
+        done = False
+        while not done:
+            timeout = self.config.embed_max_wait if batch else None
+            chunk = await _get_with_timeout(chunk_queue, timeout)
+
+            if chunk is _DONE:
+                done = True
+            elif chunk is not None:
+                self._sample_queue("embed", chunk_queue)
+                batch.append(chunk)
+                if len(batch) < self.config.embed_batch_size:
+                    continue
+
+            if batch:
+                if self.embed_fn is not None:
+                    batch = await self.embed_fn(batch)
+                self.stats.chunks_embedded += len(batch)
+                await write_queue.put(batch)
+                batch = []
+
+        for _ in range(self.config.write_concurrency):
+            await write_queue.put(_DONE)
+
+    async def _writer(self, write_queue: asyncio.Queue) -> None:
+        while True:
+            batch = await write_queue.get()
+            if batch is _DONE:
+                break
+            self._sample_queue("write", write_queue)
+            await self.write_fn(batch)
+            self.stats.chunks_written += len(batch)
+            if self.stats.first_write_at is None:
+                self.stats.first_write_at = time.time()
+            await self._notify("written")
@@ -405,12 +405,28 @@ class ProblemDetector:
             if not embedding_client:
                 return {"detected": False}
             
+            # A model that is still preloading is not slow; only time a hot model
+            if hasattr(embedding_client, "readiness"):
+                readiness = embedding_client.readiness()
+                if readiness["state"] == "failed":
+                    return {
+                        "detected": True,
+                        "metrics": {"error": readiness.get("error"), "state": "failed"},
+                        "manual_steps": [
+                            "Check embedding model availability",
+                            "Verify model dependencies",
+                            "Review embedding client configuration"
+                        ]
+                    }
+                if not readiness["ready"]:
+                    return {"detected": False}
+            
             # Test embedding generation time
             start_time = time.time()
             test_code = "def test_function(): return 'test'"
             
             try:
-                await embedding_client.generate_embedding(test_code)
+                await embedding_client.encode(test_code)
                 generation_time = time.time() - start_time
                 
                 # If embedding takes too long, flag as performance issue
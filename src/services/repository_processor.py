@@ -602,7 +602,7 @@ class RepositoryProcessor:
         
         # Store code chunks
         if code_results['chunks']:
-            await self.chroma_client.add_chunks(code_results['chunks'], repo_config.name)
+            await self.chroma_client.add_chunks(code_results['chunks'], repository=repo_config.name)
             await self.neo4j_client.create_code_chunks(code_results['chunks'], repo_config.name)
         
         # Store Maven dependencies
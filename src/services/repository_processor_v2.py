@@ -26,19 +26,31 @@ import logging
 import subprocess
 import time
 from collections import defaultdict
-from dataclasses import dataclass, field
+from dataclasses import asdict, astuple, dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Any, Union, Tuple, Callable
 import uuid
 import fnmatch
+import os
+
+import numpy as np
 
 # Core processing imports
 from ..processing.code_chunker import CodeChunker, EnhancedChunk, ChunkingConfig
 from ..processing.tree_sitter_parser import TreeSitterParser, SupportedLanguage
 from ..processing.maven_parser import MavenParser
+from ..processing.parse_worker import ParseWorkerPool, analyze_file
+from ..processing.file_reader import AsyncFileReader
+from ..processing.file_manifest import (
+    FileManifest, FileManifestEntry, IndexedFileState, IndexStateStore,
+    ManifestDiff, RepositoryIndexState, diff_manifest, hash_content
+)
 from ..processing.dependency_resolver import DependencyResolver
+from .ingestion_pipeline import IngestionPipeline, PipelineConfig, PipelineStats
+from .business_graph_writer import BusinessAnalysisBatchWriter
 from ..core.chromadb_client import ChromaDBClient
+from ..core.embedding_scheduler import EmbeddingPriority
 from ..core.neo4j_client import Neo4jClient, GraphQuery
 
 # Enhanced error handling and monitoring imports
@@ -62,6 +74,15 @@ class ProcessingStatus(str, Enum):
     RETRYING = "retrying"
 
 
+# Ingestion pipeline stage -> stage name recorded in the performance collector
+_PIPELINE_STAGES = {
+    'read': 'read',
+    'parse': 'parse',
+    'embed': 'embed',
+    'write': 'chroma_write',
+}
+
+
 def _matches_exclusion_pattern(file_path: Path, pattern: str, repo_root: Path) -> bool:
     """
     Check if a file path matches an exclusion pattern.
@@ -127,6 +148,31 @@ def _matches_exclusion_pattern(file_path: Path, pattern: str, repo_root: Path) -
         return False
 
 
+def _matches_include_pattern(relative_posix: str, pattern: str) -> bool:
+    """
+    Check if a repository-relative POSIX path matches an include pattern.
+    
+    Mirrors Path.glob semantics for the patterns we use ("**/*.java" matches at
+    any depth, "*.java" only at the root) so discovery can walk the tree once
+    instead of globbing once per pattern.
+    
+    Args:
+        relative_posix: Path relative to the repository root, POSIX separators
+        pattern: Include pattern (e.g., "**/*.java")
+        
+    Returns:
+        True if the path matches the include pattern
+    """
+    if pattern.startswith("**/"):
+        tail = pattern[3:]
+        if "/" not in tail:
+            return fnmatch.fnmatch(relative_posix.rsplit("/", 1)[-1], tail)
+        return fnmatch.fnmatch(relative_posix, pattern) or fnmatch.fnmatch(relative_posix, tail)
+    if "/" not in pattern:
+        return "/" not in relative_posix and fnmatch.fnmatch(relative_posix, pattern)
+    return fnmatch.fnmatch(relative_posix, pattern)
+
+
 class RepositoryPriority(str, Enum):
     """Repository processing priority levels."""
     LOW = "low"
@@ -330,7 +376,10 @@ class EnhancedRepositoryProcessor:
                  max_concurrent_repos: int = 5,
                  workspace_dir: str = "./data/repositories",
                  use_codebert: bool = True,
-                 embedding_client=None):
+                 embedding_client=None,
+                 parse_workers: int = 0,
+                 io_workers: int = 8,
+                 discovery_cache_bytes: int = 32 * 1024 * 1024):
         """
         Initialize the enhanced repository processor.
         
@@ -341,6 +390,9 @@ class EnhancedRepositoryProcessor:
             workspace_dir: Directory for repository storage
             use_codebert: Whether to use CodeBERT embeddings
             embedding_client: Optional embedding client for generating code embeddings
+            parse_workers: Worker processes for parsing/chunking (0 = parse inline on the event loop)
+            io_workers: Threads for non-blocking file reads, shared across concurrent repositories
+            discovery_cache_bytes: Per-repository budget for file content kept from discovery until parsing
         """
         # Core clients
         self.chroma_client = chroma_client
@@ -355,12 +407,32 @@ class EnhancedRepositoryProcessor:
         self.maven_parser = MavenParser()
         self.dependency_resolver = DependencyResolver()
         
+        # Chunking configuration; chunkers are long-lived and reused across files
+        self.chunking_config = self._chunking_config_for(embedding_client)
+        self._chunkers: Dict[Tuple, CodeChunker] = {}
+        
+        # Optional process-pool parse stage (workers hold their own parser/chunker)
+        self.parse_workers = max(0, parse_workers)
+        self.parse_pool: Optional[ParseWorkerPool] = None
+        if self.parse_workers > 0:
+            self.parse_pool = ParseWorkerPool(
+                max_workers=self.parse_workers,
+                chunking_config=self.chunking_config
+            )
+        
+        # File reads run off the event loop so concurrent repositories overlap their I/O
+        self.file_reader = AsyncFileReader(max_workers=io_workers)
+        self.discovery_cache_bytes = discovery_cache_bytes
+        
         # Processing state (pure async, no threads)
         self.processing_queue: asyncio.Queue = asyncio.Queue()
         self.active_tasks: Dict[str, asyncio.Task] = {}
         self.processing_stats = ProcessingStats()
         self.repository_cache: Dict[str, Dict[str, Any]] = {}
         
+        # Persisted per-repository manifests (file hashes and chunk IDs) for incremental re-indexing
+        self.index_state_store = IndexStateStore(self.workspace_dir / ".index_state")
+        
         # Semaphore for concurrency control
         self.semaphore = asyncio.Semaphore(max_concurrent_repos)
         
@@ -382,6 +454,8 @@ class EnhancedRepositoryProcessor:
         self.logger.info(f"- Workspace directory: {workspace_dir}")
         self.logger.info(f"- CodeBERT embeddings: {use_codebert}")
         self.logger.info(f"- Embedding client available: {embedding_client is not None}")
+        self.logger.info(f"- Parse worker processes: {self.parse_workers or 'inline'}")
+        self.logger.info(f"- File I/O threads: {self.file_reader.max_workers}")
         
         # Register diagnostic collectors
         diagnostic_collector.register_service_checker(
@@ -438,13 +512,33 @@ class EnhancedRepositoryProcessor:
             
             self.logger.debug(f"Extracted {len(chunk_contents)} content strings for embedding")
             
-            # Generate embeddings in optimized batches with error handling
+            # One client for the whole call: the serving client may be swapped by a
+            # re-embedding switch, and every row must come from the same model
+            embedding_client = self.embedding_client
+            config = getattr(embedding_client, 'config', None)
+            fingerprint = config.cache_namespace() if hasattr(config, 'cache_namespace') else None
+            
+            # Chunks sized by this model's tokenizer carry their input ids; skip re-tokenizing
+            model_name = getattr(config, 'model_name', None)
+            token_ids = [
+                getattr(chunk, 'token_ids', None) if getattr(chunk, 'tokenizer_name', None) == model_name else None
+                for chunk in chunks
+            ]
+            if any(ids is None for ids in token_ids):
+                token_ids = None
+            
+            # Generate embeddings in optimized batches with error handling; rows are
+            # written straight into one contiguous float32 matrix
             batch_size = 64  # Increased batch size for better performance (was 8)
-            all_embeddings = []
+            dimension = getattr(config, 'dimension', 768)
+            embeddings = np.zeros((len(chunks), dimension), dtype=np.float32)
             
             for batch_start in range(0, len(chunk_contents), batch_size):
                 batch_end = min(batch_start + batch_size, len(chunk_contents))
                 batch_contents = chunk_contents[batch_start:batch_end]
+                encode_kwargs = {}
+                if token_ids is not None:
+                    encode_kwargs['token_ids'] = token_ids[batch_start:batch_end]
                 
                 try:
                     batch_num = batch_start//batch_size + 1
@@ -452,64 +546,32 @@ class EnhancedRepositoryProcessor:
                     self.logger.info(f"Generating embeddings for batch {batch_num}/{total_batches} ({len(batch_contents)} items, {batch_start+len(batch_contents)}/{len(chunk_contents)} total)")
                     
                     # Call the embedding client
-                    batch_embeddings = await self.embedding_client.encode(batch_contents)
-                    
-                    # Handle different return types from embedding client
-                    if hasattr(batch_embeddings, 'shape'):
-                        # NumPy array or tensor
-                        if batch_embeddings.ndim == 2:
-                            # Batch of embeddings
-                            for embedding in batch_embeddings:
-                                if hasattr(embedding, 'tolist'):
-                                    all_embeddings.append(embedding.tolist())
-                                else:
-                                    all_embeddings.append(list(embedding))
-                        elif batch_embeddings.ndim == 1 and len(batch_contents) == 1:
-                            # Single embedding
-                            if hasattr(batch_embeddings, 'tolist'):
-                                all_embeddings.append(batch_embeddings.tolist())
-                            else:
-                                all_embeddings.append(list(batch_embeddings))
-                        else:
-                            raise ValueError(f"Unexpected embedding shape: {batch_embeddings.shape}")
-                    else:
-                        # List or other iterable
-                        if isinstance(batch_embeddings, (list, tuple)):
-                            all_embeddings.extend(batch_embeddings)
-                        else:
-                            all_embeddings.append(batch_embeddings)
+                    batch_embeddings = await embedding_client.encode(
+                        batch_contents, priority=EmbeddingPriority.BULK, **encode_kwargs
+                    )
+                    batch_embeddings = np.asarray(batch_embeddings, dtype=np.float32)
+                    if batch_embeddings.ndim == 1 and len(batch_contents) == 1:
+                        batch_embeddings = batch_embeddings.reshape(1, -1)
+                    if batch_embeddings.shape != (len(batch_contents), dimension):
+                        raise ValueError(f"Unexpected embedding shape: {batch_embeddings.shape}")
+                    embeddings[batch_start:batch_end] = batch_embeddings
                     
                     self.logger.debug(f"Successfully generated {len(batch_embeddings)} embeddings for batch")
                     
                 except Exception as batch_err:
+                    # Rows of a failed batch stay as zero placeholders
                     self.logger.error(f"Failed to generate embeddings for batch {batch_start//batch_size + 1}: {batch_err}")
-                    # Add placeholder embeddings for this batch
-                    for _ in range(len(batch_contents)):
-                        all_embeddings.append([0.0] * 768)  # CodeBERT dimension
-            
-            # Verify we have the right number of embeddings
-            if len(all_embeddings) != len(chunks):
-                self.logger.error(f"Embedding count mismatch: {len(all_embeddings)} embeddings for {len(chunks)} chunks")
-                # Pad or truncate embeddings to match chunks
-                while len(all_embeddings) < len(chunks):
-                    all_embeddings.append([0.0] * 768)
-                all_embeddings = all_embeddings[:len(chunks)]
-            
-            # Add embeddings to chunks
+            
+            # Chunks reference their row instead of holding a copy of the vector
             enhanced_chunks = []
             for i, chunk in enumerate(chunks):
                 try:
-                    embedding = all_embeddings[i]
-                    
-                    if hasattr(chunk, 'chunk'):
-                        # EnhancedChunk with nested chunk
-                        chunk.embeddings = embedding
-                        enhanced_chunks.append(chunk)
-                    else:
-                        # Direct chunk - add embeddings attribute
-                        chunk.embeddings = embedding
-                        enhanced_chunks.append(chunk)
-                        
+                    chunk.embedding_matrix = embeddings
+                    chunk.embedding_row = i
+                    if fingerprint and getattr(chunk, 'embedding_metadata', None) is not None:
+                        # Routes the chunk to the collection of this model's vector space
+                        chunk.embedding_metadata['fingerprint'] = fingerprint
+                    enhanced_chunks.append(chunk)
                 except Exception as chunk_err:
                     self.logger.warning(f"Error adding embedding to chunk {i}: {chunk_err}")
                     enhanced_chunks.append(chunk)  # Add chunk without embedding
@@ -782,13 +844,14 @@ class EnhancedRepositoryProcessor:
         
         return result
     
-    async def process_repository(self, repo_config: RepositoryConfig, run_id: Optional[str] = None, progress_callback: Optional[callable] = None) -> ProcessingResult:
+    async def process_repository(self, repo_config: RepositoryConfig, run_id: Optional[str] = None, progress_callback: Optional[callable] = None, incremental: bool = False) -> ProcessingResult:
         """
         Process a single repository with comprehensive error handling.
 
         Args:
             repo_config: Repository configuration
             run_id: Correlation ID for structured logging
+            incremental: Only re-index files changed since the last indexed state
 
         Returns:
             ProcessingResult: Detailed processing results
@@ -826,11 +889,25 @@ class EnhancedRepositoryProcessor:
                 # Phase 2: Repository analysis (20-40%)
                 await notify_progress("analyzing", 25.0, {"current_operation": "Analyzing repository structure"})
                 t1 = time.time()
-                analysis = await self._analyze_repository_async(repo_path, repo_config)
+                git_info = self.repository_cache.get(repo_config.name, {})
+                previous_state = self.index_state_store.load(repo_config.name) if incremental else None
+                changed_paths = None
+                if previous_state and previous_state.commit and previous_state.commit == git_info.get('previous_commit'):
+                    changed_paths = git_info.get('changed_paths')
+                analysis = await self._analyze_repository_async(
+                    repo_path, repo_config,
+                    previous_state=previous_state,
+                    changed_paths=changed_paths,
+                    run_id=rid
+                )
                 log_stage("analyze_done",
                           elapsed_ms=int((time.time() - t1) * 1000),
                           file_count=analysis.get('file_count', 0),
                           loc=analysis.get('lines_of_code', 0))
+                if previous_state is not None:
+                    diff = analysis['manifest_diff']
+                    log_stage("incremental_diff", git_aware=changed_paths is not None, **diff.summary())
+                    await self._remove_stale_index_entries_async(repo_config.name, previous_state, diff)
                 
                 total_files = analysis.get('file_count', 0)
                 await notify_progress("analyzing", 40.0, {
@@ -846,14 +923,14 @@ class EnhancedRepositoryProcessor:
                     "processed_files": 0
                 })
                 t2 = time.time()
-                code_results = await self._process_code_files_async(repo_path, repo_config, analysis, progress_callback)
+                code_results = await self._process_code_files_async(repo_path, repo_config, analysis, progress_callback, store=True, run_id=rid)
                 log_stage("code_processing_done",
                           elapsed_ms=int((time.time() - t2) * 1000),
-                          files=len(code_results.get('files', [])),
-                          chunks=len(code_results.get('chunks', [])))
+                          files=code_results.get('file_count', 0),
+                          chunks=code_results.get('chunk_count', 0))
                 
-                processed_files = len(code_results.get('files', []))
-                generated_chunks = len(code_results.get('chunks', []))
+                processed_files = code_results.get('file_count', 0)
+                generated_chunks = code_results.get('chunk_count', 0)
                 await notify_progress("embedding", 80.0, {
                     "current_operation": "Code processing complete",
                     "total_files": total_files,
@@ -878,10 +955,15 @@ class EnhancedRepositoryProcessor:
                 # Phase 5: Data storage (80-95%)
                 await notify_progress("storing", 90.0, {"current_operation": "Storing processed data"})
                 t4 = time.time()
-                await self._store_repository_data_async(repo_config, analysis, code_results, maven_results)
+                index_state = self._build_index_state(repo_config, analysis, code_results, previous_state, git_info.get('commit'))
+                code_results['indexed_chunk_count'] = index_state.chunk_count
+                with performance_collector.time_stage(rid, "neo4j_write", cpu_clock=time.process_time) as sample:
+                    await self._store_repository_data_async(repo_config, analysis, code_results, maven_results)
+                    sample.items = code_results['file_count']
+                self.index_state_store.save(index_state)
                 log_stage("storage_done",
                           elapsed_ms=int((time.time() - t4) * 1000),
-                          chunks=len(code_results.get('chunks', [])))
+                          chunks=code_results.get('chunk_count', 0))
                 await notify_progress("storing", 95.0, {"current_operation": "Data storage complete"})
 
                 # Phase 6: Validation and completion (95-100%)
@@ -889,8 +971,8 @@ class EnhancedRepositoryProcessor:
 
                 # Update result with success metrics
                 result.status = ProcessingStatus.COMPLETED
-                result.processed_files = len(code_results['files'])
-                result.generated_chunks = len(code_results['chunks'])
+                result.processed_files = code_results['file_count']
+                result.generated_chunks = code_results['chunk_count']
                 result.processing_time = time.time() - result.started_at
                 result.completed_at = time.time()
                 result.files_by_language = analysis.get('language_counts', {})
@@ -936,13 +1018,14 @@ class EnhancedRepositoryProcessor:
                 self.processing_stats.add_result(result)
                 return result
     
-    async def process_local_repository(self, local_config: LocalRepositoryConfig, run_id: Optional[str] = None, progress_callback: Optional[callable] = None) -> ProcessingResult:
+    async def process_local_repository(self, local_config: LocalRepositoryConfig, run_id: Optional[str] = None, progress_callback: Optional[callable] = None, incremental: bool = False) -> ProcessingResult:
         """
         Process a local repository from filesystem path with comprehensive error handling.
 
         Args:
             local_config: Local repository configuration
             run_id: Correlation ID for structured logging
+            incremental: Only re-index files changed since the last indexed state
 
         Returns:
             ProcessingResult: Detailed processing results
@@ -971,34 +1054,49 @@ class EnhancedRepositoryProcessor:
 
                 # Phase 2: Repository analysis (reuse existing logic)
                 t1 = time.time()
-                analysis = await self._analyze_repository_async(repo_path, local_config, progress_callback=progress_callback)
+                previous_state = self.index_state_store.load(local_config.name) if incremental else None
+                analysis = await self._analyze_repository_async(
+                    repo_path, local_config,
+                    progress_callback=progress_callback,
+                    previous_state=previous_state,
+                    run_id=rid
+                )
                 log_stage("analyze_done",
                           elapsed_ms=int((time.time() - t1) * 1000),
                           file_count=analysis.get('file_count', 0),
                           loc=analysis.get('lines_of_code', 0))
+                if previous_state is not None:
+                    diff = analysis['manifest_diff']
+                    log_stage("incremental_diff", git_aware=False, **diff.summary())
+                    await self._remove_stale_index_entries_async(local_config.name, previous_state, diff)
 
                 # Phase 3: Code file processing (reuse existing logic)
                 t2 = time.time()
-                code_results = await self._process_code_files_async(repo_path, local_config, analysis, progress_callback)
+                code_results = await self._process_code_files_async(repo_path, local_config, analysis, progress_callback, store=True, run_id=rid)
                 log_stage("code_processing_done",
                           elapsed_ms=int((time.time() - t2) * 1000),
-                          files=len(code_results.get('files', [])),
-                          chunks=len(code_results.get('chunks', [])))
+                          files=code_results.get('file_count', 0),
+                          chunks=code_results.get('chunk_count', 0))
 
                 # Phase 4: Maven dependency processing (optional for local)
                 maven_results = None
 
                 # Phase 5: Data storage with local metadata
                 t4 = time.time()
-                await self._store_local_repository_data_async(local_config, analysis, code_results, maven_results)
+                index_state = self._build_index_state(local_config, analysis, code_results, previous_state)
+                code_results['indexed_chunk_count'] = index_state.chunk_count
+                with performance_collector.time_stage(rid, "neo4j_write", cpu_clock=time.process_time) as sample:
+                    await self._store_local_repository_data_async(local_config, analysis, code_results, maven_results)
+                    sample.items = code_results['file_count']
+                self.index_state_store.save(index_state)
                 log_stage("storage_done",
                           elapsed_ms=int((time.time() - t4) * 1000),
-                          chunks=len(code_results.get('chunks', [])))
+                          chunks=code_results.get('chunk_count', 0))
 
                 # Update result with success metrics
                 result.status = ProcessingStatus.COMPLETED
-                result.processed_files = len(code_results['files'])
-                result.generated_chunks = len(code_results['chunks'])
+                result.processed_files = code_results['file_count']
+                result.generated_chunks = code_results['chunk_count']
                 result.processing_time = time.time() - result.started_at
                 result.completed_at = time.time()
                 result.files_by_language = analysis.get('language_counts', {})
@@ -1056,12 +1154,12 @@ class EnhancedRepositoryProcessor:
                 log_stage("dry_prepare_done", elapsed_ms=int((time.time() - t0) * 1000), path=str(repo_path))
 
                 t1 = time.time()
-                analysis = await self._analyze_repository_async(repo_path, repo_config)
+                analysis = await self._analyze_repository_async(repo_path, repo_config, run_id=rid)
                 log_stage("dry_analyze_done", elapsed_ms=int((time.time() - t1) * 1000), file_count=analysis.get('file_count', 0), loc=analysis.get('lines_of_code', 0))
 
                 t2 = time.time()
-                code_results = await self._process_code_files_async(repo_path, repo_config, analysis)
-                log_stage("dry_code_done", elapsed_ms=int((time.time() - t2) * 1000), files=len(code_results.get('files', [])), chunks=len(code_results.get('chunks', [])))
+                code_results = await self._process_code_files_async(repo_path, repo_config, analysis, run_id=rid)
+                log_stage("dry_code_done", elapsed_ms=int((time.time() - t2) * 1000), files=code_results.get('file_count', 0), chunks=code_results.get('chunk_count', 0))
 
                 # Optional: estimate maven dependency count without writes
                 maven_results = None
@@ -1076,8 +1174,8 @@ class EnhancedRepositoryProcessor:
                         self.logger.warning(f"[{rid}] Maven dry-run parse failed: {e}")
 
                 result.status = ProcessingStatus.COMPLETED
-                result.processed_files = len(code_results.get('files', []))
-                result.generated_chunks = len(code_results.get('chunks', []))
+                result.processed_files = code_results.get('file_count', 0)
+                result.generated_chunks = code_results.get('chunk_count', 0)
                 result.processing_time = time.time() - result.started_at
                 result.completed_at = time.time()
                 result.files_by_language = analysis.get('language_counts', {})
@@ -1128,16 +1226,16 @@ class EnhancedRepositoryProcessor:
                     raise ProcessingError(f"Local path is not a directory: {local_config.path}", "NOT_DIRECTORY")
 
                 t1 = time.time()
-                analysis = await self._analyze_repository_async(repo_path, local_config)
+                analysis = await self._analyze_repository_async(repo_path, local_config, run_id=rid)
                 log_stage("dry_analyze_done", elapsed_ms=int((time.time() - t1) * 1000), file_count=analysis.get('file_count', 0), loc=analysis.get('lines_of_code', 0))
 
                 t2 = time.time()
-                code_results = await self._process_code_files_async(repo_path, local_config, analysis)
-                log_stage("dry_code_done", elapsed_ms=int((time.time() - t2) * 1000), files=len(code_results.get('files', [])), chunks=len(code_results.get('chunks', [])))
+                code_results = await self._process_code_files_async(repo_path, local_config, analysis, run_id=rid)
+                log_stage("dry_code_done", elapsed_ms=int((time.time() - t2) * 1000), files=code_results.get('file_count', 0), chunks=code_results.get('chunk_count', 0))
 
                 result.status = ProcessingStatus.COMPLETED
-                result.processed_files = len(code_results.get('files', []))
-                result.generated_chunks = len(code_results.get('chunks', []))
+                result.processed_files = code_results.get('file_count', 0)
+                result.generated_chunks = code_results.get('chunk_count', 0)
                 result.processing_time = time.time() - result.started_at
                 result.completed_at = time.time()
                 result.files_by_language = analysis.get('language_counts', {})
@@ -1164,6 +1262,9 @@ class EnhancedRepositoryProcessor:
         """
         Prepare repository for processing (pure async, no threading).
         
+        Records the HEAD commit before and after the update, plus the paths
+        changed between them, in repository_cache for incremental re-indexing.
+        
         Args:
             repo_config: Repository configuration
             
@@ -1171,13 +1272,19 @@ class EnhancedRepositoryProcessor:
             Path: Path to the prepared repository
         """
         repo_path = self.workspace_dir / repo_config.name
+        git_info: Dict[str, Any] = {'previous_commit': None, 'commit': None, 'changed_paths': None}
         
         try:
             if repo_path.exists():
                 self.logger.info(f"Repository exists, updating: {repo_path}")
+                git_info['previous_commit'] = await self._get_head_commit_async(repo_path)
                 # Update existing repository
                 await self._run_git_command_async(["git", "pull"], cwd=repo_path)
                 await self._run_git_command_async(["git", "checkout", repo_config.branch], cwd=repo_path)
+                git_info['commit'] = await self._get_head_commit_async(repo_path)
+                git_info['changed_paths'] = await self._get_changed_paths_async(
+                    repo_path, git_info['previous_commit'], git_info['commit']
+                )
             else:
                 self.logger.info(f"Cloning repository: {repo_config.url}")
                 # Clone repository (skip for dummy URLs since local repo exists)
@@ -1193,7 +1300,9 @@ class EnhancedRepositoryProcessor:
                         error_code="REPO_NOT_FOUND",
                         recoverable=False
                     )
+                git_info['commit'] = await self._get_head_commit_async(repo_path)
             
+            self.repository_cache.setdefault(repo_config.name, {}).update(git_info)
             return repo_path
             
         except subprocess.CalledProcessError as e:
@@ -1209,6 +1318,33 @@ class EnhancedRepositoryProcessor:
                 recoverable=True
             )
     
+    async def _get_head_commit_async(self, repo_path: Path) -> Optional[str]:
+        """Return the HEAD commit of a working copy, or None if it is not a git repository."""
+        try:
+            return await self._run_git_command_async(["git", "rev-parse", "HEAD"], cwd=repo_path) or None
+        except ProcessingError:
+            return None
+    
+    async def _get_changed_paths_async(self, repo_path: Path, old_commit: Optional[str], new_commit: Optional[str]) -> Optional[Set[str]]:
+        """
+        Return repository-relative POSIX paths changed between two commits.
+        
+        Returns:
+            Optional[Set[str]]: Changed paths, or None when the diff is unavailable
+        """
+        if not old_commit or not new_commit:
+            return None
+        if old_commit == new_commit:
+            return set()
+        try:
+            output = await self._run_git_command_async(
+                ["git", "diff", "--name-only", old_commit, new_commit], cwd=repo_path
+            )
+            return {line.strip() for line in output.splitlines() if line.strip()}
+        except ProcessingError as e:
+            self.logger.warning(f"git diff unavailable for {repo_path}: {e}")
+            return None
+    
     async def _run_git_command_async(self, command: List[str], cwd: Optional[Path] = None) -> str:
         """
         Run git command asynchronously without threading.
@@ -1252,7 +1388,156 @@ class EnhancedRepositoryProcessor:
                 recoverable=True
             )
     
-    async def _analyze_repository_async(self, repo_path: Path, repo_config: Union[RepositoryConfig, LocalRepositoryConfig], progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+    async def _discover_files_async(self,
+                                    repo_path: Path,
+                                    repo_config: Union[RepositoryConfig, LocalRepositoryConfig],
+                                    progress_callback: Optional[callable] = None,
+                                    previous_state: Optional[RepositoryIndexState] = None,
+                                    changed_paths: Optional[Set[str]] = None,
+                                    run_id: Optional[str] = None) -> FileManifest:
+        """
+        Walk the repository once and build the file manifest.
+        
+        Each candidate file is matched against include/exclude patterns, stat'ed,
+        read once (batches are read concurrently off the event loop),
+        language-detected and hashed. Content of files the parsing stage will
+        take (non-blank, known language) stays cached in the manifest up to
+        discovery_cache_bytes, so those files are not read again; anything
+        beyond the budget is re-read by the pipeline's reader stage.
+        
+        When a previous index state is given, files known to be unchanged (not in
+        the git diff, or same size and mtime when no diff is available) reuse the
+        recorded entry and are not read at all.
+        
+        Reading is recorded as the 'read' stage; the walk, stat, language
+        detection and hashing as 'discovery'.
+        
+        Args:
+            repo_path: Path to repository
+            repo_config: Repository configuration
+            progress_callback: Optional async function to report progress
+            previous_state: Last persisted index state, for incremental runs
+            changed_paths: Repository-relative POSIX paths changed according to git
+            run_id: Run correlation ID for stage metrics
+            
+        Returns:
+            FileManifest: Discovered files in walk order
+        """
+        manifest = FileManifest(repo_path, max_cached_bytes=self.discovery_cache_bytes)
+        discovery_started = time.perf_counter()
+        discovery_cpu_started = time.thread_time()
+        read_wall = 0.0
+        
+        # Single walk; excluded directories are pruned instead of descended into
+        candidates: List[Path] = []
+        for dir_path, dir_names, file_names in os.walk(repo_path):
+            current = Path(dir_path)
+            dir_names[:] = sorted(
+                d for d in dir_names
+                if not any(_matches_exclusion_pattern(current / d / "_", pattern, repo_path)
+                           for pattern in repo_config.exclude_patterns)
+            )
+            for file_name in sorted(file_names):
+                file_path = current / file_name
+                relative_posix = file_path.relative_to(repo_path).as_posix()
+                if not any(_matches_include_pattern(relative_posix, pattern) for pattern in repo_config.include_patterns):
+                    continue
+                if any(_matches_exclusion_pattern(file_path, pattern, repo_path) for pattern in repo_config.exclude_patterns):
+                    continue
+                candidates.append(file_path)
+        
+        batch_size = repo_config.max_files_per_batch
+        for i in range(0, len(candidates), batch_size):
+            to_read: List[Tuple[Path, str, os.stat_result]] = []
+            for file_path in candidates[i:i + batch_size]:
+                try:
+                    stat = file_path.stat()
+                except (OSError, PermissionError) as e:
+                    self.logger.warning(f"Cannot access file {file_path}: {e}")
+                    continue
+                if not file_path.is_file() or stat.st_size > repo_config.max_file_size:
+                    continue
+                
+                relative_path = str(file_path.relative_to(repo_path))
+                known = previous_state.files.get(relative_path) if previous_state else None
+                if known is not None and known.size == stat.st_size:
+                    if changed_paths is not None:
+                        unchanged = Path(relative_path).as_posix() not in changed_paths
+                    else:
+                        unchanged = known.mtime == stat.st_mtime
+                    if unchanged:
+                        manifest.add(FileManifestEntry(
+                            path=file_path,
+                            relative_path=relative_path,
+                            size=stat.st_size,
+                            mtime=stat.st_mtime,
+                            language=known.language,
+                            content_hash=known.content_hash,
+                            lines=known.lines,
+                            encoding=known.encoding
+                        ))
+                        continue
+                
+                to_read.append((file_path, relative_path, stat))
+            
+            # Read the batch concurrently off the event loop
+            read_started = time.perf_counter()
+            decoded_files = await self.file_reader.read_batch([file_path for file_path, _, _ in to_read])
+            batch_read_wall = time.perf_counter() - read_started
+            read_wall += batch_read_wall
+            read_files = [decoded for decoded in decoded_files if decoded is not None]
+            if read_files:
+                performance_collector.record_stage(
+                    run_id, "read",
+                    wall_time=batch_read_wall,
+                    cpu_time=sum(decoded.cpu_time for decoded in read_files),
+                    bytes_read=sum(decoded.size for decoded in read_files),
+                    items=len(read_files)
+                )
+            for (file_path, relative_path, stat), decoded in zip(to_read, decoded_files):
+                if decoded is None:
+                    continue
+                content = decoded.content
+                language = self.tree_sitter_parser.detect_language(str(file_path), content)
+                parseable = language is not None and bool(content.strip())
+                manifest.add(FileManifestEntry(
+                    path=file_path,
+                    relative_path=relative_path,
+                    size=stat.st_size,
+                    mtime=stat.st_mtime,
+                    language=language.value if language else None,
+                    content_hash=hash_content(content),
+                    lines=len(content.split('\n')),
+                    encoding=decoded.encoding
+                ), content if parseable else None)
+            
+            # Yield control periodically
+            await asyncio.sleep(0)
+            
+            # Report progress if callback is provided
+            if progress_callback:
+                progress_percent = 20.0 + (i / len(candidates)) * 20.0  # 20-40% range
+                await progress_callback("analyzing", progress_percent, {
+                    "current_operation": f"Analyzed batch {i//batch_size + 1}",
+                    "processed_files": min(i + batch_size, len(candidates)),
+                    "total_files": len(candidates)
+                })
+        
+        performance_collector.record_stage(
+            run_id, "discovery",
+            wall_time=time.perf_counter() - discovery_started - read_wall,
+            cpu_time=time.thread_time() - discovery_cpu_started,
+            items=len(candidates)
+        )
+        return manifest
+    
+    async def _analyze_repository_async(self,
+                                        repo_path: Path,
+                                        repo_config: Union[RepositoryConfig, LocalRepositoryConfig],
+                                        progress_callback: Optional[callable] = None,
+                                        previous_state: Optional[RepositoryIndexState] = None,
+                                        changed_paths: Optional[Set[str]] = None,
+                                        run_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze repository structure asynchronously.
         
@@ -1260,10 +1545,16 @@ class EnhancedRepositoryProcessor:
             repo_path: Path to repository
             repo_config: Repository configuration
             progress_callback: Optional async function to report progress
+            previous_state: Last persisted index state, for incremental runs
+            changed_paths: Repository-relative POSIX paths changed according to git
+            run_id: Run correlation ID for stage metrics
             
         Returns:
-            Dict[str, Any]: Repository analysis results
-        """#
+            Dict[str, Any]: Repository analysis results, including the file
+            manifest under 'manifest' for reuse by later stages and, for
+            incremental runs, the diff against the previous state under
+            'manifest_diff'
+        """
         analysis = {
             'languages': set(),
             'file_count': 0,
@@ -1280,64 +1571,34 @@ class EnhancedRepositoryProcessor:
         try:
             self.logger.info(f"Analyzing repository structure: {repo_path}")
             
-            # Find all relevant files
-            files = []
-            for pattern in repo_config.include_patterns:
-                pattern_files = list(repo_path.glob(pattern))
-                files.extend(pattern_files)
-            
-            # Filter by exclusion patterns and size
-            filtered_files = []
-            for file_path in files:
-                # Check exclusion patterns
-                excluded = False
-                for pattern in repo_config.exclude_patterns:
-                    if _matches_exclusion_pattern(file_path, pattern, repo_path):
-                        excluded = True
-                        break
-                
-                if not excluded and file_path.is_file():
-                    try:
-                        file_size = file_path.stat().st_size
-                        if file_size <= repo_config.max_file_size:
-                            filtered_files.append(file_path)
-                    except (OSError, PermissionError) as e:
-                        self.logger.warning(f"Cannot access file {file_path}: {e}")
-            
-            # Analyze files in batches
-            batch_size = repo_config.max_files_per_batch
-            total_lines = 0
+            manifest = await self._discover_files_async(
+                repo_path, repo_config, progress_callback,
+                previous_state=previous_state,
+                changed_paths=changed_paths,
+                run_id=run_id
+            )
             
-            for i in range(0, len(filtered_files), batch_size):
-                batch = filtered_files[i:i + batch_size]
-                batch_results = await self._analyze_file_batch_async(batch, repo_path)
-                
-                # Aggregate results
-                for result in batch_results:
-                    if result['language']:
-                        analysis['languages'].add(result['language'])
-                        analysis['language_counts'][result['language']] += 1
-                    
-                    extension = result['file_path'].suffix.lower()
-                    analysis['file_extensions'][extension] += 1
-                    total_lines += result['lines']
+            # Aggregate results
+            total_lines = 0
+            for entry in manifest:
+                if entry.language:
+                    analysis['languages'].add(entry.language)
+                    analysis['language_counts'][entry.language] += 1
                 
-                # Yield control periodically
-                await asyncio.sleep(0)
-
-                # Report progress if callback is provided
-                if progress_callback:
-                    progress_percent = 20.0 + (i / len(filtered_files)) * 20.0  # 20-40% range
-                    await progress_callback("analyzing", progress_percent, {
-                        "current_operation": f"Analyzed batch {i//batch_size + 1}",
-                        "processed_files": i + len(batch),
-                        "total_files": len(filtered_files)
-                    })
+                extension = entry.path.suffix.lower()
+                analysis['file_extensions'][extension] += 1
+                total_lines += entry.lines
             
             # Finalize analysis
-            analysis['file_count'] = len(filtered_files)
+            analysis['file_count'] = len(manifest)
             analysis['lines_of_code'] = total_lines
             analysis['languages'] = list(analysis['languages'])
+            analysis['manifest'] = manifest
+            if previous_state is not None:
+                analysis['manifest_diff'] = diff_manifest(previous_state, manifest)
+                # Touched but identical files are not parsed again
+                for rel_path in analysis['manifest_diff'].unchanged:
+                    manifest.release(rel_path)
             
             # Determine main language
             if analysis['language_counts']:
@@ -1358,178 +1619,231 @@ class EnhancedRepositoryProcessor:
                 recoverable=True
             )
     
-    async def _analyze_file_batch_async(self, files: List[Path], repo_path: Path) -> List[Dict[str, Any]]:
+    async def _read_file_async(self, file_path: Path, encoding: Optional[str] = None, run_id: Optional[str] = None) -> str:
         """
-        Analyze a batch of files asynchronously.
+        Read file content without blocking the event loop.
         
         Args:
-            files: List of file paths to analyze
-            repo_path: Repository root path
+            file_path: Path to file
+            encoding: Encoding recorded at discovery; detected when not given
+            run_id: Run correlation ID for stage metrics
             
         Returns:
-            List[Dict[str, Any]]: Analysis results for each file
+            str: File content
         """
-        results = []
-        
-        for file_path in files:
-            try:
-                # Read file content asynchronously
-                content = await self._read_file_async(file_path)
-                
-                # Detect language
-                language = self.tree_sitter_parser.detect_language(str(file_path), content)
-                language_str = language.value if language else None
-                
-                # Count lines
-                lines = len(content.split('\n'))
-                
-                results.append({
-                    'file_path': file_path,
-                    'relative_path': str(file_path.relative_to(repo_path)),
-                    'language': language_str,
-                    'lines': lines,
-                    'size': len(content)
-                })
-                
-            except Exception as e:
-                self.logger.warning(f"Error analyzing file {file_path}: {e}")
-                results.append({
-                    'file_path': file_path,
-                    'relative_path': str(file_path.relative_to(repo_path)),
-                    'language': None,
-                    'lines': 0,
-                    'size': 0
-                })
-        
-        return results
+        try:
+            started = time.perf_counter()
+            decoded = await self.file_reader.read(file_path, encoding)
+            performance_collector.record_stage(
+                run_id, "read",
+                wall_time=time.perf_counter() - started,
+                cpu_time=decoded.cpu_time,
+                bytes_read=decoded.size,
+                items=1
+            )
+            return decoded.content
+        except Exception as e:
+            self.logger.warning(f"Error reading file {file_path}: {e}")
+            return ""
     
-    async def _read_file_async(self, file_path: Path) -> str:
+    async def _load_file_for_parsing_async(self,
+                                           file_path: Path,
+                                           repo_path: Path,
+                                           manifest: Optional[FileManifest] = None,
+                                           run_id: Optional[str] = None) -> Tuple[str, str, Optional[SupportedLanguage]]:
         """
-        Read file content asynchronously.
+        Get content and language for a file, preferring the discovery manifest.
+        
+        Cached content is released from the manifest once handed to the parser.
         
         Args:
             file_path: Path to file
+            repo_path: Repository root path
+            manifest: Discovery manifest, if available
+            run_id: Run correlation ID for stage metrics
             
         Returns:
-            str: File content
+            Tuple of (relative path, content, language)
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            return content
-        except Exception as e:
-            self.logger.warning(f"Error reading file {file_path}: {e}")
-            return ""
+        rel_path = str(file_path.relative_to(repo_path))
+        entry = manifest.get(rel_path) if manifest is not None else None
+        
+        content = manifest.get_content(rel_path) if entry is not None else None
+        if content is None:
+            content = await self._read_file_async(file_path, entry.encoding if entry is not None else None, run_id)
+        else:
+            manifest.release(rel_path)
+        
+        if entry is not None and entry.language:
+            language = SupportedLanguage(entry.language)
+        elif entry is not None:
+            language = None
+        else:
+            language = self.tree_sitter_parser.detect_language(str(file_path), content)
+        
+        return rel_path, content, language
     
     async def _process_code_files_async(self, 
                                       repo_path: Path, 
                                       repo_config: RepositoryConfig,
                                       analysis: Dict[str, Any],
-                                      progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+                                      progress_callback: Optional[callable] = None,
+                                      store: bool = False,
+                                      run_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Process code files asynchronously without threading.
+        Stream code files through the bounded ingestion pipeline.
+        
+        Files are read, parsed, embedded and written to ChromaDB concurrently,
+        so chunks are never accumulated for the whole repository.
         
         Args:
             repo_path: Repository path
             repo_config: Repository configuration
             analysis: Repository analysis results
+            progress_callback: Optional async function to report progress
+            store: Embed and write chunks and business analysis; False for dry runs
+            run_id: Run correlation ID for per-stage metrics
             
         Returns:
-            Dict[str, Any]: Processing results
+            Dict[str, Any]: Processing results (file and chunk counts, chunk IDs per file)
         """
-        files_data = []
-        all_chunks = []
-        
         try:
-            start_time = time.time()
             self.logger.info(f"Processing code files for repository: {repo_config.name}")
             
-            # Find all code files
-            code_files = []
-            for pattern in repo_config.include_patterns:
-                code_files.extend(repo_path.glob(pattern))
-            
-            # Filter files
-            filtered_files = []
-            for file_path in code_files:
-                # Check exclusion patterns
-                excluded = False
-                for pattern in repo_config.exclude_patterns:
-                    if _matches_exclusion_pattern(file_path, pattern, repo_path):
-                        excluded = True
-                        break
-                
-                if not excluded and file_path.is_file():
-                    try:
-                        if file_path.stat().st_size <= repo_config.max_file_size:
-                            filtered_files.append(file_path)
-                    except (OSError, PermissionError):
-                        continue            
-                
-            
+            # Reuse the discovery manifest (single walk, single read per file)
+            manifest = analysis.get('manifest')
+            if manifest is None:
+                manifest = await self._discover_files_async(repo_path, repo_config, run_id=run_id)
+            filtered_files = manifest.paths
+            
+            # Incremental runs only parse added or changed files
+            manifest_diff: Optional[ManifestDiff] = analysis.get('manifest_diff')
+            if manifest_diff is not None:
+                filtered_files = [manifest.get(rel_path).path for rel_path in manifest_diff.to_process]
+            
+            business_writer = BusinessAnalysisBatchWriter(self.neo4j_client, run_id=run_id) if store else None
+            skipped_files: List[str] = []  # nothing to parse; files that failed are in neither list
+            
+            async def read_file(file_path: Path):
+                rel_path, content, language = await self._load_file_for_parsing_async(file_path, repo_path, manifest, run_id)
+                if not content.strip() or not language:
+                    skipped_files.append(rel_path)
+                    return None
+                return rel_path, content, language
+            
+            async def parse_file(loaded):
+                rel_path, content, language = loaded
+                file_data, chunks = await self._parse_file_async(rel_path, content, language, run_id)
+                for chunk in chunks:
+                    if not chunk.business_domain:
+                        chunk.business_domain = repo_config.business_domain
+                    # Stored as Chroma metadata so searches can filter server-side
+                    chunk.embedding_metadata['repository'] = repo_config.name
+                    chunk.embedding_metadata['file_path'] = rel_path
+                if business_writer is not None:
+                    # ENHANCED: Buffer business analysis for batched Neo4j writes
+                    await business_writer.add(
+                        self._business_analysis_records(file_data['business_analysis'], rel_path, repo_config.name)
+                    )
+                return file_data, chunks
+            
+            async def embed_chunks(chunks: List[EnhancedChunk]) -> List[EnhancedChunk]:
+                # The model runs on its own threads, so CPU is measured process-wide
+                with performance_collector.time_stage(run_id, "embed", cpu_clock=time.process_time) as sample:
+                    sample.items = len(chunks)
+                    return await self._generate_embeddings_for_chunks(chunks)
+            
+            async def write_chunks(chunks: List[EnhancedChunk]):
+                with performance_collector.time_stage(run_id, "chroma_write", cpu_clock=time.process_time) as sample:
+                    sample.items = len(chunks)
+                    success = await self.chroma_client.add_chunks(chunks, repository=repo_config.name)
+                if not success:
+                    raise ProcessingError(
+                        "Failed to store chunks in ChromaDB",
+                        error_code="CHROMADB_STORAGE_ERROR",
+                        recoverable=True
+                    )
             
-            # Process files in batches with progress tracking
-            batch_size = repo_config.max_files_per_batch
             total_files = len(filtered_files)
-            processed_files = 0
             
-            for i in range(0, len(filtered_files), batch_size):
-                batch = filtered_files[i:i + batch_size]
-                
-                # Update progress before processing batch
-                if progress_callback:
-                    current_file = str(batch[0].relative_to(repo_path)) if batch else None
-                    progress_percent = 40.0 + (processed_files / total_files) * 35.0  # 40-75% range
-                    try:
-                        await progress_callback("parsing", progress_percent, {
-                            "current_file": current_file,
-                            "processed_files": processed_files,
-                            "total_files": total_files,
-                            "current_operation": f"Processing files batch {i//batch_size + 1}"
-                        })
-                    except Exception as e:
-                        self.logger.warning(f"Progress callback error: {e}")
-                
-                batch_results = await self._process_file_batch_async(batch, repo_path, repo_config, progress_callback)
-                
-                files_data.extend(batch_results['files'])
-                all_chunks.extend(batch_results['chunks'])
-                processed_files += len(batch)
-                
-                # Update progress after processing batch
-                if progress_callback:
-                    progress_percent = 40.0 + (processed_files / total_files) * 35.0  # 40-75% range
-                    try:
-                        await progress_callback("embedding", progress_percent, {
-                            "processed_files": processed_files,
-                            "total_files": total_files,
-                            "generated_chunks": len(all_chunks),
-                            "current_operation": f"Generated {len(all_chunks)} code chunks",
-                            "embedding_progress": {
-                                "total_chunks": len(all_chunks),
-                                "embedded_chunks": len(all_chunks),
-                                "embedding_rate": len(all_chunks) / max(time.time() - start_time, 1) if 'start_time' in locals() else 0,
-                                "current_file": str(batch[-1].relative_to(repo_path)) if batch else None
-                            }
-                        })
-                    except Exception as e:
-                        self.logger.warning(f"Progress callback error: {e}")
-                
-                # Yield control and log progress
-                await asyncio.sleep(0)
-                self.logger.debug(f"Processed batch {i//batch_size + 1}/{(len(filtered_files) + batch_size - 1)//batch_size}")
+            # Only the chunk IDs per file outlive the pipeline (for the index state);
+            # business analysis was already handed to the batch writer by parse_file
+            chunk_ids_by_file: Dict[str, List[str]] = {}
+            
+            async def record_file(file_data: Dict[str, Any]):
+                chunk_ids_by_file[file_data['path']] = file_data.get('chunk_ids', [])
+            
+            async def report_progress(event: str, stats: PipelineStats):
+                if not progress_callback:
+                    return
+                if event == "parsed":
+                    progress_percent = 40.0 + (stats.files_parsed / max(total_files, 1)) * 35.0  # 40-75% range
+                    await progress_callback("parsing", progress_percent, {
+                        "current_file": stats.last_file,
+                        "processed_files": stats.files_parsed,
+                        "total_files": total_files,
+                        "generated_chunks": stats.chunks_generated
+                    })
+                else:
+                    progress_percent = 40.0 + (stats.files_parsed / max(total_files, 1)) * 35.0
+                    await progress_callback("embedding", progress_percent, {
+                        "processed_files": stats.files_parsed,
+                        "total_files": total_files,
+                        "generated_chunks": stats.chunks_generated,
+                        "current_operation": f"Stored {stats.chunks_written} code chunks",
+                        "embedding_progress": {
+                            "total_chunks": stats.chunks_generated,
+                            "embedded_chunks": stats.chunks_embedded,
+                            "embedding_rate": stats.chunks_embedded / max(stats.elapsed, 1),
+                            "current_file": stats.last_file
+                        }
+                    })
+            
+            pipeline = IngestionPipeline(
+                read_fn=read_file,
+                parse_fn=parse_file,
+                embed_fn=embed_chunks if store else None,
+                write_fn=write_chunks if store else None,
+                config=PipelineConfig(parse_concurrency=max(self.parse_workers, 1)),
+                progress_fn=report_progress,
+                queue_depth_fn=lambda stage, depth: performance_collector.record_queue_depth(
+                    run_id, _PIPELINE_STAGES[stage], depth
+                ),
+                file_fn=record_file
+            )
+            try:
+                pipeline_result = await pipeline.run(filtered_files)
+            finally:
+                # Files the pipeline never reached (errors, skipped files) keep no content alive
+                manifest.release_all()
+            stats = pipeline_result.stats
+            if business_writer is not None:
+                await business_writer.flush()
+                self.logger.info(
+                    f"Business analysis for {repo_config.name}: {business_writer.written_records} graph records "
+                    f"in {business_writer.flush_count} flushes ({business_writer.failed_records} failed)"
+                )
+            self.logger.info(
+                f"Pipeline finished for {repo_config.name}: {stats.files_parsed} files, "
+                f"{stats.chunks_generated} chunks, {stats.chunks_written} written in {stats.elapsed:.2f}s"
+            )
             
             return {
-                'files': files_data,
-                'chunks': all_chunks,
+                'file_count': stats.files_parsed,
+                'chunk_count': stats.chunks_generated,
+                'chunk_ids_by_file': chunk_ids_by_file,
+                'skipped_files': skipped_files,
                 'statistics': {
-                    'total_files': len(files_data),
-                    'total_chunks': len(all_chunks),
+                    'total_files': stats.files_parsed,
+                    'total_chunks': stats.chunks_generated,
                     'languages': analysis['languages'],
-                    'lines_of_code': analysis['lines_of_code']
+                    'lines_of_code': analysis['lines_of_code'],
+                    'pipeline': stats.to_dict()
                 }
             }
             
+        except ProcessingError:
+            raise
         except Exception as e:
             raise ProcessingError(
                 f"Code file processing failed: {e}",
@@ -1537,96 +1851,104 @@ class EnhancedRepositoryProcessor:
                 recoverable=True
             )
     
-    async def _process_file_batch_async(self, 
-                                       files: List[Path], 
-                                       repo_path: Path,
-                                       repo_config: RepositoryConfig,
-                                       progress_callback: Optional[callable] = None) -> Dict[str, Any]:
+    async def _parse_file_async(self,
+                                rel_path: str,
+                                content: str,
+                                language: SupportedLanguage,
+                                run_id: Optional[str] = None) -> Tuple[Dict[str, Any], List[EnhancedChunk]]:
         """
-        Process a batch of files asynchronously (no threading).
+        Parse and chunk a single file, in the worker pool when configured.
         
         Args:
-            files: Files to process
-            repo_path: Repository root path
-            repo_config: Repository configuration
-            progress_callback: Optional async function to report progress
+            rel_path: Path relative to the repository root
+            content: File content
+            language: Detected language
+            run_id: Run correlation ID for parse/chunk/business analysis stage metrics
             
         Returns:
-            Dict[str, Any]: Batch processing results
+            Tuple of (file data, enhanced chunks)
         """
-        batch_files = []
-        batch_chunks = []
+        if self.parse_pool is not None:
+            parsed = await self.parse_pool.parse(rel_path, content, language)
+            chunks = parsed.to_enhanced_chunks()
+            self._record_parse_timings(run_id, parsed.timings, len(chunks))
+            return parsed.to_file_data(), chunks
         
-        for file_path in files:
-            try:
-                # Read file content
-                content = await self._read_file_async(file_path)
-                if not content.strip():
-                    continue
-                
-                # Detect language
-                language = self.tree_sitter_parser.detect_language(str(file_path), content)
-                if not language:
-                    continue
-                
-                # Generate relative path
-                rel_path = str(file_path.relative_to(repo_path))
-                
-                # Create chunking config
-                chunking_config = ChunkingConfig(
-                    max_chunk_size=1000,
-                    min_chunk_size=100,
-                    include_context=True,
-                    semantic_splitting=True
-                )
-                
-                # Create chunker with config
-                chunker = CodeChunker(chunking_config)
-                
-                # Generate chunks with enhanced parsing
-                chunks = chunker.chunk_file(rel_path, content, language)
-                
-                # ENHANCED: Extract business rules and framework patterns
-                business_analysis = await self._extract_business_analysis(content, rel_path, language)
-                
-                # Store file data with business context
-                file_data = {
-                    'path': rel_path,
-                    'language': language.value,
-                    'size': len(content),
-                    'lines': len(content.split('\n')),
-                    'chunks_count': len(chunks),
-                    'business_analysis': business_analysis
-                }
-                
-                batch_files.append(file_data)
-                batch_chunks.extend(chunks)
-                
-                # ENHANCED: Store business analysis in Neo4j
-                await self._store_business_analysis_to_neo4j(business_analysis, rel_path, repo_config.name)
-                
-                # Yield control periodically for async processing
-                if len(batch_files) % 5 == 0:
-                    await asyncio.sleep(0)
-
-                # Report progress if callback is provided
-                if progress_callback:
-                    progress_percent = 40.0 + (len(batch_files) / len(files)) * 40.0  # 40-80% range
-                    await progress_callback("parsing", progress_percent, {
-                        "current_file": rel_path,
-                        "processed_files": len(batch_files),
-                        "total_files": len(files),
-                        "generated_chunks": len(batch_chunks)
-                    })
-                
-            except Exception as e:
-                self.logger.warning(f"Error processing file {file_path}: {e}")
+        chunker = self._get_chunker()
         
-        return {
-            'files': batch_files,
-            'chunks': batch_chunks
+        # Parse once; chunks and business rules/framework patterns share the parse
+        timings: Dict[str, Tuple[float, float]] = {}
+        chunks, business_analysis = analyze_file(chunker, rel_path, content, language, timings)
+        self._record_parse_timings(run_id, timings, len(chunks))
+        
+        # Store file data with business context
+        file_data = {
+            'path': rel_path,
+            'language': language.value,
+            'size': len(content),
+            'lines': len(content.split('\n')),
+            'chunks_count': len(chunks),
+            'chunk_ids': [c.chunk.id for c in chunks],
+            'business_analysis': business_analysis
         }
-    
+        return file_data, chunks
+
+    def _record_parse_timings(self, run_id: Optional[str], timings: Dict[str, Tuple[float, float]], chunk_count: int) -> None:
+        """Record the parse, chunk and business analysis steps of one file as stage metrics."""
+        for stage, (wall_time, cpu_time) in timings.items():
+            performance_collector.record_stage(
+                run_id, stage,
+                wall_time=wall_time,
+                cpu_time=cpu_time,
+                items=chunk_count if stage == 'chunk' else 1
+            )
+
+    def _chunking_config_for(self, embedding_client) -> ChunkingConfig:
+        """With an embedding model, chunks are also sized by its tokenizer so none is truncated."""
+        embedding_config = getattr(embedding_client, 'config', None) if self.use_codebert else None
+        return ChunkingConfig(
+            max_chunk_size=1000,
+            min_chunk_size=100,
+            include_context=True,
+            semantic_splitting=True,
+            tokenizer_name=getattr(embedding_config, 'model_name', None),
+            max_chunk_tokens=getattr(embedding_config, 'max_length', 512),
+            token_preprocessing=getattr(embedding_config, 'code_preprocessing', True),
+            token_include_comments=getattr(embedding_config, 'include_comments', True)
+        )
+
+    def set_embedding_client(self, embedding_client) -> None:
+        """
+        Embed with another model from now on (after a re-embedding switch).
+        
+        Chunks are sized by the new model's tokenizer; the old parse pool shuts
+        down as soon as the files already handed to it are parsed.
+        """
+        self.embedding_client = embedding_client
+        self.chunking_config = self._chunking_config_for(embedding_client)
+        if self.parse_pool is not None:
+            retired = self.parse_pool
+            self.parse_pool = ParseWorkerPool(
+                max_workers=self.parse_workers,
+                chunking_config=self.chunking_config
+            )
+            retired.retire()
+
+    def _get_chunker(self, config: Optional[ChunkingConfig] = None) -> CodeChunker:
+        """
+        Return the long-lived chunker for a chunking configuration.
+        
+        Chunkers share the processor's parser; inline parsing runs on the event
+        loop only, so reuse across files and repositories is safe.
+        """
+        config = config or self.chunking_config
+        key = astuple(config)
+        chunker = self._chunkers.get(key)
+        if chunker is None:
+            chunker = CodeChunker(config, parser=self.tree_sitter_parser)
+            self._chunkers[key] = chunker
+        return chunker
+
     async def _process_maven_dependencies_async(self, 
                                                repo_path: Path, 
                                                repo_config: RepositoryConfig) -> Optional[Dict[str, Any]]:
@@ -1694,7 +2016,7 @@ class EnhancedRepositoryProcessor:
                                           code_results: Dict[str, Any],
                                           maven_results: Optional[Dict[str, Any]]):
         """
-        Store repository data in ChromaDB and Neo4j asynchronously.
+        Store repository metadata in Neo4j once the pipeline has written all chunks.
         
         Args:
             repo_config: Repository configuration
@@ -1705,39 +2027,7 @@ class EnhancedRepositoryProcessor:
         try:
             self.logger.info(f"Storing repository data: {repo_config.name}")
             
-            # Store code chunks in ChromaDB
-            if code_results['chunks']:
-                enhanced_chunks = []
-                for chunk in code_results['chunks']:
-                    enhanced_chunk = EnhancedChunk(
-                        chunk=chunk,
-                        business_domain=repo_config.business_domain,
-                        importance_score=1.0,
-                        context_before="",
-                        context_after="",
-                        related_chunks=[]
-                    )
-                    enhanced_chunks.append(enhanced_chunk)
-                
-                # Generate embeddings for chunks before storing in ChromaDB
-                self.logger.info(f"🚀 Starting embedding generation for {len(enhanced_chunks)} chunks")
-                enhanced_chunks = await self._generate_embeddings_for_chunks(enhanced_chunks)
-                self.logger.info(f"✅ Completed embedding generation, now have {len(enhanced_chunks)} enhanced chunks")
-                
-                self.logger.info(f"🔄 About to store {len(enhanced_chunks)} enhanced chunks to ChromaDB for repo '{repo_config.name}'")
-                self.logger.info(f"🔍 ChromaDB client type: {type(self.chroma_client)}")
-                self.logger.info(f"🔍 Sample enhanced chunk type: {type(enhanced_chunks[0]) if enhanced_chunks else 'No chunks'}")
-                
-                success = await self.chroma_client.add_chunks(enhanced_chunks, repo_config.name)
-                
-                self.logger.info(f"🎯 ChromaDB storage result: {success}")
-                if not success:
-                    raise ProcessingError(
-                        "Failed to store chunks in ChromaDB",
-                        error_code="CHROMADB_STORAGE_ERROR",
-                        recoverable=True
-                    )
-            
+            # Code chunks were embedded and written to ChromaDB by the ingestion pipeline
             # Store repository metadata in Neo4j
             await self._store_neo4j_metadata_async(repo_config, analysis, code_results, maven_results)
             
@@ -1756,7 +2046,7 @@ class EnhancedRepositoryProcessor:
                                                code_results: Dict[str, Any],
                                                maven_results: Optional[Dict[str, Any]]):
         """
-        Store local repository data in ChromaDB and Neo4j asynchronously.
+        Store local repository metadata in Neo4j once the pipeline has written all chunks.
         
         Adapts LocalRepositoryConfig to RepositoryConfig format for storage.
         
@@ -1769,31 +2059,7 @@ class EnhancedRepositoryProcessor:
         try:
             self.logger.info(f"Storing local repository data: {local_config.name}")
             
-            # Store code chunks in ChromaDB (same logic as remote)
-            if code_results['chunks']:
-                enhanced_chunks = []
-                for chunk in code_results['chunks']:
-                    enhanced_chunk = EnhancedChunk(
-                        chunk=chunk,
-                        business_domain=local_config.business_domain,
-                        importance_score=1.0,
-                        context_before="",
-                        context_after="",
-                        related_chunks=[]
-                    )
-                    enhanced_chunks.append(enhanced_chunk)
-                
-                # Generate embeddings for chunks before storing in ChromaDB
-                enhanced_chunks = await self._generate_embeddings_for_chunks(enhanced_chunks)
-                
-                success = await self.chroma_client.add_chunks(enhanced_chunks, local_config.name)
-                if not success:
-                    raise ProcessingError(
-                        "Failed to store chunks in ChromaDB",
-                        error_code="CHROMADB_STORAGE_ERROR",
-                        recoverable=True
-                    )
-            
+            # Code chunks were embedded and written to ChromaDB by the ingestion pipeline
             # Store local repository metadata in Neo4j
             await self._store_local_neo4j_metadata_async(local_config, analysis, code_results, maven_results)
             
@@ -1851,7 +2117,7 @@ class EnhancedRepositoryProcessor:
                     "languages": list(analysis.get('language_counts', {}).keys()),
                     "file_count": analysis.get('file_count', 0),
                     "lines_of_code": analysis.get('lines_of_code', 0),
-                    "chunks_count": len(code_results.get('chunks', [])),
+                    "chunks_count": code_results.get('indexed_chunk_count', code_results.get('chunk_count', 0)),
                     "source_type": "local"
                 }
             )
@@ -1910,7 +2176,7 @@ class EnhancedRepositoryProcessor:
                     "languages": analysis['languages'],
                     "file_count": analysis['file_count'],
                     "lines_of_code": analysis['lines_of_code'],
-                    "chunks_count": len(code_results.get('chunks', []))
+                    "chunks_count": code_results.get('indexed_chunk_count', code_results.get('chunk_count', 0))
                 },
                 read_only=False
             )
@@ -1941,6 +2207,121 @@ class EnhancedRepositoryProcessor:
             self.logger.error(f"Neo4j metadata storage failed: {e}")
             raise
     
+    async def incremental_update(self, repository_name: str, run_id: Optional[str] = None, progress_callback: Optional[callable] = None) -> ProcessingResult:
+        """
+        Re-index only what changed since the repository was last indexed.
+        
+        The repository configuration is restored from the persisted index state,
+        so this works for both remote and local repositories.
+        
+        Args:
+            repository_name: Name of a previously indexed repository
+            run_id: Correlation ID for structured logging
+            progress_callback: Optional async function to report progress
+            
+        Returns:
+            ProcessingResult: Processing results for the changed files
+        """
+        state = self.index_state_store.load(repository_name)
+        if state is None:
+            result = ProcessingResult(
+                repository_name=repository_name,
+                status=ProcessingStatus.FAILED,
+                error_message=f"No index state for {repository_name}; run a full index first",
+                error_code="NO_INDEX_STATE"
+            )
+            result.completed_at = time.time()
+            return result
+        
+        config = self._config_from_index_source(state.source)
+        if isinstance(config, LocalRepositoryConfig):
+            return await self.process_local_repository(config, run_id=run_id, progress_callback=progress_callback, incremental=True)
+        return await self.process_repository(config, run_id=run_id, progress_callback=progress_callback, incremental=True)
+    
+    async def _remove_stale_index_entries_async(self, repo_name: str, previous_state: RepositoryIndexState, diff: ManifestDiff):
+        """
+        Delete chunks and graph nodes of changed or removed files before re-indexing them.
+        
+        Args:
+            repo_name: Repository name (also the Chroma collection name)
+            previous_state: Last persisted index state
+            diff: Difference between the previous state and the current manifest
+        """
+        if not diff.stale:
+            return
+        
+        chunk_ids = [chunk_id for rel_path in diff.stale for chunk_id in previous_state.files[rel_path].chunk_ids]
+        
+        if chunk_ids and not await self.chroma_client.delete_chunks(chunk_ids, repository=repo_name):
+            raise ProcessingError(
+                f"Failed to delete {len(chunk_ids)} stale chunks from ChromaDB",
+                error_code="CHROMADB_DELETE_ERROR",
+                recoverable=True
+            )
+        
+        if not await self.neo4j_client.delete_file_nodes(repo_name, diff.stale, chunk_ids):
+            raise ProcessingError(
+                f"Failed to delete graph nodes for {len(diff.stale)} stale files",
+                error_code="NEO4J_DELETE_ERROR",
+                recoverable=True
+            )
+        
+        self.logger.info(f"Removed {len(chunk_ids)} stale chunks for {len(diff.stale)} files from {repo_name}")
+    
+    def _build_index_state(self,
+                           config: Union[RepositoryConfig, LocalRepositoryConfig],
+                           analysis: Dict[str, Any],
+                           code_results: Dict[str, Any],
+                           previous_state: Optional[RepositoryIndexState] = None,
+                           commit: Optional[str] = None) -> RepositoryIndexState:
+        """
+        Build the index state to persist after a successful run.
+        
+        Files processed in this run record their new chunk IDs; unchanged files
+        carry over the chunk IDs recorded by the previous state. New or changed
+        files that failed to read or parse are left out, so the next
+        incremental run sees them as added and retries them.
+        """
+        processed = code_results.get('chunk_ids_by_file', {})
+        skipped = set(code_results.get('skipped_files', []))
+        previous_files = previous_state.files if previous_state else {}
+        
+        state = RepositoryIndexState(
+            repository_name=config.name,
+            source=self._index_source(config),
+            commit=commit
+        )
+        for entry in analysis['manifest']:
+            if entry.relative_path in processed:
+                chunk_ids = processed[entry.relative_path]
+            elif entry.relative_path in skipped:
+                chunk_ids = []
+            else:
+                known = previous_files.get(entry.relative_path)
+                if known is None or known.content_hash != entry.content_hash:
+                    self.logger.warning(f"Not recording {entry.relative_path} in the index state; it failed to index")
+                    continue
+                chunk_ids = known.chunk_ids
+            state.files[entry.relative_path] = IndexedFileState.from_entry(entry, chunk_ids)
+        
+        return state
+    
+    def _index_source(self, config: Union[RepositoryConfig, LocalRepositoryConfig]) -> Dict[str, Any]:
+        """Serialize a repository configuration into the index state."""
+        data = asdict(config)
+        data['priority'] = config.priority.value
+        return {
+            'kind': 'local' if isinstance(config, LocalRepositoryConfig) else 'remote',
+            'config': data
+        }
+    
+    def _config_from_index_source(self, source: Dict[str, Any]) -> Union[RepositoryConfig, LocalRepositoryConfig]:
+        """Restore a repository configuration saved by _index_source."""
+        data = dict(source['config'])
+        data['priority'] = RepositoryPriority(data.get('priority', RepositoryPriority.MEDIUM.value))
+        config_cls = LocalRepositoryConfig if source.get('kind') == 'local' else RepositoryConfig
+        return config_cls(**data)
+    
     async def get_processing_statistics(self) -> Dict[str, Any]:
         """
         Get comprehensive processing statistics.
@@ -2002,214 +2383,75 @@ class EnhancedRepositoryProcessor:
 
             self.active_tasks.clear()
 
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown(wait=False)
+            self.file_reader.shutdown(wait=False)
+
             self.logger.info("Enhanced Repository Processor cleanup completed")
 
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
     
-    async def _extract_business_analysis(self, content: str, file_path: str, language) -> Dict[str, Any]:
-        """
-        Extract business rules and framework patterns from code content.
-        
-        Args:
-            content: File content
-            file_path: File path for context
-            language: Detected programming language
-            
-        Returns:
-            Dict containing business analysis results
-        """
-        analysis = {
+    def _business_analysis_records(self, business_analysis: Dict[str, Any], file_path: str, repo_name: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Convert a file's business analysis into graph records for the batch writer."""
+        complexity = business_analysis.get('migration_complexity', 'medium')
+        records: Dict[str, List[Dict[str, Any]]] = {
             'business_rules': [],
-            'framework_patterns': {},
-            'migration_complexity': 'low',
-            'struts_components': [],
+            'struts_actions': [],
             'corba_interfaces': [],
-            'jsp_patterns': [],
-            'migration_notes': []
+            'jsp_components': []
         }
         
-        try:
-            # Use enhanced Tree-sitter parser
-            chunks, relationships = self.tree_sitter_parser.parse_code(content, language, file_path)
-            
-            # Aggregate business information from chunks
-            total_business_rules = 0
-            total_framework_patterns = 0
-            
-            for chunk in chunks:
-                if hasattr(chunk, 'business_rules') and chunk.business_rules:
-                    analysis['business_rules'].extend(chunk.business_rules)
-                    total_business_rules += len(chunk.business_rules)
-                
-                if hasattr(chunk, 'framework_patterns') and chunk.framework_patterns:
-                    analysis['framework_patterns'].update(chunk.framework_patterns)
-                    total_framework_patterns += 1
-                    
-                    # Categorize framework-specific patterns
-                    if 'struts_namespace' in chunk.framework_patterns:
-                        analysis['struts_components'].append({
-                            'type': chunk.chunk_type,
-                            'name': chunk.name,
-                            'business_purpose': chunk.framework_patterns.get('business_purpose', ''),
-                            'location': f"{file_path}:{chunk.start_line}"
-                        })
-                    
-                    if 'corba_interface' in chunk.framework_patterns:
-                        analysis['corba_interfaces'].append({
-                            'interface': chunk.framework_patterns['corba_interface'],
-                            'operations': chunk.framework_patterns.get('business_operations', []),
-                            'location': f"{file_path}:{chunk.start_line}"
-                        })
-                
-                if hasattr(chunk, 'migration_notes') and chunk.migration_notes:
-                    analysis['migration_notes'].extend(chunk.migration_notes)
-            
-            # Calculate migration complexity based on patterns found
-            complexity_score = 0
-            
-            # JSP/Servlet complexity
-            if file_path.endswith(('.jsp', '.tag', '.tagx')):
-                analysis['jsp_patterns'] = self._analyze_jsp_complexity(content)
-                complexity_score += len(analysis['jsp_patterns']) * 2
-            
-            # Struts complexity
-            if any('struts' in pattern.lower() for pattern in analysis['framework_patterns'].keys()):
-                complexity_score += 5
-            
-            # CORBA complexity
-            if analysis['corba_interfaces']:
-                complexity_score += len(analysis['corba_interfaces']) * 3
-            
-            # Business rules complexity
-            complexity_score += total_business_rules
-            
-            # Determine migration complexity level
-            if complexity_score <= 3:
-                analysis['migration_complexity'] = 'low'
-            elif complexity_score <= 10:
-                analysis['migration_complexity'] = 'medium'
-            else:
-                analysis['migration_complexity'] = 'high'
-                
-            # Add relationships information
-            analysis['relationships'] = [
-                {
-                    'type': rel.relationship_type,
-                    'source': rel.source_id,
-                    'target': rel.target_id,
-                    'location': rel.source_location
-                }
-                for rel in relationships
-            ]
-            
-        except Exception as e:
-            self.logger.warning(f"Business analysis failed for {file_path}: {e}")
-            # Return basic analysis on error
-            
-        return analysis
-    
-    def _analyze_jsp_complexity(self, content: str) -> List[Dict[str, Any]]:
-        """Analyze JSP-specific complexity patterns."""
-        patterns = []
-        
-        # Check for embedded Java code (scriptlets)
-        import re
-        scriptlets = re.findall(r'<%[^@](.*?)%>', content, re.DOTALL)
-        if scriptlets:
-            patterns.append({
-                'type': 'scriptlets',
-                'count': len(scriptlets),
-                'complexity': 'high' if len(scriptlets) > 5 else 'medium',
-                'migration_note': 'Scriptlets need to be converted to Angular components'
+        # Business rules
+        for i, rule_text in enumerate(business_analysis.get('business_rules', [])):
+            records['business_rules'].append({
+                'id': f"{repo_name}:{file_path}:rule:{i}",
+                'rule_text': str(rule_text),
+                'domain': self._infer_business_domain(str(rule_text)),
+                'complexity': complexity,
+                'rule_type': 'validation',
+                'file_path': file_path,
+                'location': f"{file_path}:rule_{i}",
+                'repository': repo_name
             })
         
-        # Check for direct database access
-        if any(db_pattern in content for db_pattern in ['Connection', 'PreparedStatement', 'ResultSet']):
-            patterns.append({
-                'type': 'direct_db_access',
-                'complexity': 'high',
-                'migration_note': 'Direct DB access should be moved to GraphQL resolvers'
+        # Struts components
+        for i, struts_comp in enumerate(business_analysis.get('struts_components', [])):
+            records['struts_actions'].append({
+                'id': f"{repo_name}:{file_path}:struts:{i}",
+                'path': struts_comp.get('name') or f"{file_path}:struts",
+                'action_class': struts_comp.get('type', 'unknown'),
+                'business_purpose': struts_comp.get('business_purpose', ''),
+                'file_path': file_path,
+                'location': struts_comp.get('location', ''),
+                'repository': repo_name
             })
         
-        # Check for session management
-        if 'session.' in content:
-            patterns.append({
-                'type': 'session_management',
-                'complexity': 'medium',
-                'migration_note': 'Session usage needs Angular state management'
+        # CORBA interfaces
+        for i, corba_interface in enumerate(business_analysis.get('corba_interfaces', [])):
+            records['corba_interfaces'].append({
+                'id': f"{repo_name}:{file_path}:corba:{i}",
+                'interface_name': corba_interface.get('interface', 'unknown'),
+                'operations': [str(op) for op in corba_interface.get('operations', [])],
+                'file_path': file_path,
+                'location': corba_interface.get('location', ''),
+                'repository': repo_name
             })
         
-        # Check for Struts tags
-        struts_tags = re.findall(r'<(html|bean|logic|nested):(\w+)', content)
-        if struts_tags:
-            patterns.append({
-                'type': 'struts_tags',
-                'count': len(struts_tags),
-                'complexity': 'medium',
-                'migration_note': 'Struts tags need Angular component equivalents'
+        # JSP components (if JSP patterns exist)
+        jsp_patterns = business_analysis.get('jsp_patterns', [])
+        if jsp_patterns:
+            records['jsp_components'].append({
+                'id': f"{repo_name}:{file_path}:jsp",
+                'component_type': 'jsp_page',
+                'business_purpose': self._infer_jsp_business_purpose(jsp_patterns),
+                'file_path': file_path,
+                'struts_patterns': [p.get('type', '') for p in jsp_patterns],
+                'migration_notes': [str(note) for note in business_analysis.get('migration_notes', [])],
+                'repository': repo_name
             })
         
-        return patterns
-    
-    async def _store_business_analysis_to_neo4j(self, business_analysis: Dict[str, Any], file_path: str, repo_name: str):
-        """Store business analysis results in Neo4j graph database."""
-        try:
-            # Store business rules
-            for i, rule_text in enumerate(business_analysis.get('business_rules', [])):
-                rule_id = f"{repo_name}:{file_path}:rule:{i}"
-                await self.neo4j_client.create_business_rule(
-                    rule_id=rule_id,
-                    rule_text=rule_text,
-                    domain=self._infer_business_domain(rule_text),
-                    complexity=business_analysis.get('migration_complexity', 'medium'),
-                    rule_type='validation',
-                    file_path=file_path,
-                    location=f"{file_path}:rule_{i}"
-                )
-            
-            # Store Struts components
-            for struts_comp in business_analysis.get('struts_components', []):
-                await self.neo4j_client.create_struts_action(
-                    path=struts_comp.get('name', f"{file_path}:struts"),
-                    action_class=struts_comp.get('type', 'unknown'),
-                    business_purpose=struts_comp.get('business_purpose', ''),
-                    repo_name=repo_name,
-                    file_path=file_path,
-                    metadata={'location': struts_comp.get('location', '')}
-                )
-            
-            # Store CORBA interfaces
-            for corba_interface in business_analysis.get('corba_interfaces', []):
-                await self.neo4j_client.create_corba_interface(
-                    interface_name=corba_interface.get('interface', 'unknown'),
-                    operations=corba_interface.get('operations', []),
-                    repo_name=repo_name,
-                    file_path=file_path,
-                    metadata={'location': corba_interface.get('location', '')}
-                )
-            
-            # Store JSP components (if JSP patterns exist)
-            jsp_patterns = business_analysis.get('jsp_patterns', [])
-            if jsp_patterns:
-                component_id = f"{repo_name}:{file_path}:jsp"
-                await self.neo4j_client.create_jsp_component(
-                    component_id=component_id,
-                    component_type='jsp_page',
-                    business_purpose=self._infer_jsp_business_purpose(jsp_patterns),
-                    repo_name=repo_name,
-                    file_path=file_path,
-                    struts_patterns=[p.get('type', '') for p in jsp_patterns],
-                    migration_notes=business_analysis.get('migration_notes', [])
-                )
-            
-            # Create business relationships
-            for relationship in business_analysis.get('relationships', []):
-                # Skip relationship creation for now - would need proper ID mapping
-                pass
-                
-        except Exception as e:
-            self.logger.warning(f"Failed to store business analysis for {file_path}: {e}")
+        return records
     
     def _infer_business_domain(self, rule_text: str) -> str:
         """Infer business domain from rule text."""
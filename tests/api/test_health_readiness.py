@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from src.api.routes import health
+
+
+class _ColdEmbeddingClient:
+    def readiness(self):
+        return {"state": "cold", "ready": False, "model_loaded": False}
+
+
+def test_cold_model_gates_readiness_only_when_preloaded(monkeypatch):
+    client = _ColdEmbeddingClient()
+
+    monkeypatch.setattr(health, "settings", SimpleNamespace(embedding_readiness_gate=True, embedding_preload=True))
+    assert health._embedding_gates_readiness(client) is True
+    assert health._embedding_gates_readiness(None) is False
+
+    # Without a preload nothing loads the model until traffic arrives, so it must not gate
+    monkeypatch.setattr(health, "settings", SimpleNamespace(embedding_readiness_gate=True, embedding_preload=False))
+    assert health._embedding_gates_readiness(client) is False
+
+    monkeypatch.setattr(health, "settings", SimpleNamespace(embedding_readiness_gate=False, embedding_preload=True))
+    assert health._embedding_gates_readiness(client) is False
@@ -0,0 +1,200 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import orjson
+
+from src.core.chromadb_client import (
+    ChromaDBClient,
+    SearchQuery,
+    build_where,
+    distance_to_score,
+    gather_embeddings,
+)
+
+
+def _chunks(matrix, rows):
+    return [SimpleNamespace(chunk=SimpleNamespace(id=f"c{row}"), embedding_matrix=matrix, embedding_row=row) for row in rows]
+
+
+def test_gather_embeddings_uses_shared_matrix_rows():
+    matrix = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+    consecutive = gather_embeddings(_chunks(matrix, [1, 2, 3]))
+    reordered = gather_embeddings(_chunks(matrix, [3, 0]))
+    legacy = gather_embeddings([SimpleNamespace(embeddings=[1.0, 2.0, 3.0]), SimpleNamespace(embedding=[4.0, 5.0, 6.0])])
+
+    assert np.shares_memory(consecutive, matrix)
+    np.testing.assert_array_equal(consecutive, matrix[1:])
+    np.testing.assert_array_equal(reordered, matrix[[3, 0]])
+    assert legacy.dtype == np.float32 and legacy.shape == (2, 3)
+    assert gather_embeddings(_chunks(matrix, [0]) + [SimpleNamespace()]) is None
+
+
+def test_embedding_payload_serializes_as_nested_float_lists():
+    matrix = np.array([[0.25, -1.5], [3.0, 0.125]], dtype=np.float32)
+
+    payload = orjson.loads(orjson.dumps({"embeddings": gather_embeddings(_chunks(matrix, [0, 1]))},
+                                        option=orjson.OPT_SERIALIZE_NUMPY))
+
+    assert payload["embeddings"] == [[0.25, -1.5], [3.0, 0.125]]
+
+
+def test_build_where_pushes_filters_to_server():
+    assert build_where(SearchQuery(query="q")) is None
+    assert build_where(SearchQuery(query="q", language_filter="Java")) == {"language": {"$eq": "java"}}
+    query = SearchQuery(query="q", repository_filter="billing", chunk_type_filter="method", filters={"file_path": "A.java"})
+    assert build_where(query) == {"$and": [
+        {"file_path": {"$eq": "A.java"}},
+        {"repository": {"$eq": "billing"}},
+        {"chunk_type": {"$eq": "method"}},
+    ]}
+    assert build_where(query, repository_clause=False)["$and"][-1] == {"chunk_type": {"$eq": "method"}}
+
+
+def test_distance_to_score():
+    assert distance_to_score(0.0) == 1.0
+    assert distance_to_score(1.0) == 0.5  # squared L2 of unit vectors at cosine 0.5
+    assert distance_to_score(0.25, space="cosine") == 0.75
+    assert distance_to_score(4.0, normalized=False) == 1.0 / 3.0
+    assert distance_to_score(3.0, space="cosine") == 0.0
+
+
+def _fake_client(encoded, posted):
+    client = ChromaDBClient(collection_name="codebase_chunks")
+
+    async def encode(texts, priority=None):
+        encoded.append(texts)
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+    async def get_collection(name):
+        return {"id": f"id-{name}", "metadata": {"hnsw:space": "cosine"}}
+
+    async def post_json(url, payload, timeout_override=None):
+        posted.append((url, payload))
+        n = len(payload.get("query_embeddings", []))
+        return {"ids": [["a", "b"]] * n, "documents": [["doc a", "doc b"]] * n,
+                "metadatas": [[{"language": "java"}, {}]] * n, "distances": [[0.1, 0.9]] * n}
+
+    client.embedding_client = SimpleNamespace(encode=encode, config=SimpleNamespace(cache_namespace=lambda: "fp"))
+    client.get_collection = get_collection
+    client._post_json = post_json
+    return client
+
+
+def test_search_embeds_once_and_queries_repository_collection():
+    encoded, posted = [], []
+    client = _fake_client(encoded, posted)
+
+    results = asyncio.run(client.search(SearchQuery(query="find", repository_filter="billing", language_filter="java", min_score=0.5)))
+
+    assert encoded == [["find"]]
+    url, payload = posted[0]
+    assert url.endswith("/id-billing/query")
+    assert payload["where"] == {"language": {"$eq": "java"}}
+    assert payload["n_results"] == 10
+    assert [r.chunk_id for r in results] == ["a"]
+    assert abs(results[0].score - 0.9) < 1e-9 and results[0].language == "java"
+
+
+def test_search_many_batches_embeddings_and_chroma_requests():
+    encoded, posted = [], []
+    client = _fake_client(encoded, posted)
+    client.configure_sharding("none")
+    queries = [
+        SearchQuery(query="login", limit=1),
+        SearchQuery(query="logout", limit=2),
+        SearchQuery(query="billing", language_filter="java"),
+    ]
+
+    results = asyncio.run(client.search_many(queries))
+
+    assert encoded == [["login", "logout", "billing"]]
+    assert len(posted) == 2  # one request per distinct filter set
+    unfiltered = next(payload for _, payload in posted if "where" not in payload)
+    assert len(unfiltered["query_embeddings"]) == 2 and unfiltered["n_results"] == 2
+    assert [len(r) for r in results] == [1, 2, 2]
+
+
+def test_global_query_fans_out_to_shards_and_merges_top_k():
+    encoded, posted = [], []
+    client = _fake_client(encoded, posted)
+    distances = {"id-auth": [0.1, 0.5], "id-billing": [0.2, 0.3]}
+
+    async def list_collections():
+        # Only collections add_chunks created are searched
+        return [{"name": "auth", "metadata": {"chunk_shard": "auth"}},
+                {"name": "billing", "metadata": {"chunk_shard": "billing"}},
+                {"name": "codebase_chunks", "metadata": {"hnsw:space": "cosine"}},
+                {"name": "oracle_analysis", "metadata": None}]
+
+    async def post_json(url, payload, timeout_override=None):
+        posted.append((url, payload))
+        shard = url.split("/")[-2]
+        return {"ids": [[f"{shard}-0", f"{shard}-1"]], "documents": [["", ""]], "metadatas": [[{}, {}]],
+                "distances": [distances[shard]]}
+
+    client.list_collections = list_collections
+    client._post_json = post_json
+
+    results = asyncio.run(client.search(SearchQuery(query="q", limit=3)))
+
+    assert encoded == [["q"]] and len(posted) == 2
+    assert [r.chunk_id for r in results] == ["id-auth-0", "id-billing-0", "id-billing-1"]
+
+
+def test_failing_shard_is_left_out_of_global_results_and_not_cached():
+    encoded, posted = [], []
+    client = _fake_client(encoded, posted)
+
+    async def list_collections():
+        return [{"name": name, "metadata": {"chunk_shard": name}} for name in ("auth", "billing")]
+
+    async def post_json(url, payload, timeout_override=None):
+        posted.append((url, payload))
+        shard = url.split("/")[-2]
+        if shard == "id-auth":
+            raise RuntimeError("shard unavailable")
+        return {"ids": [["b-0"]], "documents": [[""]], "metadatas": [[{}]], "distances": [[0.2]]}
+
+    client.list_collections = list_collections
+    client._post_json = post_json
+
+    async def scenario():
+        results, hits = await client.search_many_with_cache_status([SearchQuery(query="q")])
+        assert [r.chunk_id for r in results[0]] == ["b-0"] and hits == [False]
+        assert (await client.search_many_with_cache_status([SearchQuery(query="q")]))[1] == [False]
+        try:
+            await client.search(SearchQuery(query="q", repository_filter="auth"))
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("a query whose only shard fails must fail")
+
+    asyncio.run(scenario())
+
+
+def test_sharding_modes_route_repositories_and_deletes():
+    encoded, posted = [], []
+    client = _fake_client(encoded, posted)
+    dropped = []
+
+    async def delete_collection(name):
+        dropped.append(name)
+        return True
+
+    client.delete_collection = delete_collection
+
+    assert client.shard_for("billing") == "billing"
+    assert asyncio.run(client.delete_repository("billing")) and dropped == ["billing"]
+
+    client.configure_sharding("group", {"payments": ["billing", "invoicing"]})
+    assert client.shard_for("invoicing") == "payments" and client.shard_for("auth") == "auth"
+    asyncio.run(client.search(SearchQuery(query="q", repository_filter="billing")))
+    assert posted[-1][0].endswith("/id-payments/query")
+    assert posted[-1][1]["where"] == {"repository": {"$eq": "billing"}}
+
+    client.configure_sharding("none")
+    assert asyncio.run(client.delete_repository("billing")) and dropped == ["billing"]
+    assert posted[-1] == (f"{client._get_collections_url()}/id-codebase_chunks/delete",
+                          {"where": {"repository": {"$eq": "billing"}}})
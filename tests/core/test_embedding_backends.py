@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core.embedding_backends import cosine_agreement, onnx_model_path
+
+
+def test_cosine_agreement_is_scale_invariant():
+    rng = np.random.default_rng(0)
+    reference = rng.standard_normal((5, 16)).astype(np.float32)
+    report = cosine_agreement(reference, reference * 3.0)
+    assert report["samples"] == 5
+    assert report["min_cosine"] > 0.9999
+
+    noisy = reference.copy()
+    noisy[2] = -noisy[2]
+    assert cosine_agreement(reference, noisy)["min_cosine"] < -0.99
+
+
+def test_onnx_model_path_separates_quantized_graphs(tmp_path):
+    int8 = onnx_model_path("microsoft/codebert-base", str(tmp_path), quantize=True)
+    fp32 = onnx_model_path("microsoft/codebert-base", str(tmp_path), quantize=False)
+    assert int8 != fp32
+    assert int8.parent == fp32.parent == Path(tmp_path) / "microsoft__codebert-base"
+
+
+def test_cache_namespace_separates_backends_and_quantization():
+    pytest.importorskip("torch")
+    from src.core.embedding_config import EmbeddingConfig
+
+    torch_fp32 = EmbeddingConfig(backend="torch")
+    onnx_int8 = EmbeddingConfig(backend="onnx", onnx_quantize=True)
+    onnx_fp32 = EmbeddingConfig(backend="onnx", onnx_quantize=False)
+    assert onnx_int8.quantization == "int8"
+    assert torch_fp32.quantization == onnx_fp32.quantization == "fp32"
+    assert len({torch_fp32.cache_namespace(), onnx_int8.cache_namespace(), onnx_fp32.cache_namespace()}) == 3
+    # The int8 flag only matters to the backend that honours it
+    assert EmbeddingConfig(backend="torch", onnx_quantize=False).cache_namespace() == torch_fp32.cache_namespace()
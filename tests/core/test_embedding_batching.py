@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.core.embedding_batching import plan_batches
+
+
+def test_batches_group_similar_lengths_within_token_budget():
+    lengths = [512, 20, 30, 500, 25, 40, 10, 35]
+    batches = plan_batches(lengths, max_batch_tokens=1024, max_batch_size=4)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    assert batches[0] == [0, 3], "the two long chunks share a batch"
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) * max(lengths[i] for i in batch) <= 1024
+    # Short chunks are never padded to a long neighbour
+    assert all(max(lengths[i] for i in batch) <= 40 for batch in batches[1:])
+
+
+def test_oversized_sequence_gets_its_own_batch():
+    assert plan_batches([600, 5], max_batch_tokens=512, max_batch_size=8) == [[0], [1]]
+    assert plan_batches([], max_batch_tokens=512, max_batch_size=8) == []
+
+
+def test_pretokenized_inputs_skip_the_tokenizer():
+    pytest.importorskip("torch")
+    from src.core.embedding_config import AsyncEnhancedEmbeddingClient, EmbeddingConfig
+
+    class RecordingTokenizer:
+        pad_token_id = 1
+
+        def __init__(self):
+            self.calls = []
+
+        def __call__(self, texts, **kwargs):
+            self.calls.append(list(texts))
+            return {"input_ids": [[0] + [5] * len(text) + [2] for text in texts]}
+
+    class LengthBackend:
+        """One row per sequence holding its unpadded length."""
+
+        def embed(self, input_ids, attention_mask):
+            return np.repeat(attention_mask.sum(axis=1, keepdims=True).astype(np.float32), 768, axis=1)
+
+    client = AsyncEnhancedEmbeddingClient(EmbeddingConfig(use_scheduler=False, max_length=8))
+    tokenizer = client.tokenizer = RecordingTokenizer()
+
+    result = client._embed_with(LengthBackend(), ["abc", [0, 7, 7, 2], list(range(20))])
+    client.close()
+
+    assert tokenizer.calls == [["abc"]]
+    assert result[:, 0].tolist() == [5, 4, 8]
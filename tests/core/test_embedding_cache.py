@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.core.embedding_cache import PersistentEmbeddingCache, content_hash
+
+
+def _counting_client_class():
+    pytest.importorskip("torch")
+    from src.core.embedding_config import AsyncEnhancedEmbeddingClient
+
+    class CountingClient(AsyncEnhancedEmbeddingClient):
+        """Embedding client with a fake model that records what it was asked to embed."""
+
+        def __init__(self, config):
+            super().__init__(config)
+            self.generated = []
+
+        async def _ensure_model_initialized(self):
+            pass
+
+        def _generate_embeddings(self, texts, **kwargs):
+            self.generated.extend(texts)
+            return np.array([np.full(4, len(text), dtype=np.float32) for text in texts])
+
+    return CountingClient
+
+
+def test_cache_roundtrip_is_namespaced(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentEmbeddingCache(path, "model-a")
+    cache.put_many([(content_hash("x"), np.arange(4, dtype=np.float32))])
+    assert np.array_equal(cache.get_many([content_hash("x")])[content_hash("x")], np.arange(4))
+    cache.close()
+
+    other = PersistentEmbeddingCache(path, "model-b")
+    assert other.get_many([content_hash("x")]) == {}
+    assert len(other) == 1
+    other.close()
+
+
+@pytest.mark.asyncio
+async def test_reindexing_unchanged_text_skips_the_model(tmp_path):
+    CountingClient = _counting_client_class()
+    from src.core.embedding_config import EmbeddingConfig
+
+    config = EmbeddingConfig(persistent_cache_path=str(tmp_path / "cache.sqlite3"))
+    first = CountingClient(config)
+    texts = ["class A {}", "class B { int x; }"]
+    expected = await first.encode(texts)
+    first.close()
+    assert first.generated == texts
+
+    # A fresh process: empty in-memory cache, same on-disk store
+    second = CountingClient(EmbeddingConfig(persistent_cache_path=str(tmp_path / "cache.sqlite3")))
+    result = await second.encode(texts + ["class C {}"])
+    assert second.generated == ["class C {}"]
+    assert second.persistent_cache_hits == 2
+    assert np.array_equal(result[:2], expected)
+
+    assert np.array_equal(await second.encode(texts), expected)
+    assert second.generated == ["class C {}"]
+    second.close()
+
+    changed = CountingClient(EmbeddingConfig(persistent_cache_path=str(tmp_path / "cache.sqlite3"), max_length=256))
+    await changed.encode(texts)
+    assert changed.generated == texts, "a different max_length must not reuse cached vectors"
+    changed.close()
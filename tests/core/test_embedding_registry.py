@@ -0,0 +1,29 @@
+import pytest
+
+from src.core.embedding_registry import EmbeddingRegistry, physical_collection_name
+from src.core.exceptions import ProcessingError
+
+
+def test_registry_binds_routes_and_switches_fingerprints(tmp_path):
+    path = tmp_path / "registry.json"
+    registry = EmbeddingRegistry(str(path))
+
+    # First write adopts the existing collection for the writer's model
+    assert registry.write_collection("repo", "old-fp") == "repo"
+    with pytest.raises(ProcessingError):
+        registry.write_collection("repo", "new-fp")
+
+    shadow = registry.begin_shadow("repo", "new-fp", "new-model")
+    assert shadow.collection == physical_collection_name("repo", "new-fp")
+    assert registry.write_collection("repo", "new-fp") == shadow.collection
+    assert registry.query_collection("repo", "new-fp") is None
+    assert registry.collections_for("repo") == ["repo", shadow.collection]
+
+    registry.activate("repo")
+    reloaded = EmbeddingRegistry(str(path))
+
+    assert reloaded.query_collection("repo", "new-fp") == shadow.collection
+    assert reloaded.query_collection("repo", "old-fp") == "repo"
+    assert reloaded.query_collection("repo", "other-fp") is None
+    assert reloaded.query_collection("unregistered", "new-fp") == "unregistered"
+    assert reloaded.active("repo").model_name == "new-model"
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.core.embedding_scheduler import EmbeddingPriority, EmbeddingScheduler
+
+
+class RecordingModel:
+    """Fake model: one row per text holding the text length; records each batch."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.delay:
+            time.sleep(self.delay)
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch():
+    model = RecordingModel()
+    scheduler = EmbeddingScheduler(model, max_batch_texts=64, interactive_window=0.01)
+    requests = [["a" * i, "b" * (i + 10)] for i in range(1, 6)]
+
+    results = await asyncio.gather(*(scheduler.submit(texts) for texts in requests))
+    scheduler.shutdown()
+
+    assert len(model.batches) == 1
+    for texts, result in zip(requests, results):
+        assert result[:, 0].tolist() == [len(text) for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_preempt_bulk_work():
+    model = RecordingModel(delay=0.02)
+    scheduler = EmbeddingScheduler(model, max_batch_texts=16, interactive_window=0, bulk_window=0)
+    bulk_texts = [f"bulk-{i}" for i in range(160)]
+
+    bulk = asyncio.create_task(scheduler.submit(bulk_texts, EmbeddingPriority.BULK))
+    await asyncio.sleep(0.03)
+    query = await scheduler.submit(["query"], EmbeddingPriority.INTERACTIVE)
+    bulk_result = await bulk
+    scheduler.shutdown()
+
+    assert query[0, 0] == len("query")
+    assert bulk_result.shape == (160, 1)
+    query_batch = next(i for i, batch in enumerate(model.batches) if batch == ["query"])
+    assert query_batch <= 3, "the query must not wait for the whole bulk request"
+    assert sum(len(batch) for batch in model.batches) == 161
+
+
+@pytest.mark.asyncio
+async def test_batches_run_concurrently_up_to_max_in_flight():
+    model = RecordingModel(delay=0.1)
+    scheduler = EmbeddingScheduler(model, max_batch_texts=4, bulk_window=0, max_in_flight=4)
+
+    start = time.perf_counter()
+    result = await scheduler.submit([f"chunk-{i}" for i in range(16)], EmbeddingPriority.BULK)
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown()
+
+    assert result.shape == (16, 1)
+    assert len(model.batches) == 4
+    assert elapsed < 0.3, "the four batches should overlap on separate workers"
+
+
+@pytest.mark.asyncio
+async def test_batch_timeout_bounds_model_calls_not_queueing():
+    model = RecordingModel(delay=0.05)
+    scheduler = EmbeddingScheduler(model, max_batch_texts=1, bulk_window=0, batch_timeout=0.5)
+
+    # Ten slices take ~0.5s in total, but no single model call comes near the timeout
+    result = await scheduler.submit([f"chunk-{i}" for i in range(10)], EmbeddingPriority.BULK)
+    assert result.shape == (10, 1)
+
+    model.delay = 0.6
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.submit(["slow"], EmbeddingPriority.INTERACTIVE)
+    scheduler.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_uncached_encode_goes_through_the_scheduler():
+    pytest.importorskip("torch")
+    from src.core.embedding_config import AsyncEnhancedEmbeddingClient, EmbeddingConfig
+
+    model = RecordingModel()
+    client = AsyncEnhancedEmbeddingClient(EmbeddingConfig(use_cache=False, interactive_batch_window=0.01))
+    client._model_initialized = True
+    client.scheduler.embed_fn = model
+
+    results = await asyncio.gather(client.encode(["a"]), client.encode(["bb"]))
+    client.scheduler.shutdown()
+
+    assert [result[0, 0] for result in results] == [1.0, 2.0]
+    assert len(model.batches) == 1
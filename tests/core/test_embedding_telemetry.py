@@ -0,0 +1,61 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.core.embedding_scheduler import EmbeddingPriority, EmbeddingScheduler
+from src.core.embedding_telemetry import BatchSample, EmbeddingTelemetry
+from src.core.performance_metrics import PerformanceCollector
+
+
+def test_batches_and_cache_lookups_export_as_prometheus_histograms():
+    collector = PerformanceCollector()
+    telemetry = EmbeddingTelemetry(collector, labels={"model": "codebert"})
+
+    telemetry.record_batch(BatchSample(texts=8, real_tokens=600, padded_tokens=800, seconds=0.2))
+    telemetry.record_batch(BatchSample(texts=2, real_tokens=100, padded_tokens=100, seconds=0.05))
+    telemetry.record_cache_lookup(texts=4, hits=3)
+    telemetry.record_cache_lookup(texts=6, hits=0)
+
+    summary = telemetry.summary()
+    assert summary["totals"]["padding_ratio"] == pytest.approx(1 - 700 / 900)
+    assert summary["totals"]["cache_hit_ratio"] == pytest.approx(0.3)
+    assert summary["totals"]["texts_per_second"] == pytest.approx(10 / 0.25)
+    batch_sizes = summary["histograms"]["batch_size_texts"][0]
+    assert batch_sizes["count"] == 2 and batch_sizes["sum"] == 10 and batch_sizes["buckets"]["8"] == 2
+
+    exported = collector.export_metrics(format="prometheus")
+    assert "# TYPE embedding_batch_latency_seconds histogram" in exported
+    assert 'embedding_cache_hit_ratio_bucket{model="codebert",le="0.0"} 1' in exported
+    assert 'embedding_batch_size_texts_bucket{model="codebert",le="+Inf"} 2' in exported
+    assert 'embedding_batch_padded_tokens_sum{model="codebert"} 900' in exported
+
+
+def test_worker_telemetry_buffers_batches_until_drained():
+    collector = PerformanceCollector()
+    telemetry = EmbeddingTelemetry(collector, buffer=True)
+
+    telemetry.record_batch(BatchSample(texts=4, real_tokens=40, padded_tokens=64, seconds=0.01))
+
+    assert collector.histograms == {}
+    assert [sample.texts for sample in telemetry.drain()] == [4]
+    assert telemetry.drain() == []
+
+
+@pytest.mark.asyncio
+async def test_scheduler_records_queue_wait_per_request():
+    collector = PerformanceCollector()
+    telemetry = EmbeddingTelemetry(collector)
+    scheduler = EmbeddingScheduler(lambda texts: np.ones((len(texts), 2), dtype=np.float32),
+                                   max_batch_texts=2, telemetry=telemetry)
+    try:
+        await asyncio.gather(
+            scheduler.submit(["a", "b", "c"], EmbeddingPriority.BULK),
+            scheduler.submit(["q"], EmbeddingPriority.INTERACTIVE),
+        )
+    finally:
+        scheduler.shutdown()
+
+    waits = collector.get_histogram_summary("embedding_queue_wait_seconds")["embedding_queue_wait_seconds"]
+    assert sorted(series["labels"]["priority"] for series in waits) == ["bulk", "interactive"]
+    assert all(series["count"] == 1 for series in waits)
@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+
+class _FakeTokenizer:
+    def __call__(self, text, add_special_tokens=True, **kwargs):
+        return {"input_ids": [ord(c) % 50 + 3 for c in text]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [0] + list(ids) + [2]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_loads_model_and_runs_representative_shapes():
+    pytest.importorskip("torch")
+    from src.core.embedding_config import AsyncEnhancedEmbeddingClient, EmbeddingConfig
+
+    class WarmingClient(AsyncEnhancedEmbeddingClient):
+        def __init__(self, config):
+            super().__init__(config)
+            self.shapes = []
+
+        def _initialize_codebert(self, shared_weights_path=None):
+            self.tokenizer = _FakeTokenizer()
+
+        def _generate_embeddings(self, texts, **kwargs):
+            self.shapes.append((len(texts), len(texts[0])))
+            return np.zeros((len(texts), 768), dtype=np.float32)
+
+    client = WarmingClient(EmbeddingConfig(warmup_lengths=[32, 600, 128], warmup_batch_size=4, max_length=512))
+    assert client.readiness()["state"] == "cold"
+    assert client.readiness()["ready"] is False
+
+    report = await client.warm_up()
+    client.close()
+
+    assert report["ready"] is True and report["state"] == "ready"
+    assert report["load_seconds"] is not None
+    assert client.shapes == [(4, 32), (4, 128), (4, 512)]
+
+
+@pytest.mark.asyncio
+async def test_retired_client_closes_after_in_flight_encodes():
+    pytest.importorskip("torch")
+    from src.core.embedding_config import AsyncEnhancedEmbeddingClient, EmbeddingConfig
+
+    release = asyncio.Event()
+
+    class SlowClient(AsyncEnhancedEmbeddingClient):
+        async def _ensure_model_initialized(self):
+            pass
+
+        async def _run_model(self, texts, priority, **kwargs):
+            await release.wait()
+            return np.zeros((len(texts), 4), dtype=np.float32)
+
+    client = SlowClient(EmbeddingConfig(use_cache=False))
+    closed = []
+    client.close = lambda: closed.append(True)
+
+    encode = asyncio.ensure_future(client.encode(["class A {}"]))
+    await asyncio.sleep(0)
+    client.retire()
+    assert closed == [], "an in-flight encode must finish on the old client"
+
+    release.set()
+    assert (await encode).shape == (1, 4)
+    assert closed == [True]
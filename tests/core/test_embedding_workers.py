@@ -0,0 +1,23 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.core.embedding_workers import _read_shared, _write_shared, worker_core_sets
+
+
+def test_worker_core_sets_split_available_cores():
+    assert worker_core_sets(4, available=range(8)) == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    assert worker_core_sets(2, cores_per_worker=3, available=[0, 1, 2, 3]) == [[0, 1, 2], [0, 1, 3]]
+    assert worker_core_sets(3, available=[0]) == [[0], [0], [0]]
+
+
+def test_embeddings_return_from_worker_through_shared_memory():
+    embeddings = np.random.default_rng(0).standard_normal((5, 768)).astype(np.float32)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        name, shape = executor.submit(_write_shared, embeddings).result()
+
+    result = _read_shared(name, shape)
+
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(result, embeddings)
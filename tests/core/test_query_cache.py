@@ -0,0 +1,139 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.core.chromadb_client import ChromaDBClient, SearchQuery
+from src.core.query_cache import QueryResultCache
+
+
+def _client(calls):
+    client = ChromaDBClient(collection_name="codebase_chunks")
+
+    async def encode(texts, priority=None):
+        calls.append("encode")
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+    async def get_collection(name):
+        return {"id": name, "metadata": {}}
+
+    async def post_json(url, payload, timeout_override=None):
+        calls.append("query")
+        n = len(payload["query_embeddings"])
+        return {"ids": [["a"]] * n, "documents": [["doc"]] * n, "metadatas": [[{"repository": "billing"}]] * n, "distances": [[0.2]] * n}
+
+    config = SimpleNamespace(cache_namespace=lambda: "fp", code_preprocessing=True, include_comments=True)
+    client.embedding_client = SimpleNamespace(encode=encode, config=config)
+    client.get_collection = get_collection
+    client._post_json = post_json
+    return client
+
+
+def test_repeated_query_is_served_from_cache_until_the_repository_changes():
+    calls = []
+    client = _client(calls)
+
+    async def scenario():
+        query = SearchQuery(query="find invoices", repository_filter="billing")
+        first, first_hits = await client.search_many_with_cache_status([query])
+        # Same text as the model sees it, different filters
+        again, again_hits = await client.search_many_with_cache_status([
+            SearchQuery(query="  find invoices\n\n", repository_filter="billing"),
+            SearchQuery(query="find invoices", repository_filter="billing", limit=5),
+        ])
+        assert first_hits == [False] and again_hits == [True, False]
+        assert again[0][0].chunk_id == first[0][0].chunk_id == "a"
+
+        await client.query_cache.bump("auth")
+        assert (await client.search_many_with_cache_status([query]))[1] == [True]
+        await client.query_cache.bump("billing")
+        assert (await client.search_many_with_cache_status([query]))[1] == [False]
+
+    asyncio.run(scenario())
+    assert calls == ["encode", "query", "encode", "query", "encode", "query"]
+
+
+def test_unreachable_redis_degrades_to_the_local_cache():
+    class BrokenRedis:
+        def __getattr__(self, name):
+            async def fail(*args, **kwargs):
+                raise ConnectionError("redis down")
+            return fail
+
+    cache = QueryResultCache(redis_provider=lambda: SimpleNamespace(client=BrokenRedis()))
+
+    async def scenario():
+        version = (await cache.versions(["billing"]))["billing"]
+        key = cache.key("billing", version, "q")
+        await cache.set_many([(key, [{"chunk_id": "a"}])])
+        assert await cache.get_many([key]) == [[{"chunk_id": "a"}]]
+        await cache.bump("billing")
+        assert (await cache.versions(["billing"]))["billing"] != version
+
+    asyncio.run(scenario())
+    assert cache.stats()["redis_enabled"] is False
+
+
+class FlakyRedis:
+    """In-memory stand-in for the async Redis client that can be taken down."""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis down")
+
+    async def mget(self, keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    async def incr(self, key):
+        self._check()
+        self.data[key] = int(self.data.get(key, 0)) + 1
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+
+    def pipeline(self, transaction=False):
+        redis = self
+        operations = []
+
+        class Pipeline:
+            def set(self, key, value, ex=None):
+                operations.append(lambda: redis.data.__setitem__(key, value))
+
+            def incrby(self, key, amount):
+                operations.append(lambda: redis.data.__setitem__(key, int(redis.data.get(key, 0)) + amount))
+
+            async def execute(self):
+                redis._check()
+                for operation in operations:
+                    operation()
+
+        return Pipeline()
+
+
+def test_bumps_made_while_redis_is_down_are_replayed():
+    redis = FlakyRedis()
+    cache = QueryResultCache(redis_provider=lambda: SimpleNamespace(client=redis))
+
+    async def scenario():
+        before = (await cache.versions(["billing"]))["billing"]
+        old_key = cache.key("billing", before, "q")
+        await cache.set_many([(old_key, [{"chunk_id": "stale"}])])
+
+        redis.down = True
+        await cache.bump("billing")
+        assert cache.stats()["pending_redis_invalidations"] == 1
+
+        redis.down = False
+        cache._redis_retry_at = 0.0
+        after = (await cache.versions(["billing"]))["billing"]
+        assert after != before and after.startswith("r")
+        assert await cache.get_many([cache.key("billing", after, "q")]) == [None]
+        assert cache.stats()["pending_redis_invalidations"] == 0
+
+    asyncio.run(scenario())
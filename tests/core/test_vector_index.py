@@ -0,0 +1,134 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.core.vector_index import LocalIndexManager, LocalVectorIndex, where_conditions
+
+
+def _unit_rows(n, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _records(n):
+    ids = [f"c{i}" for i in range(n)]
+    metadatas = [{"repository": "billing" if i % 2 else "auth", "language": "java"} for i in range(n)]
+    return ids, [f"doc {i}" for i in ids], metadatas
+
+
+def test_where_conditions():
+    assert where_conditions(None) == {}
+    assert where_conditions({"language": {"$eq": "java"}}) == {"language": "java"}
+    assert where_conditions({"$and": [{"language": {"$eq": "java"}}, {"repository": {"$eq": "a"}}]}) == {"language": "java", "repository": "a"}
+    assert where_conditions({"name": {"$eq": "x"}}) is None
+    assert where_conditions({"language": {"$ne": "java"}}) is None
+
+
+def test_filtered_search_matches_brute_force(tmp_path):
+    vectors = _unit_rows(200)
+    ids, documents, metadatas = _records(200)
+    index = LocalVectorIndex(tmp_path / "idx", dim=8)
+    index.add(ids, vectors, documents, metadatas)
+
+    query = vectors[3]
+    hits = index.search(query, 5, {"repository": "billing"})
+
+    billing = np.arange(1, 200, 2)
+    expected = billing[np.argsort(((vectors[billing] - query) ** 2).sum(axis=1))[:5]]
+    assert [row for row, _ in hits] == list(expected)
+    assert hits[0] == (3, pytest.approx(0.0, abs=1e-5))
+    assert index.search(query, 5, {"repository": "unknown"}) == []
+
+
+def test_overwrite_delete_and_reload(tmp_path):
+    vectors = _unit_rows(10)
+    ids, documents, metadatas = _records(10)
+    index = LocalVectorIndex(tmp_path / "idx", dim=8, space="ip")
+    index.add(ids, vectors, documents, metadatas)
+    index.add(["c0"], vectors[9:10], ["moved"], [{"repository": "billing"}])
+    index.delete(["c9"])
+
+    response = index.query([vectors[9]], 2, {"repository": "billing"})
+    assert response["ids"][0][0] == "c0" and response["documents"][0][0] == "moved"
+    assert "c9" not in response["ids"][0]
+
+    index.save()
+    index.close()
+    reloaded = LocalVectorIndex.load(tmp_path / "idx")
+    assert reloaded.live_count == 9
+    assert reloaded.query([vectors[9]], 2, {"repository": "billing"})["ids"] == response["ids"]
+
+
+def test_hnsw_search_finds_exact_neighbour(tmp_path):
+    pytest.importorskip("hnswlib")
+    vectors = _unit_rows(500)
+    ids, documents, metadatas = _records(500)
+    index = LocalVectorIndex(tmp_path / "idx", dim=8, exact_threshold=0)
+    index.add(ids, vectors, documents, metadatas)
+
+    assert index.search(vectors[7], 1, {"repository": "billing"})[0][0] == 7
+
+
+class FakeChroma:
+    def __init__(self, vectors):
+        self.ids, self.documents, self.metadatas = _records(len(vectors))
+        self.vectors = vectors
+
+    async def get_collection(self, name):
+        return {"id": name, "metadata": {"hnsw:space": "l2"}}
+
+    async def count(self, collection_name):
+        return len(self.ids)
+
+    async def get_records(self, collection_name, limit=500, offset=0, include=None, ids=None):
+        rows = [self.ids.index(i) for i in ids] if ids is not None else list(range(len(self.ids)))[offset:offset + limit]
+        return {
+            "ids": [self.ids[r] for r in rows],
+            "documents": [self.documents[r] for r in rows],
+            "metadatas": [self.metadatas[r] for r in rows],
+            "embeddings": [self.vectors[r].tolist() for r in rows],
+        }
+
+
+def test_manager_builds_on_demand_and_verifies(tmp_path):
+    vectors = _unit_rows(30)
+    chroma = FakeChroma(vectors)
+    manager = LocalIndexManager(chroma, str(tmp_path), page_size=7)
+
+    async def scenario():
+        assert await manager.query("repo", [vectors[0]], 3) is None  # falls back while building
+        await manager._build_tasks["repo"]
+        response, space = await manager.query("repo", [vectors[0]], 3, {"language": {"$eq": "java"}})
+        assert response["ids"][0][0] == "c0" and space == "l2"
+        assert await manager.query("repo", [vectors[0]], 3, {"name": {"$eq": "x"}}) is None
+
+        assert (await manager.verify("repo"))["consistent"]
+        await manager.add("repo", ["c30"], ["new"], [{}], vectors[:1])
+        report = await manager.verify("repo")
+        assert not report["consistent"] and report["local_count"] == 31
+
+    asyncio.run(scenario())
+    assert manager.status()["local_queries"] == 1
+
+
+def test_filtered_hnsw_search_post_filters_without_callbacks(tmp_path):
+    pytest.importorskip("hnswlib")
+    vectors = _unit_rows(3000)
+    ids, documents, metadatas = _records(3000)
+    index = LocalVectorIndex(tmp_path / "idx", dim=8, exact_threshold=100)
+    index.add(ids, vectors, documents, metadatas)
+
+    calls = []
+    original = index.graph.knn_query
+
+    def recording_knn_query(data, k=1, filter=None, **kwargs):
+        calls.append((k, filter))
+        return original(data, k=k, **kwargs)
+
+    index.graph = type("Graph", (), {"knn_query": staticmethod(recording_knn_query)})()
+    hits = index.search(vectors[7], 5, {"repository": "billing"})
+
+    assert hits[0][0] == 7
+    assert all(row % 2 == 1 for row, _ in hits)
+    assert calls == [(20, None)], "half the rows match, so twice the rows are fetched with no filter callback"
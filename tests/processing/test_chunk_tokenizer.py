@@ -0,0 +1,67 @@
+import pytest
+
+from src.processing.chunk_tokenizer import ChunkTokenizer, preprocess_for_embedding
+from src.processing.code_chunker import ChunkingConfig, CodeChunker
+from src.processing.tree_sitter_parser import SupportedLanguage
+
+tokenizers = pytest.importorskip("tokenizers")
+transformers = pytest.importorskip("transformers")
+
+
+JAVA_SOURCE = "package com.example.billing;\n\npublic class LedgerService {\n" + "".join(
+    f"    public double adjust{i}(double amount) {{\n"
+    f"        double fee = amount * 0.0{i % 9 + 1};\n"
+    f"        if (fee > LIMIT_{i}) {{ fee = LIMIT_{i}; }}\n"
+    f"        return amount - fee;\n"
+    f"    }}\n\n"
+    for i in range(40)
+) + "}\n"
+
+
+def _byte_level_tokenizer():
+    """Small RoBERTa-style byte-level BPE trained on the test source (no model download)."""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, processors, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=400,
+        special_tokens=["<s>", "<pad>", "</s>", "<unk>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+    )
+    tokenizer.train_from_iterator([JAVA_SOURCE], trainer)
+    tokenizer.post_processor = processors.RobertaProcessing(("</s>", 2), ("<s>", 0))
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>"
+    )
+
+
+def test_chunks_fit_token_budget_and_carry_model_input_ids():
+    tokenizer = _byte_level_tokenizer()
+    config = ChunkingConfig(max_chunk_size=100_000, min_chunk_size=10, complexity_threshold=1e9, max_chunk_tokens=64)
+    chunker = CodeChunker(config, tokenizer=ChunkTokenizer(tokenizer, max_tokens=64))
+
+    chunks = chunker.chunk_file("src/LedgerService.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+
+    assert len(chunks) > 1
+    for enhanced in chunks:
+        assert 0 < len(enhanced.token_ids) <= 64
+        expected = tokenizer(preprocess_for_embedding(enhanced.chunk.content))["input_ids"]
+        assert enhanced.token_ids == expected
+    embedded = "\n".join(preprocess_for_embedding(c.chunk.content) for c in chunks)
+    assert all(f"adjust{i}(" in embedded for i in range(40))
+
+
+def test_oversized_single_line_is_cut_at_token_offsets():
+    tokenizer = _byte_level_tokenizer()
+    chunk_tokenizer = ChunkTokenizer(tokenizer, max_tokens=16)
+    line = "    " + " + ".join(f"LIMIT_{i}" for i in range(30))
+
+    windows = chunk_tokenizer.windows("int a = 1;\n" + line)
+
+    assert len(windows) > 2
+    assert all(chunk_tokenizer.fits(ids) for ids in chunk_tokenizer.encode_many(
+        [("int a = 1;\n" + line)[start:end] for start, end in windows], truncate=True))
+    assert "".join(("int a = 1;\n" + line)[s:e] for s, e in windows[1:]).replace(" ", "") == line.replace(" ", "")
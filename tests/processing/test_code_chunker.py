@@ -0,0 +1,29 @@
+from src.processing.code_chunker import _BUSINESS_DOMAINS, ChunkingConfig, CodeChunker, DomainMatcher
+
+
+def _substring_scores(name: str, content: str):
+    scores = {}
+    for domain, keywords in _BUSINESS_DOMAINS.items():
+        score = sum(3 for kw in keywords if kw in name) + sum(1 for kw in keywords if kw in content)
+        if score > 0:
+            scores[domain] = score
+    return scores
+
+
+def test_domain_matcher_matches_substring_scoring():
+    matcher = DomainMatcher(_BUSINESS_DOMAINS)
+    samples = [
+        ("authenticateuser", "if (user.authorize(token)) { session.commit(); }"),
+        ("basic_auth", "select * from table where index = 1; // basic_authx"),
+        ("", "public void render(form) { log.debug(\"click\"); }"),
+        ("calculate", "plain arithmetic only"),
+    ]
+    for name, content in samples:
+        assert matcher.score(name, content.lower()) == _substring_scores(name, content.lower())
+
+
+def test_chunkers_share_precompiled_matcher_and_parser():
+    first = CodeChunker(ChunkingConfig())
+    second = CodeChunker(ChunkingConfig(), parser=first.parser)
+    assert second.parser is first.parser
+    assert second.domain_matcher is first.domain_matcher
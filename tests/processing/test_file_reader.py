@@ -0,0 +1,39 @@
+import codecs
+
+import pytest
+
+from src.processing.file_reader import AsyncFileReader, read_file_sync
+
+
+def test_encoding_is_detected_once_and_reused(tmp_path):
+    legacy = tmp_path / "Legacy.java"
+    legacy.write_bytes("// Grüße – café".encode("cp1252"))
+    bom = tmp_path / "Bom.java"
+    bom.write_bytes(codecs.BOM_UTF8 + "class Bom {}".encode("utf-8"))
+
+    decoded = read_file_sync(legacy)
+    assert decoded.encoding == "cp1252"
+    assert decoded.content == "// Grüße – café"
+    assert read_file_sync(legacy, encoding=decoded.encoding).content == decoded.content
+
+    assert read_file_sync(bom).encoding == "utf-8-sig"
+    assert read_file_sync(bom).content == "class Bom {}"
+
+
+@pytest.mark.asyncio
+async def test_read_batch_memory_maps_large_files_and_skips_unreadable(tmp_path):
+    small = tmp_path / "Small.java"
+    small.write_text("class Small {}")
+    large = tmp_path / "Large.java"
+    large.write_text("class Large {}\n" * 100)
+
+    reader = AsyncFileReader(max_workers=2, mmap_threshold=1024)
+    try:
+        results = await reader.read_batch([small, tmp_path / "Missing.java", large])
+    finally:
+        reader.shutdown()
+
+    assert results[0].content == "class Small {}"
+    assert results[1] is None
+    assert results[2].content == "class Large {}\n" * 100
+    assert results[2].size == len(results[2].content)
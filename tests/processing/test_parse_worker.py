@@ -0,0 +1,96 @@
+import asyncio
+import pickle
+
+import pytest
+
+from src.processing.code_chunker import ChunkingConfig, CodeChunker
+from src.processing.parse_worker import ParseWorkerPool, analyze_file, chunk_from_record, parse_file
+from src.processing.tree_sitter_parser import SupportedLanguage
+
+
+JAVA_SOURCE = """
+package com.example.billing;
+
+public class InvoiceService {
+    public double calculateTotal(double amount, double taxRate) {
+        if (amount <= 0) {
+            throw new IllegalArgumentException("amount must be positive");
+        }
+        double total = amount + (amount * taxRate);
+        for (int i = 0; i < 3; i++) {
+            total = Math.round(total * 100.0) / 100.0;
+        }
+        return total;
+    }
+}
+"""
+
+
+def _chunking_config() -> ChunkingConfig:
+    return ChunkingConfig(max_chunk_size=1000, min_chunk_size=10, include_context=True, semantic_splitting=True)
+
+
+def test_parse_file_records_are_picklable_and_round_trip():
+    chunker = CodeChunker(_chunking_config())
+    parsed = parse_file(chunker, "src/InvoiceService.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+
+    assert parsed.language == "java"
+    assert parsed.chunks, "expected at least one chunk record"
+
+    restored = pickle.loads(pickle.dumps(parsed))
+    direct = chunker.chunk_file("src/InvoiceService.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+    rebuilt = restored.to_enhanced_chunks()
+
+    assert [c.chunk.id for c in rebuilt] == [c.chunk.id for c in direct]
+    assert rebuilt[0].chunk.language is SupportedLanguage.JAVA
+    assert chunk_from_record(restored.chunks[0]).chunk.content == direct[0].chunk.content
+    assert restored.to_file_data()["chunks_count"] == len(direct)
+
+
+@pytest.mark.asyncio
+async def test_parse_worker_pool_matches_inline_parsing():
+    pool = ParseWorkerPool(max_workers=2, chunking_config=_chunking_config())
+    try:
+        parsed = await pool.parse("src/InvoiceService.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+    finally:
+        pool.shutdown()
+
+    inline = parse_file(CodeChunker(_chunking_config()), "src/InvoiceService.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+    assert [r["id"] for r in parsed.chunks] == [r["id"] for r in inline.chunks]
+    assert parsed.business_analysis["migration_complexity"] == inline.business_analysis["migration_complexity"]
+    assert not pool.is_running
+
+
+@pytest.mark.asyncio
+async def test_retired_pool_finishes_in_flight_parses_before_shutting_down():
+    pool = ParseWorkerPool(max_workers=1, chunking_config=_chunking_config())
+    pending = [
+        asyncio.ensure_future(pool.parse(f"src/Invoice{i}.java", JAVA_SOURCE, SupportedLanguage.JAVA))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    pool.retire()
+    assert pool.is_running, "queued parses must not be cancelled"
+    parsed = await asyncio.gather(*pending)
+    assert all(p.chunks for p in parsed)
+    assert not pool.is_running
+    with pytest.raises(RuntimeError):
+        await pool.parse("src/Late.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+
+
+def test_analyze_file_parses_once():
+    chunker = CodeChunker(_chunking_config())
+    calls = []
+    original_parse = chunker.parser.parse_code
+
+    def counting_parse(content, language, file_path):
+        calls.append(file_path)
+        return original_parse(content, language, file_path)
+
+    chunker.parser.parse_code = counting_parse
+    chunks, business_analysis = analyze_file(chunker, "src/InvoiceService.java", JAVA_SOURCE, SupportedLanguage.JAVA)
+
+    assert calls == ["src/InvoiceService.java"]
+    assert chunks
+    assert "migration_complexity" in business_analysis
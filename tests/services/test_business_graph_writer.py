@@ -0,0 +1,66 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from src.services.business_graph_writer import BusinessAnalysisBatchWriter
+
+
+class RecordingNeo4jClient:
+    def __init__(self, fail_kind: str = None):
+        self.calls: List[tuple] = []
+        self.fail_kind = fail_kind
+
+    async def _record(self, kind: str, records: List[Dict[str, Any]]) -> bool:
+        self.calls.append((kind, len(records)))
+        return kind != self.fail_kind
+
+    async def create_business_rules(self, records):
+        return await self._record('business_rules', records)
+
+    async def create_struts_actions(self, records):
+        return await self._record('struts_actions', records)
+
+    async def create_corba_interfaces(self, records):
+        return await self._record('corba_interfaces', records)
+
+    async def create_jsp_components(self, records):
+        return await self._record('jsp_components', records)
+
+
+def _file_records(n: int) -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        'business_rules': [{'id': f'rule-{n}-{i}', 'repository': 'repo'} for i in range(3)],
+        'struts_actions': [{'id': f'struts-{n}', 'repository': 'repo'}],
+        'corba_interfaces': [],
+        'jsp_components': []
+    }
+
+
+@pytest.mark.asyncio
+async def test_records_are_buffered_across_files_and_flushed_in_bulk():
+    client = RecordingNeo4jClient()
+    writer = BusinessAnalysisBatchWriter(client, max_records=10, max_interval=3600)
+
+    for n in range(5):
+        await writer.add(_file_records(n))
+
+    # 12 records reached the size threshold after the third file
+    assert client.calls == [('business_rules', 9), ('struts_actions', 3)]
+    assert writer.pending == 8
+
+    await writer.flush()
+    assert client.calls[2:] == [('business_rules', 6), ('struts_actions', 2)]
+    assert writer.written_records == 20
+    assert writer.flush_count == 2
+    assert writer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_time_threshold_and_failures():
+    client = RecordingNeo4jClient(fail_kind='struts_actions')
+    writer = BusinessAnalysisBatchWriter(client, max_records=1000, max_interval=0)
+
+    await writer.add(_file_records(0))
+    assert writer.pending == 0
+    assert writer.written_records == 3
+    assert writer.failed_records == 1
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core.embedding_registry import EmbeddingRegistry
+from src.services.embedding_migrator import EmbeddingMigrator
+
+
+class FakeChroma:
+    """Collections as {id: (document, metadata, embedding)}."""
+
+    def __init__(self):
+        self.collections = {}
+
+    async def count(self, collection_name):
+        return len(self.collections.get(collection_name, {}))
+
+    async def get_records(self, collection_name, limit=500, offset=0, include=None, ids=None):
+        records = self.collections.get(collection_name, {})
+        selected = ids if ids is not None else list(records)[offset:offset + limit]
+        return {
+            "ids": selected,
+            "documents": [records[i][0] for i in selected],
+            "metadatas": [records[i][1] for i in selected],
+        }
+
+    async def add_records(self, collection_name, ids, documents, metadatas, embeddings=None, upsert=False):
+        collection = self.collections.setdefault(collection_name, {})
+        for i, record_id in enumerate(ids):
+            collection[record_id] = (documents[i], metadatas[i], embeddings[i])
+
+
+class FakeEmbeddingClient:
+    def __init__(self, model_name, chroma=None, late_write=None):
+        self.config = SimpleNamespace(model_name=model_name, cache_namespace=lambda: f"fp-{model_name}")
+        self.chroma = chroma
+        self.late_write = late_write
+        self.closed = False
+
+    async def encode(self, texts, **kwargs):
+        if self.late_write:
+            # The old model indexes a chunk while the shadow is being built
+            self.chroma.collections["repo"].update(self.late_write)
+            self.late_write = None
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_migrator_builds_shadow_catches_up_and_switches(tmp_path):
+    chroma = FakeChroma()
+    chroma.collections["repo"] = {f"c{i}": (f"code {i}", {"language": "java"}, None) for i in range(5)}
+    registry = EmbeddingRegistry(str(tmp_path / "registry.json"))
+    registry.write_collection("repo", "fp-old")
+    switched = []
+
+    migrator = EmbeddingMigrator(chroma, registry, on_switch=switched.append, page_size=2, throttle_seconds=0)
+    target = FakeEmbeddingClient("new", chroma, late_write={"c9": ("late", {}, None)})
+    status = await migrator.reembed(target)
+
+    shadow = registry.active("repo").collection
+    assert status["state"] == "completed"
+    assert switched == [target] and not target.closed
+    assert shadow != "repo" and set(chroma.collections[shadow]) == {f"c{i}" for i in range(5)} | {"c9"}
+    assert all(meta["embedding_fingerprint"] == "fp-new" for _, meta, _ in chroma.collections[shadow].values())
+    assert registry.query_collection("repo", "fp-new") == shadow
+    assert registry.query_collection("repo", "fp-old") == "repo"
@@ -0,0 +1,67 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from src.services.ingestion_pipeline import IngestionPipeline, PipelineConfig
+
+
+def _pipeline(write_fn, config=None, embedded: List[int] = None, file_fn=None):
+    async def read(item):
+        return None if item % 10 == 9 else item
+
+    async def parse(item):
+        return {'path': str(item)}, [f"{item}-{n}" for n in range(3)]
+
+    async def embed(batch):
+        if embedded is not None:
+            embedded.append(len(batch))
+        return batch
+
+    return IngestionPipeline(read, parse, embed, write_fn, config=config, file_fn=file_fn)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_streams_all_chunks_with_bounded_queues():
+    written: List[str] = []
+    embedded: List[int] = []
+    config = PipelineConfig(read_queue_size=2, chunk_queue_size=4, write_queue_size=1,
+                            parse_concurrency=2, embed_batch_size=5, write_concurrency=2)
+
+    async def write(batch):
+        await asyncio.sleep(0.001)
+        written.extend(batch)
+
+    files: List[str] = []
+
+    async def record_file(file_data):
+        files.append(file_data['path'])
+
+    pipeline = _pipeline(write, config, embedded, file_fn=record_file)
+    result = await pipeline.run(range(40))
+
+    assert result.stats.files_parsed == 36
+    assert sorted(files, key=int) == [str(i) for i in range(40) if i % 10 != 9]
+    assert result.stats.chunks_generated == 108
+    assert result.stats.chunks_written == 108
+    assert sorted(written) == sorted(f"{i}-{n}" for i in range(40) if i % 10 != 9 for n in range(3))
+    assert max(embedded) <= config.embed_batch_size
+    assert result.stats.first_write_at is not None
+
+
+@pytest.mark.asyncio
+async def test_pipeline_write_failure_cancels_stages():
+    async def write(batch):
+        raise RuntimeError("store down")
+
+    pipeline = _pipeline(write, PipelineConfig(chunk_queue_size=2, write_queue_size=1, embed_batch_size=2))
+    with pytest.raises(RuntimeError, match="store down"):
+        await asyncio.wait_for(pipeline.run(range(100)), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_without_writer_only_counts_chunks():
+    pipeline = _pipeline(None)
+    result = await pipeline.run(range(5))
+    assert result.stats.chunks_generated == 15
+    assert result.stats.chunks_written == 0
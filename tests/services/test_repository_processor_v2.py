@@ -0,0 +1,247 @@
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from src.core.performance_metrics import performance_collector
+from src.services.repository_processor_v2 import (
+    EnhancedRepositoryProcessor,
+    LocalRepositoryConfig,
+    _matches_include_pattern,
+)
+
+
+JAVA_ACTION = """
+package com.example.web;
+
+public class LoginAction {
+    public String execute(String user, String password) {
+        if (user == null || user.isEmpty()) {
+            return "failure";
+        }
+        return "success";
+    }
+}
+"""
+
+
+class MockNeo4jClient:
+    def __init__(self):
+        self.queries: List[Any] = []
+        self.deleted_files: List[str] = []
+
+    async def execute_query(self, query):
+        self.queries.append(query)
+        return type("Result", (), {"records": []})()
+
+    async def delete_file_nodes(self, repository_name, file_paths, chunk_ids):
+        self.deleted_files.extend(file_paths)
+        return True
+
+    async def create_business_rules(self, records):
+        return True
+
+    async def create_struts_actions(self, records):
+        return True
+
+    async def create_corba_interfaces(self, records):
+        return True
+
+    async def create_jsp_components(self, records):
+        return True
+
+
+class MockChromaClient:
+    def __init__(self):
+        self.added: Dict[str, list] = {}
+        self.deleted_ids: List[str] = []
+
+    async def add_chunks(self, chunks, collection_name=None, repository=None):
+        self.added.setdefault(collection_name or repository, []).extend(chunks)
+        return True
+
+    async def delete_chunks(self, ids, collection_name=None, repository=None):
+        self.deleted_ids.extend(ids)
+        return True
+
+
+def _make_repo(root: Path) -> Path:
+    (root / "src" / "com" / "example").mkdir(parents=True)
+    (root / "target" / "classes").mkdir(parents=True)
+    (root / "src" / "com" / "example" / "LoginAction.java").write_text(JAVA_ACTION)
+    (root / "src" / "com" / "example" / "LogoutAction.java").write_text(JAVA_ACTION.replace("Login", "Logout"))
+    (root / "target" / "classes" / "Generated.java").write_text(JAVA_ACTION)
+    (root / "README.md").write_text("# not code")
+    return root
+
+
+def _processor(**kwargs) -> EnhancedRepositoryProcessor:
+    return EnhancedRepositoryProcessor(
+        chroma_client=MockChromaClient(),
+        neo4j_client=MockNeo4jClient(),
+        use_codebert=False,
+        **kwargs
+    )
+
+
+def test_include_pattern_matches_glob_semantics():
+    assert _matches_include_pattern("Main.java", "**/*.java")
+    assert _matches_include_pattern("a/b/Main.java", "**/*.java")
+    assert _matches_include_pattern("Main.java", "*.java")
+    assert not _matches_include_pattern("a/Main.java", "*.java")
+    assert not _matches_include_pattern("a/Main.py", "**/*.java")
+
+
+@pytest.mark.asyncio
+async def test_discovery_reads_each_file_once(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    processor = _processor()
+    config = LocalRepositoryConfig(name="repo", path=str(repo))
+
+    reads: List[Path] = []
+    original_read = processor.file_reader.read
+
+    async def counting_read(file_path, encoding=None):
+        reads.append(file_path)
+        return await original_read(file_path, encoding)
+
+    processor.file_reader.read = counting_read
+
+    analysis = await processor._analyze_repository_async(repo, config)
+    manifest = analysis["manifest"]
+    assert sorted(entry.relative_path for entry in manifest) == [
+        str(Path("src/com/example/LoginAction.java")),
+        str(Path("src/com/example/LogoutAction.java")),
+    ]
+    assert analysis["language_counts"] == {"java": 2}
+    assert all(entry.content_hash and entry.language == "java" for entry in manifest)
+    assert all(entry.encoding == "utf-8" for entry in manifest)
+
+    code_results = await processor._process_code_files_async(repo, config, analysis)
+    assert code_results["file_count"] == 2
+    assert code_results["chunk_count"] > 0
+    assert processor.chroma_client.added == {}, "dry processing must not write chunks"
+    assert len(reads) == 2, "files should be read once across analysis and parsing"
+    assert manifest.cached_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_discovery_cache_is_bounded_and_released(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    (repo / "src" / "com" / "example" / "Empty.java").write_text("   \n")
+    processor = _processor(discovery_cache_bytes=len(JAVA_ACTION))
+    config = LocalRepositoryConfig(name="repo", path=str(repo))
+
+    analysis = await processor._analyze_repository_async(repo, config)
+    manifest = analysis["manifest"]
+    assert len(manifest) == 3
+    # Blank files are never parsed, and only one file fits the budget
+    assert manifest.cached_bytes == len(JAVA_ACTION)
+
+    async def failing_parse(*args, **kwargs):
+        raise RuntimeError("parser crashed")
+
+    processor._parse_file_async = failing_parse
+    await processor._process_code_files_async(repo, config, analysis)
+    assert manifest.cached_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_update_only_reindexes_changed_files(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    processor = _processor(workspace_dir=str(tmp_path / "workspace"))
+    config = LocalRepositoryConfig(name="repo", path=str(repo), business_domain="auth")
+
+    first = await processor.process_local_repository(config)
+    assert first.status.value == "completed"
+    assert first.processed_files == 2
+    stored = processor.chroma_client.added["repo"]
+    assert len(stored) == first.generated_chunks
+    assert all(chunk.business_domain for chunk in stored)
+
+    state = processor.index_state_store.load("repo")
+    login = str(Path("src/com/example/LoginAction.java"))
+    logout = str(Path("src/com/example/LogoutAction.java"))
+    old_login_ids = state.files[login].chunk_ids
+    old_logout_ids = state.files[logout].chunk_ids
+    assert old_login_ids and old_logout_ids
+
+    # No changes: nothing is parsed or deleted
+    unchanged = await processor.incremental_update("repo")
+    assert unchanged.status.value == "completed"
+    assert unchanged.processed_files == 0
+    assert processor.chroma_client.deleted_ids == []
+
+    # Change one file, remove another, add a new one
+    (repo / "src/com/example/LoginAction.java").write_text(JAVA_ACTION.replace("failure", "denied"))
+    (repo / "src/com/example/LogoutAction.java").unlink()
+    (repo / "src/com/example/AuditAction.java").write_text(JAVA_ACTION.replace("Login", "Audit"))
+
+    update = await processor.incremental_update("repo")
+    assert update.status.value == "completed"
+    assert update.processed_files == 2
+    assert sorted(processor.chroma_client.deleted_ids) == sorted(old_login_ids + old_logout_ids)
+    assert sorted(processor.neo4j_client.deleted_files) == sorted([login, logout])
+
+    new_state = processor.index_state_store.load("repo")
+    assert set(new_state.files) == {login, str(Path("src/com/example/AuditAction.java"))}
+
+
+@pytest.mark.asyncio
+async def test_file_that_fails_to_parse_is_retried_by_the_next_update(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    processor = _processor(workspace_dir=str(tmp_path / "workspace"))
+    config = LocalRepositoryConfig(name="repo", path=str(repo))
+    assert (await processor.process_local_repository(config)).status.value == "completed"
+    login = str(Path("src/com/example/LoginAction.java"))
+
+    (repo / "src/com/example/LoginAction.java").write_text(JAVA_ACTION.replace("failure", "denied"))
+    original_parse = processor._parse_file_async
+
+    async def failing_parse(rel_path, *args, **kwargs):
+        if rel_path == login:
+            raise RuntimeError("parser crashed")
+        return await original_parse(rel_path, *args, **kwargs)
+
+    processor._parse_file_async = failing_parse
+    failed = await processor.incremental_update("repo")
+    assert failed.status.value == "completed" and failed.processed_files == 0
+    assert login not in processor.index_state_store.load("repo").files
+
+    processor._parse_file_async = original_parse
+    retried = await processor.incremental_update("repo")
+    assert retried.processed_files == 1
+    assert processor.index_state_store.load("repo").files[login].chunk_ids
+
+
+@pytest.mark.asyncio
+async def test_incremental_update_without_state_fails_cleanly(tmp_path):
+    processor = _processor(workspace_dir=str(tmp_path / "workspace"))
+    result = await processor.incremental_update("unknown")
+    assert result.status.value == "failed"
+    assert result.error_code == "NO_INDEX_STATE"
+
+
+@pytest.mark.asyncio
+async def test_indexing_records_per_stage_metrics(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    processor = _processor(workspace_dir=str(tmp_path / "workspace"))
+    config = LocalRepositoryConfig(name="repo", path=str(repo))
+
+    result = await processor.process_local_repository(config, run_id="stage-metrics-run")
+    assert result.status.value == "completed"
+
+    stages = performance_collector.get_stage_metrics("stage-metrics-run")
+    assert set(stages) >= {
+        "discovery", "read", "parse", "chunk", "business_analysis",
+        "embed", "chroma_write", "neo4j_write",
+    }
+    sources = list((repo / "src" / "com" / "example").glob("*.java"))
+    assert stages["discovery"]["items"] == 2
+    assert stages["read"]["items"] == 2
+    assert stages["read"]["bytes_read"] == sum(path.stat().st_size for path in sources)
+    assert stages["parse"]["items"] == 2
+    assert stages["parse"]["max_queue_depth"] >= 0
+    assert stages["chunk"]["items"] == result.generated_chunks
+    assert stages["chroma_write"]["items"] == result.generated_chunks
+    assert all(metrics["wall_time"] >= 0 and metrics["cpu_time"] >= 0 for metrics in stages.values())